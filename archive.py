@@ -0,0 +1,446 @@
+#!/usr/bin/env python3
+"""
+archive.py
+
+Pack finished run directories (stats.txt, config.ini, config.json,
+manifest.json, simout, ...) into one compressed archive, and read any file
+of any run back without unpacking the others. parse_stats.py reads archived
+runs directly with --archive.
+
+Usage:
+
+  # Pack the complete runs of an output directory, optionally deleting the
+  # run directories once their files were read back from the archive
+  ./archive.py pack runs.archive --base-dir m5out [--runs ID ... | --runs-file daxpy-runs.txt] \
+    [--codec zlib|zstd] [--allow-partial] [--remove]
+
+  # List the archived runs, print one file, unpack a run
+  ./archive.py list runs.archive
+  ./archive.py cat runs.archive o3-base-daxpy [stats.txt]
+  ./archive.py extract runs.archive o3-base-daxpy [-o m5out]
+
+  # Compression ratio and deduplication per file name
+  ./archive.py info runs.archive
+
+The archive is a SQLite database. Every file is stored once per distinct
+content (content-addressed by its SHA-256, so identical files of different
+runs share one blob), compressed on its own so it can be read without the
+others. The files of the dozens of o3-* variants of a sweep are nearly
+identical, so they are compressed with a dictionary shared by all files of
+the same name: a trained zstd dictionary, or with zlib the beginning of one
+of the files as preset dictionary. Dictionaries are built the first time a
+file name is packed and reused by later packs into the same archive.
+
+zstd needs the 'zstandard' python package, zlib only needs the standard
+library.
+"""
+
+import argparse
+import hashlib
+import json
+import os
+import shutil
+import sqlite3
+import time
+import zlib
+
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
+
+from sweep import MANIFEST_NAME, run_status
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS dicts (
+    id INTEGER PRIMARY KEY,
+    codec TEXT NOT NULL,
+    name TEXT NOT NULL,
+    data BLOB NOT NULL,
+    UNIQUE (codec, name)
+);
+CREATE TABLE IF NOT EXISTS blobs (
+    hash TEXT PRIMARY KEY,
+    codec TEXT NOT NULL,
+    dict INTEGER,
+    size INTEGER NOT NULL,
+    data BLOB NOT NULL
+);
+CREATE TABLE IF NOT EXISTS files (
+    run TEXT NOT NULL,
+    name TEXT NOT NULL,
+    hash TEXT NOT NULL,
+    PRIMARY KEY (run, name)
+);
+CREATE TABLE IF NOT EXISTS runs (
+    run TEXT PRIMARY KEY,
+    state TEXT NOT NULL,
+    packed REAL
+);
+"""
+
+CODECS = ["zlib", "zstd"]
+
+# zlib only looks 32KB back, a longer preset dictionary is never used
+ZLIB_DICT_SIZE = 32 * 1024
+ZSTD_DICT_SIZE = 112 * 1024
+# zstd needs a few samples to train a dictionary
+ZSTD_MIN_SAMPLES = 8
+# Files, and bytes of each file, a dictionary is built from
+DICT_SAMPLES = 32
+DICT_SAMPLE_SIZE = 1 << 20
+
+# Files that are already compressed are stored as they are
+STORED_SUFFIXES = (".gz", ".zst", ".png")
+
+
+def _require_zstd():
+    if zstandard is None:
+        raise RuntimeError(
+            "zstd archives need the 'zstandard' package (pip install zstandard)"
+        )
+
+
+def connect(path):
+    """
+    connect opens an archive, creating it if needed.
+    """
+    conn = sqlite3.connect(path)
+    conn.row_factory = sqlite3.Row
+    conn.executescript(SCHEMA)
+    return conn
+
+
+def build_dict(codec, samples):
+    """
+    build_dict makes the shared dictionary of one file name from the
+    contents of some of its files.
+
+    :return: the dictionary, or None if the samples are too few or too small.
+    """
+    samples = [s for s in samples if s]
+    if not samples:
+        return None
+    if codec == "zlib":
+        # The beginning of a file is most like the beginning of the others,
+        # which is the only part a 32KB window can match
+        return samples[0][:ZLIB_DICT_SIZE]
+    if len(samples) < ZSTD_MIN_SAMPLES:
+        return None
+    try:
+        return zstandard.train_dictionary(ZSTD_DICT_SIZE, samples).as_bytes()
+    except zstandard.ZstdError:
+        return None
+
+
+def _compress(data, codec, zdict=None):
+    if codec == "none":
+        return data
+    if codec == "zstd":
+        dict_data = zstandard.ZstdCompressionDict(zdict) if zdict else None
+        return zstandard.ZstdCompressor(level=19, dict_data=dict_data).compress(data)
+    c = zlib.compressobj(9, zdict=zdict) if zdict else zlib.compressobj(9)
+    return c.compress(data) + c.flush()
+
+
+def _decompress(data, codec, zdict=None):
+    if codec == "none":
+        return data
+    if codec == "zstd":
+        _require_zstd()
+        dict_data = zstandard.ZstdCompressionDict(zdict) if zdict else None
+        return zstandard.ZstdDecompressor(dict_data=dict_data).decompress(data)
+    d = zlib.decompressobj(zdict=zdict) if zdict else zlib.decompressobj()
+    return d.decompress(data) + d.flush()
+
+
+def _dict(conn, codec, name):
+    row = conn.execute(
+        "SELECT id, data FROM dicts WHERE codec = ? AND name = ?", (codec, name)
+    ).fetchone()
+    return (row["id"], row["data"]) if row else (None, None)
+
+
+def _run_files(run_path):
+    for root, _, names in os.walk(run_path):
+        for name in sorted(names):
+            path = os.path.join(root, name)
+            yield os.path.relpath(path, run_path), path
+
+
+def pack(conn, base_dir, runs, codec="zlib", allow_partial=False):
+    """
+    pack stores the files of the runs <base_dir>/<run> in the archive,
+    replacing earlier copies of the same runs. Only complete runs are packed
+    (see run_status in sweep.py), unless allow_partial. Files are read one
+    at a time, only the samples of a new dictionary are held in memory.
+
+    :return: a dict run -> state of the packed runs, and the skipped runs
+        as a dict run -> state.
+    """
+    if codec == "zstd":
+        _require_zstd()
+    states, skipped, by_name = {}, {}, {}
+    for run in runs:
+        run_path = os.path.join(base_dir, run)
+        state = run_status(run_path)
+        if state == "missing" or (state != "complete" and not allow_partial):
+            skipped[run] = state
+            continue
+        states[run] = state
+        for name, path in _run_files(run_path):
+            by_name.setdefault(name, []).append((run, path))
+
+    with conn:
+        now = time.time()
+        for run, state in states.items():
+            conn.execute("DELETE FROM files WHERE run = ?", (run,))
+            conn.execute(
+                "INSERT OR REPLACE INTO runs (run, state, packed) VALUES (?, ?, ?)",
+                (run, state, now),
+            )
+        for name, files in by_name.items():
+            file_codec = "none" if name.endswith(STORED_SUFFIXES) else codec
+            dict_id, zdict = _dict(conn, codec, name)
+            if dict_id is None and file_codec != "none":
+                samples = []
+                for _, path in files[:DICT_SAMPLES]:
+                    with open(path, "rb") as f:
+                        samples.append(f.read(DICT_SAMPLE_SIZE))
+                zdict = build_dict(codec, samples)
+                if zdict is not None:
+                    dict_id = conn.execute(
+                        "INSERT INTO dicts (codec, name, data) VALUES (?, ?, ?)",
+                        (codec, name, zdict),
+                    ).lastrowid
+            for run, path in files:
+                with open(path, "rb") as f:
+                    data = f.read()
+                digest = hashlib.sha256(data).hexdigest()
+                if conn.execute("SELECT 1 FROM blobs WHERE hash = ?", (digest,)).fetchone() is None:
+                    conn.execute(
+                        "INSERT INTO blobs (hash, codec, dict, size, data) VALUES (?, ?, ?, ?, ?)",
+                        (digest, file_codec, dict_id if file_codec != "none" else None,
+                         len(data), _compress(data, file_codec, zdict)),
+                    )
+                conn.execute(
+                    "INSERT INTO files (run, name, hash) VALUES (?, ?, ?)", (run, name, digest)
+                )
+    return states, skipped
+
+
+def list_runs(conn):
+    """
+    list_runs returns the archived runs and their state when they were
+    packed.
+
+    :return: a dict run -> state.
+    """
+    return {
+        row["run"]: row["state"]
+        for row in conn.execute("SELECT run, state FROM runs ORDER BY run")
+    }
+
+
+def list_files(conn, run):
+    return [
+        row["name"]
+        for row in conn.execute("SELECT name FROM files WHERE run = ? ORDER BY name", (run,))
+    ]
+
+
+def read_file(conn, run, name):
+    """
+    read_file decompresses one file of an archived run.
+
+    :return: the content as bytes, or None if the run has no such file.
+    """
+    row = conn.execute(
+        """
+        SELECT blobs.codec, blobs.data, dicts.data AS zdict FROM files
+        JOIN blobs ON blobs.hash = files.hash
+        LEFT JOIN dicts ON dicts.id = blobs.dict
+        WHERE files.run = ? AND files.name = ?
+        """,
+        (run, name),
+    ).fetchone()
+    if row is None:
+        return None
+    return _decompress(row["data"], row["codec"], row["zdict"])
+
+
+def read_text(conn, run, name):
+    data = read_file(conn, run, name)
+    return None if data is None else data.decode(errors="replace")
+
+
+def read_manifest(conn, run):
+    """
+    read_manifest loads the manifest.json of an archived run, like
+    sweep.read_manifest does for a run directory.
+    """
+    text = read_text(conn, run, MANIFEST_NAME)
+    return None if text is None else json.loads(text)
+
+
+def extract(conn, run, dest):
+    """
+    extract unpacks the files of an archived run into <dest>/<run>.
+
+    :return: the path of the run directory.
+    """
+    run_path = os.path.join(dest, run)
+    for name in list_files(conn, run):
+        path = os.path.join(run_path, name)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(path, "wb") as f:
+            f.write(read_file(conn, run, name))
+    return run_path
+
+
+def verify(conn, base_dir, run):
+    """
+    verify checks that every file of <base_dir>/<run> reads back from the
+    archive with the same content.
+    """
+    archived = set(list_files(conn, run))
+    for name, path in _run_files(os.path.join(base_dir, run)):
+        if name not in archived:
+            return False
+        with open(path, "rb") as f:
+            if f.read() != read_file(conn, run, name):
+                return False
+    return True
+
+
+def info(conn):
+    """
+    info returns the raw and stored bytes per file name, counting every
+    file of every run for the raw bytes and every distinct content once for
+    the stored bytes.
+
+    :return: a list of (name, files, distinct, raw bytes, stored bytes).
+    """
+    return [
+        tuple(row) for row in conn.execute(
+            """
+            SELECT files.name, COUNT(*), COUNT(DISTINCT files.hash), SUM(blobs.size),
+                (SELECT SUM(LENGTH(b.data)) FROM blobs b WHERE b.hash IN
+                    (SELECT hash FROM files f WHERE f.name = files.name))
+            FROM files JOIN blobs ON blobs.hash = files.hash
+            GROUP BY files.name ORDER BY SUM(blobs.size) DESC
+            """
+        )
+    ]
+
+
+def _load_ids(path):
+    with open(path) as f:
+        return [line.strip() for line in f if line.strip() and not line.startswith("#")]
+
+
+def _format_bytes(n):
+    for unit, scale in (("GB", 1 << 30), ("MB", 1 << 20), ("KB", 1 << 10)):
+        if n >= scale:
+            return f"{n / scale:.1f}{unit}"
+    return f"{n}B"
+
+
+def main():
+    p = argparse.ArgumentParser(
+        description="Compressed, deduplicated archive of gem5 run directories"
+    )
+    sub = p.add_subparsers(dest="command", required=True)
+
+    p_pack = sub.add_parser("pack", help="Pack run directories into the archive")
+    p_pack.add_argument("archive", help="Archive file")
+    p_pack.add_argument("--base-dir", default="m5out",
+                        help="Directory containing subfolders for each run (default: m5out)")
+    runs_group = p_pack.add_mutually_exclusive_group()
+    runs_group.add_argument("--runs", nargs="+", help="Runs to pack (default: every run in base-dir)")
+    runs_group.add_argument("--runs-file", metavar="FILE", help="Text file with one run name per line")
+    p_pack.add_argument("--codec", choices=CODECS, default="zlib",
+                        help="Compression of the files (default: zlib)")
+    p_pack.add_argument("--allow-partial", action="store_true",
+                        help="Also pack failed, stopped and truncated runs")
+    p_pack.add_argument("--remove", action="store_true",
+                        help="Delete the run directories that read back correctly from the archive")
+
+    p_list = sub.add_parser("list", help="List the archived runs")
+    p_list.add_argument("archive", help="Archive file")
+
+    p_cat = sub.add_parser("cat", help="Print one file of an archived run")
+    p_cat.add_argument("archive", help="Archive file")
+    p_cat.add_argument("run", help="Run name")
+    p_cat.add_argument("file", nargs="?", default="stats.txt", help="File of the run (default: stats.txt)")
+
+    p_extract = sub.add_parser("extract", help="Unpack archived runs")
+    p_extract.add_argument("archive", help="Archive file")
+    p_extract.add_argument("runs", nargs="+", help="Run names")
+    p_extract.add_argument("-o", "--output-dir", default="m5out",
+                           help="Directory to unpack the runs into (default: m5out)")
+
+    p_info = sub.add_parser("info", help="Show the size of the archive per file name")
+    p_info.add_argument("archive", help="Archive file")
+    args = p.parse_args()
+
+    if args.command != "pack" and not os.path.isfile(args.archive):
+        p.error(f"no archive '{args.archive}'")
+    conn = connect(args.archive)
+
+    if args.command == "pack":
+        if args.runs_file:
+            runs = _load_ids(args.runs_file)
+        elif args.runs:
+            runs = args.runs
+        else:
+            runs = sorted(
+                name for name in os.listdir(args.base_dir)
+                if os.path.isdir(os.path.join(args.base_dir, name))
+            )
+        states, skipped = pack(conn, args.base_dir, runs, args.codec, args.allow_partial)
+        for run, state in skipped.items():
+            print(f"[warning] run '{run}' is {state}, skipping.")
+        print(f"✓ Packed {len(states)} runs into '{args.archive}'")
+        if args.remove:
+            removed = 0
+            for run in states:
+                if verify(conn, args.base_dir, run):
+                    shutil.rmtree(os.path.join(args.base_dir, run))
+                    removed += 1
+                else:
+                    print(f"[warning] run '{run}' does not read back from the archive, kept.")
+            print(f"✓ Removed {removed} run directories from '{args.base_dir}'")
+
+    elif args.command == "list":
+        for run, state in list_runs(conn).items():
+            print(f"{run}\t{state}")
+
+    elif args.command == "cat":
+        data = read_file(conn, args.run, args.file)
+        if data is None:
+            p.error(f"run '{args.run}' has no file '{args.file}' in the archive")
+        print(data.decode(errors="replace"), end="")
+
+    elif args.command == "extract":
+        for run in args.runs:
+            if not list_files(conn, run):
+                print(f"[warning] run '{run}' is not in the archive, skipping.")
+                continue
+            print(f"✓ Extracted '{run}' to '{extract(conn, run, args.output_dir)}'")
+
+    elif args.command == "info":
+        total_raw = total_stored = 0
+        print(f"{'file':<24} {'files':>6} {'distinct':>8} {'raw':>9} {'stored':>9} {'ratio':>7}")
+        for name, files, distinct, raw, stored in info(conn):
+            total_raw += raw
+            total_stored += stored
+            print(f"{name:<24} {files:>6} {distinct:>8} {_format_bytes(raw):>9} "
+                  f"{_format_bytes(stored):>9} {raw / max(stored, 1):>6.1f}x")
+        print(f"{len(list_runs(conn))} runs, {_format_bytes(total_raw)} in "
+              f"{_format_bytes(total_stored)} ({total_raw / max(total_stored, 1):.1f}x), "
+              f"archive file {_format_bytes(os.path.getsize(args.archive))}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,756 @@
+#!/usr/bin/env python3
+"""
+area_model.py
+
+Area and energy estimates of the simulated systems, so design points can be
+compared by performance per watt and per mm² instead of by the area score of
+get_area_score, which only looks at the width, ROB and register files.
+
+The analytic model ("analytic") follows the structure of McPAT and CACTI at
+a much coarser grain. Every core structure (ROB, issue queue, register files,
+rename table, LSQ, store sets, branch predictor, ...) and every cache is an
+SRAM or CAM array whose area, energy per access and leakage follow from its
+entries, bits and ports. Functional units and the pipeline logic have a fixed
+area and energy per operation. Dynamic energy is the energy per access times
+the activity counts of the run's statistics, leakage energy is the leakage
+power times simSeconds. DRAM energy comes from gem5's DRAMPower rank
+statistics, or from the bytes transferred if they were not collected.
+
+Usage:
+
+  ./parse_stats.py --runs-file daxpy-runs.txt --stats-file stats-to-fetch.txt \
+    --manifest --output-csv results-daxpy/daxpy-all.csv
+  ./area_model.py results-daxpy/daxpy-all.csv [results-bfs/bfs-all.csv ...] \
+    [--model analytic] [--output-csv area_energy.csv] [--breakdown RUN] \
+    [--save-plots --plots-dir plots/area-energy]
+
+Per run:
+
+  area_mm2        cores and caches (DRAM is off chip)
+  dynamic_J       dynamic energy of the cores and caches
+  leakage_J       leakage energy of the cores and caches
+  dram_J          DRAM energy
+  energy_J        dynamic_J + leakage_J + dram_J
+  power_W         energy_J / simSeconds
+  mips            committed instructions per second, in millions
+  mips_per_W      mips / power_W
+  mips_per_mm2    mips / area_mm2
+  approx          True if activity counts were not collected and were
+                  estimated from simInsts (collect the energy stats of
+                  stats-to-fetch.txt)
+
+The configuration of a run comes from its manifest columns (parse_stats.py
+--manifest), or from its run id for runs without a manifest. The technology
+parameters are those of a 22 nm process at 1 GHz; use the numbers to rank
+design points, not as absolute values.
+
+Other models can be added to MODELS, see AreaEnergyModel.
+"""
+
+import argparse
+import math
+import os
+from collections import namedtuple
+
+import pandas as pd
+import matplotlib.pyplot as plt
+
+from o3_config import resolve_o3_params
+from sweep import (
+    inorder_base,
+    inorder_sweeps,
+    multicore_sweeps,
+    o3_params,
+    parse_run_id,
+    system_sweeps,
+)
+
+# Technology parameters of the analytic model, roughly 22 nm at 1 GHz
+SRAM_BIT_UM2 = 0.12             # 6T SRAM cell
+ARRAY_OVERHEAD = 1.5            # decoders, sense amplifiers and drivers
+CAM_FACTOR = 2.5                # CAM cell over SRAM cell
+PORT_PITCH = 0.25               # growth of the cell side per extra port
+SUBARRAY_ROWS = 256             # longest bitline, larger arrays are banked
+READ_FJ_PER_BIT = 2.0           # sense amplifier, per bit read
+BITLINE_FJ_PER_ROW = 0.02       # bitline, per bit read and row
+WIRE_FJ_PER_BIT_MM = 80.0       # H-tree to the edge of the array, per bit out
+MATCH_FJ_PER_BIT = 1.0          # CAM match line, per bit compared
+SRAM_LEAK_W_PER_BIT = 2e-8
+LOGIC_LEAK_W_PER_MM2 = 0.08
+CACHE_LINE = 64
+CACHE_TAG_BITS = 40             # tag, state and replacement bits per line
+
+# Functional units: area (mm²) and energy per operation (pJ). The multiply
+# and divide units only add area, their operations are counted with the ALUs.
+FU_MODEL = {
+    "int_alu": (0.012, 1.0),
+    "int_mult_div": (0.05, 6.0),
+    "fp_alu": (0.04, 5.0),
+    "fp_mult_div": (0.08, 10.0),
+    "simd": (0.10, 20.0),
+    "pred_alu": (0.003, 0.5),
+    "read_port": (0.01, 1.0),
+    "write_port": (0.01, 1.0),
+    "rdwr_port": (0.012, 1.0),
+    "ipr_port": (0.002, 0.5),
+}
+
+# Branch predictors: storage in bits (gem5 default sizes) and the number of
+# tables read per lookup
+BP_MODEL = {
+    "local": (2048 * 2, 2),
+    "tournament": (2048 * 2 + 2048 * 11 + 8192 * 2 + 8192 * 2, 4),
+    "bimode": (8192 * 2 * 2 + 8192 * 2, 3),
+    "tage": (72 * 1024, 8),
+    "ltage": (76 * 1024, 9),
+    "tage-sc-l-8kb": (8 * 1024 * 8, 12),
+    "tage-sc-l-64kb": (64 * 1024 * 8, 12),
+    "perceptron-8kb": (8 * 1024 * 8, 16),
+    "perceptron-64kb": (64 * 1024 * 8, 16),
+}
+BTB_ENTRIES = 4096
+BTB_BITS = 16 + 64 + 1
+RAS_ENTRIES = 16
+
+# Prefetcher tables (mm²)
+PREFETCHER_AREA = {
+    "stride": 0.01,
+    "tagged": 0.005,
+    "ampm": 0.05,
+    "bop": 0.03,
+    "spp": 0.04,
+}
+
+# Pipeline logic per core: fetch and decode per unit of width (mm²), rename
+# dependency checks and the bypass network per width squared, and the core
+# logic that is not modeled (TLBs, control, clock tree)
+FETCH_MM2_PER_WIDTH = 0.02
+DECODE_MM2_PER_WIDTH = 0.015
+RENAME_MM2_PER_WIDTH2 = 0.004
+BYPASS_MM2_PER_WIDTH2 = 0.003
+O3_OTHER_MM2 = 0.25
+INORDER_OTHER_MM2 = 0.1
+
+# Energy per instruction of the pipeline logic (pJ), the bypass network per
+# instruction and unit of issue width
+FETCH_PJ = 1.5
+DECODE_PJ = 1.0
+RENAME_PJ = 1.0
+BYPASS_PJ_PER_WIDTH = 0.5
+
+# In-order cores have no O3 activity counters, their energy is per committed
+# instruction with this mix of accesses per instruction
+INORDER_MIX = {
+    "int_rf_reads": 1.5,
+    "int_rf_writes": 0.8,
+    "buffers": 3.0,
+    "int_alu": 0.6,
+    "int_mult_div": 0.02,
+    "fp_alu": 0.05,
+    "fp_mult_div": 0.02,
+    "mem": 0.35,
+}
+
+# DRAM energy per bit transferred (pJ) and background power per channel (W),
+# used when the DRAMPower rank energy was not collected
+DRAM_MODEL = {
+    "DDR4-2400": (20.0, 0.25),
+    "DDR4-3200": (18.0, 0.28),
+    "DDR5-4400": (15.0, 0.3),
+    "DDR5-6400": (14.0, 0.32),
+    "LPDDR5-6400": (8.0, 0.05),
+    "HBM-1000": (5.0, 0.15),
+}
+DRAM_PJ = "sum:board.memory.mem_ctrl*.dram.rank*.totalEnergy"
+
+# Activity counts: the stat columns to take them from (the first one
+# collected, summed over the cores by the sum: patterns of stats-to-fetch.txt)
+# and the count per committed instruction used when none was collected
+CORES = "sum:board.processor.cores*.core."
+CACHES = "board.cache_hierarchy."
+ACTIVITY = {
+    "fetch": ([CORES + "fetch.insts"], 1.2),
+    "decode": ([CORES + "decode.decodedInsts"], 1.15),
+    "rename": ([CORES + "rename.renamedInsts"], 1.1),
+    "rename_lookups": ([CORES + "rename.lookups"], 2.0),
+    "rob_reads": ([CORES + "rob.reads"], 1.1),
+    "rob_writes": ([CORES + "rob.writes"], 1.1),
+    "iq_reads": ([CORES + "*InstQueueReads"], 1.5),
+    "iq_writes": ([CORES + "*InstQueueWrites"], 1.1),
+    "iq_wakeups": ([CORES + "*InstQueueWakeupAccesses"], 1.0),
+    "int_rf_reads": ([CORES + "intRegfileReads"], 1.2),
+    "int_rf_writes": ([CORES + "intRegfileWrites"], 0.8),
+    "fp_rf_reads": ([CORES + "fpRegfileReads"], 0.1),
+    "fp_rf_writes": ([CORES + "fpRegfileWrites"], 0.05),
+    "int_ops": ([CORES + "intAluAccesses"], 0.6),
+    "fp_ops": ([CORES + "fpAluAccesses"], 0.05),
+    "simd_ops": ([CORES + "vecAluAccesses"], 0.0),
+    "loads": ([CORES + "MemDepUnit__0.insertedLoads"], 0.25),
+    "stores": ([CORES + "MemDepUnit__0.insertedStores"], 0.1),
+    "bp_lookups": ([CORES + "branchPred.lookups", CORES + "branchPred.lookups_0::total"], 0.2),
+    "l1i": ([
+        "sum:" + CACHES + "l1icaches*.overallAccesses::total",
+        "sum:" + CACHES + "ruby_system.*.L1Icache.m_demand_accesses",
+    ], 0.3),
+    "l1d": ([
+        "sum:" + CACHES + "l1dcaches*.overallAccesses::total",
+        "sum:" + CACHES + "ruby_system.*.L1Dcache.m_demand_accesses",
+    ], 0.35),
+    "l2": ([
+        CACHES + "l2cache.overallAccesses::total",
+        "sum:" + CACHES + "ruby_system.*.L2cache.m_demand_accesses",
+    ], 0.02),
+    "l3": ([CACHES + "l3cache.overallAccesses::total"], 0.005),
+    "dram_bytes": (["sum:board.memory.mem_ctrl*.dram.bytes[RW]*"], 1.0),
+}
+
+# A core or cache structure: area (mm²), leakage power (W) and energy per
+# event (J) of the activity counts it is charged for
+Component = namedtuple("Component", ["name", "area", "leakage", "energy"])
+
+# An SRAM/CAM array: area (mm²), energy per read, write and search (J) and
+# leakage power (W)
+Array = namedtuple("Array", ["area", "read", "write", "search", "leakage"])
+
+
+def sram(entries, bits, read_ports=1, write_ports=1, cam=False, out_bits=None):
+    """
+    sram models an array of entries x bits in the style of CACTI: the cell
+    grows with the number of ports, reads pay the sense amplifiers and the
+    bitline (up to SUBARRAY_ROWS rows) of every bit of an entry and the wires
+    across the array for the out_bits that leave it (all of them by
+    default), and CAM searches compare every bit.
+    """
+    ports = max(1, read_ports + write_ports)
+    side = 1 + PORT_PITCH * (ports - 1)
+    cell = SRAM_BIT_UM2 * side ** 2 * (CAM_FACTOR if cam else 1)
+    area = entries * bits * cell * ARRAY_OVERHEAD * 1e-6
+    rows = min(entries, SUBARRAY_ROWS)
+    out_bits = bits if out_bits is None else out_bits
+    read = (
+        bits * (READ_FJ_PER_BIT + BITLINE_FJ_PER_ROW * rows * side)
+        + out_bits * WIRE_FJ_PER_BIT_MM * math.sqrt(area)
+    ) * 1e-15
+    search = entries * bits * MATCH_FJ_PER_BIT * 1e-15 if cam else 0.0
+    leakage = entries * bits * SRAM_LEAK_W_PER_BIT * (CAM_FACTOR if cam else 1)
+    return Array(area, read, 1.2 * read, search, leakage)
+
+
+def cache_array(size, assoc, parallel):
+    """
+    cache_array models a cache of size bytes as a tag and a data array with
+    one row per set. L1 caches (parallel) read all ways of a set at once, the
+    lower levels read the tags first and then one way. Only one line leaves
+    the data array.
+    """
+    lines = max(1, size // CACHE_LINE)
+    sets = max(1, lines // assoc)
+    data = sram(sets, CACHE_LINE * 8 * assoc, out_bits=CACHE_LINE * 8)
+    tags = sram(sets, CACHE_TAG_BITS * assoc)
+    one_way = data.read / assoc
+    access = tags.read + (data.read if parallel else one_way)
+    return Array(
+        data.area + tags.area, access, tags.read + 1.2 * one_way, 0.0,
+        data.leakage + tags.leakage,
+    )
+
+
+def parse_size(size):
+    """
+    parse_size converts a gem5 size string (e.g. "32KiB", "2MiB") to bytes.
+    """
+    if isinstance(size, (int, float)):
+        return int(size)
+    units = {"KiB": 1 << 10, "MiB": 1 << 20, "GiB": 1 << 30, "kB": 1 << 10, "MB": 1 << 20, "B": 1}
+    for unit, scale in units.items():
+        if size.endswith(unit):
+            return int(float(size[: -len(unit)]) * scale)
+    return int(size)
+
+
+def _logic(name, area, energy=None):
+    return Component(name, area, area * LOGIC_LEAK_W_PER_MM2, energy or {})
+
+
+def _array(name, array, energy):
+    return Component(name, array.area, array.leakage, energy)
+
+
+def _scale(components, count, energy_scale=1.0):
+    return [
+        Component(c.name, c.area * count, c.leakage * count,
+                  {k: v * energy_scale for k, v in c.energy.items()})
+        for c in components
+    ]
+
+
+class AreaEnergyModel:
+    """
+    AreaEnergyModel is the interface of the models in MODELS.
+
+    components returns the components of a run's system (cores and caches),
+    each with its area, leakage power and energy per event of the activity
+    counts of ACTIVITY (plus "insts", the committed instructions).
+    dram_model returns the DRAM energy per bit and background power, used
+    when the DRAMPower rank energy of the run was not collected.
+    """
+
+    def components(self, config):
+        raise NotImplementedError
+
+    def dram_model(self, memory):
+        raise NotImplementedError
+
+
+class AnalyticModel(AreaEnergyModel):
+    """
+    AnalyticModel is the McPAT/CACTI style analytic model described at the
+    top of this file.
+    """
+
+    def branch_predictor(self, spec):
+        spec = spec if spec is not None else "tournament"
+        kind = spec["type"] if isinstance(spec, dict) else spec
+        bits, tables = BP_MODEL[kind]
+        if isinstance(spec, dict) and kind == "tournament":
+            local = spec.get("localPredictorSize", 2048)
+            bits = (
+                local * spec.get("localCtrBits", 2)
+                + spec.get("localHistoryTableSize", 2048) * max(1, int(math.log2(local)))
+                + spec.get("globalPredictorSize", 8192) * spec.get("globalCtrBits", 2)
+                + spec.get("choicePredictorSize", 8192) * spec.get("choiceCtrBits", 2)
+            )
+        predictor = sram(max(1, bits // 64), 64)
+        btb = sram(BTB_ENTRIES, BTB_BITS)
+        ras = sram(RAS_ENTRIES, 64)
+        return Component(
+            "bpred",
+            predictor.area + btb.area + ras.area,
+            predictor.leakage + btb.leakage + ras.leakage,
+            {"bp_lookups": predictor.read * tables + btb.read + ras.read},
+        )
+
+    def o3_core(self, params, branch_pred=None):
+        """
+        o3_core returns the components of one OutOfOrderCPU core.
+        """
+        p = resolve_o3_params(params)
+        fu = p["fu_pool"]
+        tag = math.ceil(math.log2(max(p["num_int_regs"], p["num_fp_regs"])))
+        loads = max(1, min(p["cache_load_ports"], fu["read_port"] + fu["rdwr_port"]))
+        stores = max(1, min(p["cache_store_ports"], fu["write_port"] + fu["rdwr_port"]))
+
+        rob = sram(p["rob_size"], 76, p["commit_width"], p["dispatch_width"])
+        iq = sram(p["instructionQ_size"], 2 * tag + 48, p["issue_width"], p["dispatch_width"], cam=True)
+        int_rf = sram(p["num_int_regs"], 64, 2 * p["issue_width"], p["wb_width"])
+        fp_rf = sram(p["num_fp_regs"], 64, 2 * p["issue_width"], p["wb_width"])
+        rat = sram(64, tag, 3 * p["rename_width"], p["rename_width"])
+        lq = sram(p["loadQ_size"], 80, loads, loads, cam=True)
+        sq = sram(p["storeQ_size"], 144, stores, stores, cam=True)
+        fetch_queue = sram(p["fetchQ_size"], 32, p["decode_width"], p["fetch_width"])
+        fetch_buffer = sram(1, p["fetchB_size"] * 8)
+        ssit = sram(p["ssit_size"], 12)
+        lfst = sram(p["lfst_size"], 8)
+
+        components = [
+            _array("rob", rob, {"rob_reads": rob.read, "rob_writes": rob.write}),
+            _array("iq", iq, {"iq_reads": iq.read, "iq_writes": iq.write, "iq_wakeups": iq.search}),
+            _array("int_rf", int_rf, {"int_rf_reads": int_rf.read, "int_rf_writes": int_rf.write}),
+            _array("fp_rf", fp_rf, {"fp_rf_reads": fp_rf.read, "fp_rf_writes": fp_rf.write}),
+            _array("rat", rat, {"rename_lookups": rat.read, "rename": rat.write}),
+            # Loads search the SQ for forwarding, stores the LQ for ordering
+            # violations
+            _array("lq", lq, {"loads": lq.write, "stores": lq.search}),
+            _array("sq", sq, {"stores": sq.write, "loads": sq.search}),
+            _array("fetch_queue", fetch_queue, {"fetch": fetch_queue.write, "decode": fetch_queue.read}),
+            _array("fetch_buffer", fetch_buffer, {"fetch": fetch_buffer.read * 4 / p["fetchB_size"]}),
+            Component("store_sets", ssit.area + lfst.area, ssit.leakage + lfst.leakage, {
+                "loads": ssit.read + lfst.read, "stores": ssit.read + lfst.write,
+            }),
+            self.branch_predictor(branch_pred),
+            _logic("fetch", FETCH_MM2_PER_WIDTH * p["fetch_width"], {"fetch": FETCH_PJ * 1e-12}),
+            _logic("decode", DECODE_MM2_PER_WIDTH * p["decode_width"], {"decode": DECODE_PJ * 1e-12}),
+            _logic("rename", RENAME_MM2_PER_WIDTH2 * p["rename_width"] ** 2, {"rename": RENAME_PJ * 1e-12}),
+            _logic("bypass", BYPASS_MM2_PER_WIDTH2 * p["issue_width"] ** 2, {
+                "iq_reads": BYPASS_PJ_PER_WIDTH * p["issue_width"] * 1e-12,
+            }),
+            _logic("other", O3_OTHER_MM2),
+        ]
+        fu_activity = {"int_alu": "int_ops", "fp_alu": "fp_ops", "simd": "simd_ops"}
+        ports = fu["read_port"] + fu["write_port"] + fu["rdwr_port"]
+        for name, count in fu.items():
+            area, pj = FU_MODEL[name]
+            energy = {}
+            if name in fu_activity:
+                energy = {fu_activity[name]: pj * 1e-12}
+            elif name in ("read_port", "write_port", "rdwr_port") and ports:
+                # Address generation, split over the memory ports by count
+                share = count / ports
+                energy = {"loads": pj * share * 1e-12, "stores": pj * share * 1e-12}
+            components.append(_logic(f"fu.{name}", area * count, energy))
+        return components
+
+    def inorder_core(self, params=None, branch_pred=None):
+        """
+        inorder_core returns the components of one InOrderCPU (MinorCPU)
+        core, charged per committed instruction (INORDER_MIX).
+        """
+        p = dict(inorder_base, **(params or {}))
+        # decode_width and execute_width default to width
+        decode = p["width"] if pd.isna(p.get("decode_width")) else p["decode_width"]
+        execute = p["width"] if pd.isna(p.get("execute_width")) else p["execute_width"]
+        int_rf = sram(32, 64, 2 * execute, execute)
+        fp_rf = sram(32, 64, 2 * execute, execute)
+        buffers = sram(
+            (p["fetch2_buffer"] + p["decode_buffer"]) * decode + p["execute_buffer"] * execute, 64
+        )
+        lsq = sram(p["lsq_requests"] + p["lsq_transfers"] + p["store_buffer"], 144)
+        bpred = self.branch_predictor(branch_pred)
+        fu_area = (
+            FU_MODEL["int_alu"][0] * p["num_int_alus"]
+            + FU_MODEL["int_mult_div"][0]
+            + (FU_MODEL["fp_alu"][0] + FU_MODEL["fp_mult_div"][0]) * p["num_fp_units"]
+            + FU_MODEL["simd"][0]
+            + FU_MODEL["rdwr_port"][0]
+        )
+        fu_pj = sum(
+            INORDER_MIX[name] * FU_MODEL[name][1]
+            for name in ["int_alu", "int_mult_div", "fp_alu", "fp_mult_div"]
+        ) + INORDER_MIX["mem"] * FU_MODEL["rdwr_port"][1]
+        return [
+            _array("int_rf", int_rf, {"insts": INORDER_MIX["int_rf_reads"] * int_rf.read
+                                      + INORDER_MIX["int_rf_writes"] * int_rf.write}),
+            _array("fp_rf", fp_rf, {}),
+            _array("buffers", buffers, {"insts": INORDER_MIX["buffers"] * buffers.read}),
+            _array("lsq", lsq, {"insts": INORDER_MIX["mem"] * lsq.write}),
+            bpred,
+            _logic("fetch", FETCH_MM2_PER_WIDTH * decode, {"insts": FETCH_PJ * 1e-12}),
+            _logic("decode", DECODE_MM2_PER_WIDTH * decode, {"insts": DECODE_PJ * 1e-12}),
+            _logic("fu", fu_area, {"insts": fu_pj * 1e-12}),
+            _logic("other", INORDER_OTHER_MM2),
+        ]
+
+    def caches(self, cache, cores):
+        """
+        caches returns the components of a PrivateL1SharedL2Cache or
+        MESITwoLevelCache hierarchy (its get_params() dict).
+        """
+        def param(key, default):
+            value = cache.get(key)
+            return default if value is None else value
+
+        l1i = cache_array(parse_size(param("l1i_size", "32KiB")), param("l1i_assoc", 8), True)
+        l1d = cache_array(parse_size(param("l1d_size", "32KiB")), param("l1d_assoc", 8), True)
+        l2 = cache_array(parse_size(param("l2_size", "256KiB")), param("l2_assoc", 16), False)
+        components = _scale([
+            _array("l1i", l1i, {"l1i": l1i.read}),
+            _array("l1d", l1d, {"l1d": l1d.read}),
+        ], cores)
+        components.append(_array("l2", l2, {"l2": l2.read}))
+        if cache.get("l3_size"):
+            l3 = cache_array(parse_size(cache["l3_size"]), param("l3_assoc", 16), False)
+            components.append(_array("l3", l3, {"l3": l3.read}))
+        for level, count in [("l1d", cores), ("l2", 1)]:
+            spec = cache.get(f"{level}_prefetcher")
+            kind = spec["type"] if isinstance(spec, dict) else spec
+            if kind in PREFETCHER_AREA:
+                components.append(_logic(f"{level}.prefetcher", PREFETCHER_AREA[kind] * count))
+        return components
+
+    def components(self, config):
+        cores = config.get("cores") or 1
+        branch_pred = config.get("branch_pred")
+        cpu = config["cpu"]
+        if cpu == "o3":
+            core = _scale(self.o3_core(config["params"], branch_pred), cores)
+        elif cpu == "inorder":
+            core = _scale(self.inorder_core(config["params"], branch_pred), cores)
+        elif cpu == "hetero":
+            params = config["params"]
+            num_big, num_little = params["num_big"], params["num_little"]
+            # The committed instructions are those of all cores, the little
+            # cores are charged for their share
+            share = num_little / max(1, num_big + num_little)
+            core = _scale(self.o3_core(o3_params(params["big_config"]), branch_pred), num_big)
+            core += _scale(self.inorder_core(None, branch_pred), num_little, share)
+            cores = num_big + num_little
+        else:
+            raise ValueError(f"unknown cpu '{cpu}'")
+        core = [c._replace(name="core." + c.name) for c in core]
+        return core + self.caches(config.get("cache") or {}, cores)
+
+    def dram_model(self, memory):
+        pj_per_bit, background = DRAM_MODEL[memory.get("interface") or "DDR4-2400"]
+        return pj_per_bit, background * (memory.get("channels") or 1)
+
+
+MODELS = {
+    "analytic": AnalyticModel,
+}
+
+
+def _value(value):
+    if isinstance(value, float):
+        if math.isnan(value):
+            return None
+        if value.is_integer():
+            return int(value)
+    return value
+
+
+def _nested(row, prefix):
+    """
+    _nested rebuilds the dict flattened by parse_stats.py --manifest under
+    prefix (e.g. "params.fu_pool.int_alu" -> {"fu_pool": {"int_alu": ...}}).
+    """
+    out = {}
+    for key, value in row.items():
+        if not key.startswith(prefix + "."):
+            continue
+        value = _value(value)
+        if value is None:
+            continue
+        parts = key[len(prefix) + 1:].split(".")
+        d = out
+        for part in parts[:-1]:
+            d = d.setdefault(part, {})
+        d[parts[-1]] = value
+    return out
+
+
+def run_config(run, row):
+    """
+    run_config returns the configuration of a run: cpu, params, cores,
+    branch_pred, cache and memory, from its manifest columns or, without
+    them, from its run id.
+
+    :return: the configuration dict, or None if it cannot be recovered.
+    """
+    row = row.to_dict()
+    params = _nested(row, "params")
+    if params and _value(row.get("cpu")):
+        branch_pred = _nested(row, "branch_pred") or _value(row.get("branch_pred"))
+        return {
+            "cpu": row["cpu"],
+            "params": params,
+            "cores": _value(row.get("cores")) or 1,
+            "branch_pred": branch_pred,
+            "cache": _nested(row, "cache"),
+            "memory": _nested(row, "memory"),
+        }
+
+    info = parse_run_id(run)
+    system = None
+    for name, _, sweep_system in system_sweeps() + multicore_sweeps():
+        if name == info["system"]:
+            system = sweep_system
+            break
+    if system is None:
+        return None
+    cpu, config = info["cpu"], info["config"]
+    if cpu == "o3":
+        params = o3_params(config)
+    elif cpu == "inorder" and config == "inorder":
+        params = dict(inorder_base)
+    elif cpu == "inorder":
+        params = next((p for name, _, p in inorder_sweeps() if name == config), None)
+    elif cpu == "hetero":
+        split = config.split("-")[0]
+        num_big, num_little = split[:-1].split("b")
+        params = {"num_big": int(num_big), "num_little": int(num_little), "big_config": "base"}
+    else:
+        params = None
+    if params is None:
+        return None
+    return {
+        "cpu": cpu,
+        "params": params,
+        "cores": system.get("cores", 1),
+        "branch_pred": system.get("branch_pred"),
+        "cache": system.get("cache", {}),
+        "memory": system.get("memory", {}),
+    }
+
+
+def activity_counts(row):
+    """
+    activity_counts returns the activity counts of a run (see ACTIVITY) and
+    the names of the ones estimated from simInsts.
+    """
+    insts = float(row["simInsts"])
+    counts, estimated = {"insts": insts}, set()
+    for name, (stats, per_inst) in ACTIVITY.items():
+        for stat in stats:
+            value = row.get(stat)
+            if value is not None and not pd.isna(value):
+                counts[name] = float(value)
+                break
+        else:
+            counts[name] = per_inst * insts
+            estimated.add(name)
+    return counts, estimated
+
+
+def estimate_run(model, config, row):
+    """
+    estimate_run computes the area, energy and efficiency of one run.
+
+    :param model: an AreaEnergyModel.
+    :param config: the run configuration, see run_config.
+    :param row: the collected statistics of the run.
+    :return: a dict with the columns described at the top of this file.
+    """
+    components = model.components(config)
+    counts, estimated = activity_counts(row)
+    seconds = float(row["simSeconds"])
+
+    area = sum(c.area for c in components)
+    leakage = sum(c.leakage for c in components) * seconds
+    dynamic = 0.0
+    used = set()
+    for c in components:
+        for name, energy in c.energy.items():
+            dynamic += energy * counts[name]
+            if energy:
+                used.add(name)
+
+    dram_pj = row.get(DRAM_PJ)
+    if dram_pj is not None and not pd.isna(dram_pj):
+        dram = float(dram_pj) * 1e-12
+    else:
+        pj_per_bit, background = model.dram_model(config.get("memory") or {})
+        dram = counts["dram_bytes"] * 8 * pj_per_bit * 1e-12 + background * seconds
+        used.add("dram_bytes")
+
+    energy = dynamic + leakage + dram
+    mips = counts["insts"] / seconds / 1e6
+    power = energy / seconds
+    return {
+        "area_mm2": area,
+        "dynamic_J": dynamic,
+        "leakage_J": leakage,
+        "dram_J": dram,
+        "energy_J": energy,
+        "power_W": power,
+        "mips": mips,
+        "mips_per_W": mips / power,
+        "mips_per_mm2": mips / area,
+        "approx": bool(estimated & used),
+    }
+
+
+def estimate_runs(df, model="analytic"):
+    """
+    estimate_runs estimates every run of df whose configuration is known.
+
+    :param df: collected statistics, one row per run (parse_stats.py CSV,
+    with simSeconds and simInsts).
+    :param model: name of a model in MODELS.
+    :return: a DataFrame indexed by run, see estimate_run.
+    """
+    model = MODELS[model]()
+    rows = {}
+    for run, row in df.iterrows():
+        config = run_config(run, row)
+        if config is None or pd.isna(row.get("simSeconds")) or pd.isna(row.get("simInsts")):
+            continue
+        rows[run] = estimate_run(model, config, row)
+    out = pd.DataFrame.from_dict(rows, orient="index")
+    out.index.name = "Run"
+    return out
+
+
+def breakdown(df, run, model="analytic"):
+    """
+    breakdown returns the area, leakage power and dynamic energy of every
+    component of one run.
+    """
+    model = MODELS[model]()
+    row = df.loc[run]
+    config = run_config(run, row)
+    if config is None:
+        raise ValueError(f"configuration of '{run}' is unknown")
+    counts, _ = activity_counts(row)
+    return pd.DataFrame([
+        {
+            "component": c.name,
+            "area_mm2": c.area,
+            "leakage_W": c.leakage,
+            "dynamic_J": sum(energy * counts[name] for name, energy in c.energy.items()),
+        }
+        for c in model.components(config)
+    ]).set_index("component")
+
+
+def plot_workload(table, workload):
+    rows = table[table["workload"] == workload]
+    fig, ax = plt.subplots(figsize=(6, 4))
+    for cpu, group in rows.groupby("cpu"):
+        ax.scatter(group["mips_per_mm2"], group["mips_per_W"], alpha=0.6, label=cpu)
+    ax.set_title(f"{workload}: performance per area and per watt")
+    ax.set_xlabel("MIPS / mm²")
+    ax.set_ylabel("MIPS / W")
+    ax.legend()
+    plt.tight_layout()
+
+
+def main():
+    p = argparse.ArgumentParser(
+        description="Estimate area, energy, perf/W and perf/mm² of simulated runs"
+    )
+    p.add_argument('csvs', nargs='+',
+                   help="CSV files written by parse_stats.py (with --manifest for swept configurations)")
+    p.add_argument('--model', default='analytic', choices=sorted(MODELS),
+                   help="Area/energy model (default: analytic)")
+    p.add_argument('--output-csv', default='area_energy.csv',
+                   help="Write the table to this CSV file (default: area_energy.csv)")
+    p.add_argument('--breakdown', metavar='RUN',
+                   help="Print the per-component area and energy of one run")
+    p.add_argument('--save-plots', action='store_true',
+                   help="Save plots as PNGs instead of displaying them")
+    p.add_argument('--plots-dir', default='plots/area-energy',
+                   help="Directory under which to save PNGs (default: plots/area-energy)")
+    args = p.parse_args()
+
+    df = pd.concat([pd.read_csv(path, index_col='Run') for path in args.csvs])
+    df = df[~df.index.duplicated(keep='last')]
+
+    if args.breakdown:
+        with pd.option_context("display.width", 200, "display.precision", 4):
+            print(breakdown(df, args.breakdown, args.model))
+        return
+
+    table = estimate_runs(df, args.model)
+    if table.empty:
+        print("No runs with a known configuration and simSeconds/simInsts found; exiting.")
+        return
+    info = pd.DataFrame([parse_run_id(run) for run in table.index], index=table.index)
+    table.insert(0, "workload", df["workload"].reindex(table.index) if "workload" in df.columns else info["workload"])
+    table.insert(1, "cpu", info["cpu"])
+    table.insert(2, "config", info["config"])
+    table.insert(3, "system", info["system"])
+
+    with pd.option_context("display.width", 200, "display.max_columns", None,
+                           "display.max_rows", None, "display.precision", 3):
+        print(table)
+    if table["approx"].any():
+        print("\n[note] approx=True runs lack activity counts; collect the energy stats of stats-to-fetch.txt")
+
+    table.to_csv(args.output_csv)
+    print(f"✓ Saved area and energy table to '{args.output_csv}'")
+
+    if args.save_plots:
+        os.makedirs(args.plots_dir, exist_ok=True)
+    for workload in table["workload"].dropna().unique():
+        plot_workload(table, workload)
+        if args.save_plots:
+            outname = os.path.join(args.plots_dir, f"{workload}.png")
+            plt.savefig(outname)
+            plt.close()
+            print(f"→ Saved {workload} plot to '{outname}'")
+        else:
+            plt.show()
+
+
+if __name__ == '__main__':
+    main()
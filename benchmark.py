@@ -0,0 +1,286 @@
+#!/usr/bin/env python3
+"""
+benchmark.py
+
+Regression benchmarks of the simulator: run the short ROI windows of
+local-bench-test.py (every workload on the very-small, base and very-big O3
+configurations and the base in-order configuration) one at a time, record
+how long they take and what they simulate, keep the history, and flag the
+runs that got slower or whose results changed.
+
+Usage:
+
+  # Run the benchmarks and append them to the history, labelled e.g. with
+  # the gem5 build or the change being tested
+  ./benchmark.py run --label gem5-v24.1 [--gem5 gem5riscv] [--repeat 3] \
+    [--ids o3-base-bfs ...] [--history benchmarks/history.csv]
+
+  # Compare a label (default: the latest) with a baseline label (default:
+  # the one before), exit with 1 if anything regressed
+  ./benchmark.py check [--label gem5-v24.1] [--baseline gem5-v24.0] \
+    [--speed-threshold 0.1] [--stat-threshold 1e-6]
+
+  # Host inst rate of every run per label
+  ./benchmark.py report [--save-plots --plots-dir plots/benchmark]
+
+Per run and repeat the history has the host wall seconds and peak memory
+(max RSS) of the gem5 process, gem5's own hostSeconds, hostInstRate and
+hostMemory, and the key stats of KEY_STATS. The max RSS is never below the
+size of this script at the time it started gem5, hostMemory is what gem5
+itself used.
+
+A speed metric regresses when the median over the repeats is worse than the
+baseline median by more than --speed-threshold, or by more than three
+times the noise (the relative spread of the repeats) if that is larger.
+gem5 is deterministic, so a key stat is flagged as soon as it changes by
+more than --stat-threshold.
+"""
+
+import argparse
+import os
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+
+import numpy as np
+import pandas as pd
+import matplotlib.pyplot as plt
+
+from parse_stats import parse_stats_file
+from sweep import REPO_DIR, run_status
+
+SCRIPT = os.path.join(REPO_DIR, "local-bench-test.py")
+HISTORY = os.path.join(REPO_DIR, "benchmarks", "history.csv")
+
+# Stats recorded for every run: gem5's measurements of itself and the
+# results that must not change without a reason
+HOST_STATS = ["hostSeconds", "hostInstRate", "hostMemory"]
+KEY_STATS = [
+    "simInsts",
+    "simTicks",
+    "board.processor.cores.core.ipc",
+    "board.cache_hierarchy.l1dcaches.overallMissRate::total",
+    "board.cache_hierarchy.l1icaches.overallMissRate::total",
+    "board.cache_hierarchy.l2cache.overallMissRate::total",
+]
+
+# Speed metrics and whether higher values are worse
+SPEED_METRICS = {
+    "wall_seconds": True,
+    "hostSeconds": True,
+    "hostInstRate": False,
+    "hostMemory": True,
+    "max_rss_mb": True,
+}
+
+# A regression has to exceed this many times the noise of the repeats
+NOISE_FACTOR = 3
+
+
+def list_ids(gem5, script):
+    out = subprocess.run(
+        [gem5, script, "--list"], check=True, capture_output=True, text=True
+    ).stdout
+    return [line.strip() for line in out.splitlines() if line.strip()]
+
+
+def run_benchmark(gem5, script, sim_id, outdir):
+    """
+    run_benchmark runs one simulation in its own gem5 process and measures
+    it: wall seconds and the peak memory of the process from wait4.
+
+    :return: a dict with wall_seconds, max_rss_mb and the HOST_STATS and
+        KEY_STATS of the run, or None if the run failed.
+    """
+    start = time.monotonic()
+    with open(os.path.join(outdir, "benchmark.log"), "w") as log:
+        proc = subprocess.Popen(
+            [gem5, "-re", "--outdir", outdir, script, sim_id],
+            cwd=os.path.dirname(script), stdout=log, stderr=subprocess.STDOUT,
+        )
+        _, status, usage = os.wait4(proc.pid, 0)
+    wall = time.monotonic() - start
+    # multisim writes to <outdir>/<id>, a plain run to <outdir>
+    run_path = os.path.join(outdir, sim_id)
+    if not os.path.isdir(run_path):
+        run_path = outdir
+    if os.waitstatus_to_exitcode(status) != 0 or run_status(run_path) != "complete":
+        return None
+    row = dict(wall_seconds=wall, max_rss_mb=usage.ru_maxrss / 1024)
+    row.update(parse_stats_file(os.path.join(run_path, "stats.txt"), HOST_STATS + KEY_STATS))
+    return row
+
+
+def load_history(path):
+    if not os.path.isfile(path):
+        return pd.DataFrame()
+    return pd.read_csv(path)
+
+
+def append_history(path, rows):
+    os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+    df = pd.concat([load_history(path), pd.DataFrame(rows)], ignore_index=True, sort=False)
+    df.to_csv(path, index=False)
+    return df
+
+
+def _labels(history):
+    # Labels in the order they were first run
+    return list(history.sort_values("timestamp")["label"].drop_duplicates())
+
+
+def check(history, label=None, baseline=None, speed_threshold=0.1, stat_threshold=1e-6):
+    """
+    check compares the runs of label with the runs of baseline.
+
+    :return: (label, baseline, flags), flags is a DataFrame with one row
+        per run and metric that regressed or changed: run, metric, baseline,
+        current, rel (relative change), limit (the threshold it exceeded)
+        and kind ("slower" or "changed").
+    """
+    labels = _labels(history)
+    label = label or labels[-1]
+    if baseline is None:
+        earlier = labels[:labels.index(label)]
+        if not earlier:
+            raise ValueError(f"label {label!r} has no earlier label to compare with")
+        baseline = earlier[-1]
+    current = history[history["label"] == label].groupby("run")
+    base = history[history["label"] == baseline].groupby("run")
+
+    cur_median, base_median = current.median(numeric_only=True), base.median(numeric_only=True)
+    cur_median, base_median = cur_median.align(base_median, join="inner")
+    # Relative spread of the repeats, the noise of a speed metric
+    noise = pd.concat([
+        (current.std(numeric_only=True) / cur_median).reindex(cur_median.index),
+        (base.std(numeric_only=True) / base_median).reindex(base_median.index),
+    ]).groupby(level=0).max().fillna(0)
+
+    flags = []
+    rel = (cur_median - base_median) / base_median.abs()
+    for metric, higher_worse in SPEED_METRICS.items():
+        if metric not in rel:
+            continue
+        worse = rel[metric] if higher_worse else -rel[metric]
+        limit = np.maximum(speed_threshold, NOISE_FACTOR * noise[metric])
+        for run in worse.index[worse > limit]:
+            flags.append((run, metric, base_median.at[run, metric], cur_median.at[run, metric],
+                          rel.at[run, metric], limit[run], "slower"))
+    for metric in KEY_STATS:
+        if metric not in rel:
+            continue
+        changed = rel[metric].abs() > stat_threshold
+        for run in rel.index[changed]:
+            flags.append((run, metric, base_median.at[run, metric], cur_median.at[run, metric],
+                          rel.at[run, metric], stat_threshold, "changed"))
+    return label, baseline, pd.DataFrame(
+        flags, columns=["run", "metric", "baseline", "current", "rel", "limit", "kind"]
+    )
+
+
+def main():
+    p = argparse.ArgumentParser(
+        description="Regression benchmarks of simulator speed and results"
+    )
+    sub = p.add_subparsers(dest="command", required=True)
+
+    p_run = sub.add_parser("run", help="Run the benchmarks and record them")
+    p_run.add_argument("--label", default=None,
+                       help="Name of this benchmark run, e.g. the gem5 build (default: the date and time)")
+    p_run.add_argument("--gem5", default="gem5riscv", help="gem5 binary (default: gem5riscv)")
+    p_run.add_argument("--script", default=SCRIPT, help="Benchmark script (default: local-bench-test.py)")
+    p_run.add_argument("--ids", nargs="+", help="Benchmarks to run (default: all of the script)")
+    p_run.add_argument("--repeat", type=int, default=3,
+                       help="Runs of every benchmark, to measure the noise (default: 3)")
+    p_run.add_argument("--history", default=HISTORY,
+                       help="History CSV (default: benchmarks/history.csv)")
+
+    p_check = sub.add_parser("check", help="Flag the regressions of a label")
+    p_check.add_argument("--label", default=None, help="Label to check (default: the latest)")
+    p_check.add_argument("--baseline", default=None, help="Label to compare with (default: the one before)")
+    p_check.add_argument("--speed-threshold", type=float, default=0.1,
+                         help="Smallest relative slowdown flagged (default: 0.1)")
+    p_check.add_argument("--stat-threshold", type=float, default=1e-6,
+                         help="Smallest relative change of a key stat flagged (default: 1e-6)")
+    p_check.add_argument("--history", default=HISTORY,
+                         help="History CSV (default: benchmarks/history.csv)")
+
+    p_report = sub.add_parser("report", help="Show the host inst rate of every label")
+    p_report.add_argument("--history", default=HISTORY,
+                          help="History CSV (default: benchmarks/history.csv)")
+    p_report.add_argument("--metric", default="hostInstRate",
+                          help="Column of the history to report (default: hostInstRate)")
+    p_report.add_argument("--save-plots", action="store_true",
+                          help="Save plots as PNGs instead of displaying them")
+    p_report.add_argument("--plots-dir", default="plots/benchmark",
+                          help="Directory under which to save PNGs (default: plots/benchmark)")
+    args = p.parse_args()
+
+    if args.command == "run":
+        script = os.path.abspath(args.script)
+        label = args.label or time.strftime("%Y-%m-%d-%H%M%S")
+        ids = args.ids or list_ids(args.gem5, script)
+        rows, failed = [], []
+        for repeat in range(args.repeat):
+            for sim_id in ids:
+                with tempfile.TemporaryDirectory(prefix=f"bench-{sim_id}-") as outdir:
+                    row = run_benchmark(args.gem5, script, sim_id, outdir)
+                if row is None:
+                    failed.append(sim_id)
+                    print(f"✗ {sim_id} (repeat {repeat + 1}) failed")
+                    continue
+                print(f"{sim_id} (repeat {repeat + 1}): {row['wall_seconds']:.1f}s, "
+                      f"{row.get('hostInstRate', float('nan')):.0f} inst/s, {row['max_rss_mb']:.0f}MB")
+                rows.append(dict(
+                    label=label, timestamp=time.time(), host=socket.gethostname(),
+                    run=sim_id, repeat=repeat, **row,
+                ))
+        if rows:
+            append_history(args.history, rows)
+            print(f"✓ Saved {len(rows)} benchmark runs of '{label}' to '{args.history}'")
+        if failed:
+            sys.exit(1)
+
+    elif args.command == "check":
+        history = load_history(args.history)
+        if history.empty:
+            p.error(f"no history in '{args.history}'")
+        label, baseline, flags = check(
+            history, args.label, args.baseline, args.speed_threshold, args.stat_threshold
+        )
+        if flags.empty:
+            print(f"✓ No regressions of '{label}' against '{baseline}'")
+            return
+        print(f"✗ {len(flags)} regressions of '{label}' against '{baseline}':\n")
+        with pd.option_context("display.width", 200):
+            print(flags.to_string(index=False))
+        sys.exit(1)
+
+    elif args.command == "report":
+        history = load_history(args.history)
+        if history.empty:
+            p.error(f"no history in '{args.history}'")
+        table = history.pivot_table(index="run", columns="label", values=args.metric, aggfunc="median")
+        table = table[_labels(history)]
+        print(table.to_string())
+
+        ax = table.T.plot(marker="o", figsize=(10, 6))
+        ax.set_title(f"{args.metric} of the benchmarks per label")
+        ax.set_xlabel("Label")
+        ax.set_ylabel(args.metric)
+        ax.legend(fontsize="small", ncol=2)
+        plt.xticks(rotation=45)
+        plt.tight_layout()
+        if args.save_plots:
+            os.makedirs(args.plots_dir, exist_ok=True)
+            outname = os.path.join(args.plots_dir, f"{args.metric}.png")
+            plt.savefig(outname)
+            print(f"→ Saved {args.metric} plot to '{outname}'")
+        else:
+            plt.show()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,144 @@
+#!/usr/bin/env python3
+"""
+biglittle.py
+
+Throughput and performance per area of the big.LITTLE runs of
+local-biglittle-test.py, per split of big and little cores and placement
+policy.
+
+Usage:
+
+  ./parse_stats.py --runs-file biglittle-runs.txt --stats simSeconds simInsts \
+    --manifest --output-csv results-biglittle/biglittle.csv
+  ./biglittle.py results-biglittle/biglittle.csv [--area-model analytic] \
+    [--output-csv biglittle.csv] [--save-plots --plots-dir plots/biglittle]
+
+Per run:
+
+  throughput      committed instructions of all programs per second (MIPS),
+                  up to the end of the last program
+  area            HeterogeneousCPU.get_area_score() from the manifest, or
+                  with --area-model the area in mm² of the cores and caches
+                  estimated by area_model.py
+  perf_per_area   throughput per 1000 area units (per mm² with --area-model)
+  vs_all_big      throughput and perf_per_area relative to the all big split
+                  of the same mix (vs_all_big_throughput, vs_all_big_ppa)
+
+The area is only known from the manifest columns (parse_stats.py --manifest).
+"""
+
+import argparse
+import os
+
+import numpy as np
+import pandas as pd
+import matplotlib.pyplot as plt
+
+from area_model import MODELS, estimate_runs
+from sweep import parse_run_id
+
+
+def hetero_table(df, per_area=1000):
+    """
+    hetero_table computes throughput and performance per area of every
+    big.LITTLE run in df.
+
+    :param df: collected statistics, one row per run (parse_stats.py CSV).
+    :param per_area: area units perf_per_area is given for.
+    :return: a DataFrame with mix, split, policy, num_big, num_little, area,
+    throughput, perf_per_area and the vs_all_big ratios.
+    """
+    info = pd.DataFrame([parse_run_id(run) for run in df.index], index=df.index)
+    hetero = info["cpu"] == "hetero"
+    df, info = df[hetero], info[hetero]
+
+    out = pd.DataFrame(index=df.index)
+    out["mix"] = df["workload"] if "workload" in df.columns else info["workload"]
+    # config is <split>-<policy>, e.g. 2b2l-speedup
+    split_policy = info["config"].str.split("-", n=1, expand=True)
+    out["split"] = split_policy[0]
+    out["policy"] = df["policy"] if "policy" in df.columns else split_policy[1]
+    out["num_big"] = out["split"].str.extract(r"(\d+)b", expand=False).astype(int)
+    out["num_little"] = out["split"].str.extract(r"(\d+)l", expand=False).astype(int)
+    if "area" in df.columns:
+        out["area"] = df["area"].astype(float)
+    else:
+        out["area"] = np.nan
+
+    out["throughput"] = df["simInsts"].astype(float) / df["simSeconds"].astype(float) / 1e6
+    out["perf_per_area"] = out["throughput"] / out["area"] * per_area
+
+    all_big = out[out["num_little"] == 0].groupby("mix")[["throughput", "perf_per_area"]].max()
+    base = all_big.reindex(out["mix"])
+    out["vs_all_big_throughput"] = out["throughput"].to_numpy() / base["throughput"].to_numpy()
+    out["vs_all_big_ppa"] = out["perf_per_area"].to_numpy() / base["perf_per_area"].to_numpy()
+    return out.sort_values(["mix", "num_big", "policy"], ascending=[True, False, True])
+
+
+def plot_mix(table, mix, area_label="Area score"):
+    rows = table[table["mix"] == mix]
+    fig, ax = plt.subplots(figsize=(6, 4))
+    for policy, group in rows.groupby("policy"):
+        ax.plot(group["area"], group["throughput"], marker="o", linestyle="", label=policy)
+        for _, row in group.iterrows():
+            ax.annotate(row["split"], (row["area"], row["throughput"]),
+                        textcoords="offset points", xytext=(4, 4), fontsize=8)
+    ax.set_title(f"{mix}: throughput vs area")
+    ax.set_xlabel(area_label)
+    ax.set_ylabel("Throughput (MIPS)")
+    ax.legend(title="placement")
+    plt.tight_layout()
+
+
+def main():
+    p = argparse.ArgumentParser(
+        description="Throughput and performance per area of big.LITTLE runs"
+    )
+    p.add_argument('csvs', nargs='+',
+                   help="CSV files written by parse_stats.py --manifest")
+    p.add_argument('--output-csv', default='biglittle.csv',
+                   help="Write the table to this CSV file (default: biglittle.csv)")
+    p.add_argument('--area-model', choices=sorted(MODELS),
+                   help="Use the area in mm² of this area_model.py model instead of the area score")
+    p.add_argument('--save-plots', action='store_true',
+                   help="Save plots as PNGs instead of displaying them")
+    p.add_argument('--plots-dir', default='plots/biglittle',
+                   help="Directory under which to save PNGs (default: plots/biglittle)")
+    args = p.parse_args()
+
+    df = pd.concat([pd.read_csv(path, index_col='Run') for path in args.csvs])
+    df = df[~df.index.duplicated(keep='last')]
+
+    area_label, per_area = "Area score", 1000
+    if args.area_model:
+        df["area"] = estimate_runs(df, args.area_model)["area_mm2"].reindex(df.index)
+        area_label, per_area = "Area (mm²)", 1
+    table = hetero_table(df, per_area)
+    if table.empty:
+        print("No big.LITTLE runs found; exiting.")
+        return
+
+    with pd.option_context("display.width", 200, "display.max_columns", None,
+                           "display.precision", 3):
+        print(table)
+    if table["area"].isna().any():
+        print("\n[note] some runs have no area column; run parse_stats.py with --manifest")
+
+    table.to_csv(args.output_csv)
+    print(f"✓ Saved big.LITTLE table to '{args.output_csv}'")
+
+    if args.save_plots:
+        os.makedirs(args.plots_dir, exist_ok=True)
+    for mix in table["mix"].unique():
+        plot_mix(table, mix, area_label)
+        if args.save_plots:
+            outname = os.path.join(args.plots_dir, f"{mix}.png")
+            plt.savefig(outname)
+            plt.close()
+            print(f"→ Saved {mix} plot to '{outname}'")
+        else:
+            plt.show()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,154 @@
+#!/usr/bin/env python3
+"""
+bpred.py
+
+Branch predictor comparison: misprediction rates per branch type, MPKI and
+the speedup of every predictor of the "bpred" system sweep (see
+system_sweeps in sweep.py) over the default TournamentBP, for the same core
+configuration and workload.
+
+Usage:
+
+  ./bpred.py results-queens/queens-all.csv [results-bfs/bfs-all.csv ...] \
+    [--output-csv bpred.csv] [--save-plots --plots-dir plots/bpred]
+
+Per run:
+
+  cond_miss_rate      condIncorrect / condPredicted
+  <type>_miss_rate    mispredicted_0::<type> / lookups_0::<type>, for the
+                      branch types gem5 (23.1 and later) reports
+  mpki                mispredicted branches per 1000 instructions
+                      (commit.branchMispredicts, condIncorrect for in-order)
+  speedup             simSeconds of the run on the default system over
+                      simSeconds of the run
+
+The speedup of a predictor is pure front-end benefit: the core is the same,
+so comparing it with the speedups of the O3 sweeps separates what a better
+predictor buys from what a bigger back-end buys.
+"""
+
+import argparse
+import os
+
+import numpy as np
+import pandas as pd
+import matplotlib.pyplot as plt
+
+from sweep import DEFAULT_SYSTEM, parse_run_id, run_id
+
+BPRED = "board.processor.cores.core.branchPred."
+
+
+def _col(df, stat):
+    if stat in df.columns:
+        return df[stat].astype(float)
+    return pd.Series(np.nan, index=df.index)
+
+
+def bpred_table(df):
+    """
+    bpred_table computes the branch prediction metrics of every run in df.
+
+    :param df: collected statistics, one row per run (parse_stats.py CSV).
+    :return: a DataFrame with workload, config, system, predictor, the miss
+    rates, mpki and speedup over the default predictor.
+    """
+    info = pd.DataFrame([parse_run_id(run) for run in df.index], index=df.index)
+    out = info[["workload", "cpu", "config", "system", "system_group", "flag_set"]].copy()
+    # The default system runs use the default predictor
+    bpred = (info["system_group"] == "bpred") | (info["system"] == DEFAULT_SYSTEM[0])
+    out, df = out[bpred], df[bpred]
+    out["predictor"] = out["system"].str.replace(r"^bp-", "", regex=True)
+    out.loc[out["system"] == DEFAULT_SYSTEM[0], "predictor"] = "tournament"
+
+    out["cond_miss_rate"] = _col(df, BPRED + "condIncorrect") / _col(df, BPRED + "condPredicted")
+    prefix = BPRED + "mispredicted_0::"
+    for col in df.columns:
+        if col.startswith(prefix):
+            kind = col[len(prefix):]
+            if kind in ("total", "NoBranch"):
+                continue
+            out[f"{kind}_miss_rate"] = (
+                _col(df, col) / _col(df, BPRED + "lookups_0::" + kind).replace(0, np.nan)
+            )
+
+    mispredicts = _col(df, "board.processor.cores.core.commit.branchMispredicts")
+    mispredicts = mispredicts.fillna(_col(df, BPRED + "condIncorrect"))
+    out["mpki"] = mispredicts / df["simInsts"].astype(float) * 1000
+
+    seconds = df["simSeconds"].astype(float)
+    # The same core, workload and flag set on the default system
+    # (run ids keep the cpu prefix: o3-base, inorder-width-2, but inorder)
+    cpu_config = [
+        f"{cpu}-{config}" if isinstance(cpu, str) and config != cpu else config
+        for cpu, config in zip(out["cpu"], out["config"])
+    ]
+    base_ids = [
+        run_id(config, workload, flag_set)
+        for config, workload, flag_set in zip(cpu_config, out["workload"], out["flag_set"])
+    ]
+    base = seconds.reindex(base_ids).to_numpy()
+    out["speedup"] = base / seconds.to_numpy()
+    return out.drop(columns=["system_group"])
+
+
+def plot_workload(table, workload, config):
+    rows = table[(table["workload"] == workload) & (table["config"] == config)]
+    rows = rows.set_index("predictor").sort_values("mpki")
+    fig, ax1 = plt.subplots(figsize=(max(6, len(rows) * 0.7), 4))
+    rows["mpki"].plot(kind="bar", ax=ax1, color="tab:blue")
+    ax1.set_ylabel("MPKI")
+    ax2 = ax1.twinx()
+    ax2.plot(range(len(rows)), rows["speedup"], color="tab:red", marker="o")
+    ax2.set_ylabel("Speedup over tournament", color="tab:red")
+    ax1.set_title(f"{workload}: branch predictors ({config})")
+    ax1.set_xlabel("Predictor")
+    plt.setp(ax1.get_xticklabels(), rotation=45, ha="right")
+    plt.tight_layout()
+
+
+def main():
+    p = argparse.ArgumentParser(
+        description="Compare branch predictors: miss rates per branch type, MPKI and speedup"
+    )
+    p.add_argument('csvs', nargs='+',
+                   help="CSV files written by parse_stats.py")
+    p.add_argument('--output-csv', default='bpred.csv',
+                   help="Write the table to this CSV file (default: bpred.csv)")
+    p.add_argument('--save-plots', action='store_true',
+                   help="Save plots as PNGs instead of displaying them")
+    p.add_argument('--plots-dir', default='plots/bpred',
+                   help="Directory under which to save PNGs (default: plots/bpred)")
+    args = p.parse_args()
+
+    df = pd.concat([pd.read_csv(path, index_col='Run') for path in args.csvs])
+    df = df[~df.index.duplicated(keep='last')]
+
+    table = bpred_table(df)
+    if (table["predictor"] != "tournament").sum() == 0:
+        print("No branch predictor sweep runs found; exiting.")
+        return
+
+    with pd.option_context("display.width", 200, "display.max_columns", None,
+                           "display.precision", 3):
+        print(table[table["system"] != DEFAULT_SYSTEM[0]])
+
+    table.to_csv(args.output_csv)
+    print(f"✓ Saved branch predictor table to '{args.output_csv}'")
+
+    if args.save_plots:
+        os.makedirs(args.plots_dir, exist_ok=True)
+    swept = table[table["system"] != DEFAULT_SYSTEM[0]]
+    for workload, config in swept[["workload", "config"]].drop_duplicates().itertuples(index=False):
+        plot_workload(table, workload, config)
+        if args.save_plots:
+            outname = os.path.join(args.plots_dir, f"{workload}-{config}.png")
+            plt.savefig(outname)
+            plt.close()
+            print(f"→ Saved {workload} {config} plot to '{outname}'")
+        else:
+            plt.show()
+
+
+if __name__ == '__main__':
+    main()
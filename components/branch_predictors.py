@@ -0,0 +1,45 @@
+from m5.objects.BranchPredictor import (
+    BiModeBP,
+    LocalBP,
+    LTAGE,
+    MultiperspectivePerceptron8KB,
+    MultiperspectivePerceptron64KB,
+    TAGE,
+    TAGE_SC_L_8KB,
+    TAGE_SC_L_64KB,
+    TournamentBP,
+)
+
+# Branch predictors that can be selected by name for the O3 and in-order
+# cores. The sizes of the table based ones are parameters (e.g.
+# globalPredictorSize), TAGE-SC-L and the perceptron come in 8 and 64 KB
+# budgets.
+BRANCH_PREDICTORS = {
+    "local": LocalBP,
+    "tournament": TournamentBP,
+    "bimode": BiModeBP,
+    "tage": TAGE,
+    "ltage": LTAGE,
+    "tage-sc-l-8kb": TAGE_SC_L_8KB,
+    "tage-sc-l-64kb": TAGE_SC_L_64KB,
+    "perceptron-8kb": MultiperspectivePerceptron8KB,
+    "perceptron-64kb": MultiperspectivePerceptron64KB,
+}
+
+# Predictor of the cores when none is given, the one all sweeps were run with
+DEFAULT_BRANCH_PREDICTOR = "tournament"
+
+
+def make_branch_predictor(spec=None):
+    """
+    Builds a branch predictor from its name in BRANCH_PREDICTORS or from a
+    dict with the name under "type" and the predictor parameters, e.g.
+    {"type": "tournament", "globalPredictorSize": 16384}. None builds the
+    default TournamentBP.
+    """
+    if spec is None:
+        spec = DEFAULT_BRANCH_PREDICTOR
+    if isinstance(spec, dict):
+        params = dict(spec)
+        return BRANCH_PREDICTORS[params.pop("type")](**params)
+    return BRANCH_PREDICTORS[spec]()
@@ -0,0 +1,283 @@
+from gem5.isas import ISA
+from gem5.components.cachehierarchies.classic.private_l1_shared_l2_cache_hierarchy \
+    import PrivateL1SharedL2CacheHierarchy
+from gem5.components.cachehierarchies.classic.caches.l1dcache import L1DCache
+from gem5.components.cachehierarchies.classic.caches.l1icache import L1ICache
+from gem5.components.cachehierarchies.classic.caches.l2cache import L2Cache
+from gem5.components.cachehierarchies.classic.caches.mmu_cache import MMUCache
+from gem5.components.cachehierarchies.ruby.mesi_two_level_cache_hierarchy \
+    import MESITwoLevelCacheHierarchy
+
+from m5.objects import Cache, L2XBar
+from m5.objects import (
+    AMPMPrefetcher,
+    BOPPrefetcher,
+    SignaturePathPrefetcher,
+    StridePrefetcher,
+    TaggedPrefetcher,
+)
+from m5.params import NULL
+
+# Prefetchers that can be selected by name for the L1D and L2
+PREFETCHERS = {
+    "stride": StridePrefetcher,
+    "tagged": TaggedPrefetcher,
+    "ampm": AMPMPrefetcher,
+    "bop": BOPPrefetcher,
+    "spp": SignaturePathPrefetcher,
+}
+
+
+def _make_prefetcher(spec):
+    """
+    Builds a prefetcher from its name ("none" disables prefetching) or from a
+    dict with the name under "type" and the prefetcher parameters, e.g.
+    {"type": "stride", "degree": 4}.
+    """
+    if spec == "none":
+        return NULL
+    if isinstance(spec, dict):
+        params = dict(spec)
+        return PREFETCHERS[params.pop("type")](**params)
+    return PREFETCHERS[spec]()
+
+
+def _configure(cache, params):
+    """
+    Sets the non-None entries of params on a cache, the others keep the
+    defaults of the gem5 standard library cache.
+    """
+    for name, value in params.items():
+        if value is not None:
+            setattr(cache, name, value)
+    return cache
+
+
+class PrivateL1SharedL2Cache(PrivateL1SharedL2CacheHierarchy):
+    def __init__(self,
+                 l1i_size="32KiB",
+                 l1i_assoc=8,
+                 l1d_size="32KiB",
+                 l1d_assoc=8,
+                 l2_size="256KiB",
+                 l2_assoc=16,
+                 l1i_mshrs=None,
+                 l1d_mshrs=None,
+                 l2_mshrs=None,
+                 l1i_tag_latency=None,
+                 l1i_data_latency=None,
+                 l1d_tag_latency=None,
+                 l1d_data_latency=None,
+                 l2_tag_latency=None,
+                 l2_data_latency=None,
+                 l1d_prefetcher=None,
+                 l2_prefetcher=None,
+                 l3_size=None,
+                 l3_assoc=16,
+                 l3_mshrs=32,
+                 l3_tag_latency=20,
+                 l3_data_latency=20):
+        """
+        PrivateL1SharedL2Cache is a classic cache hierarchy with private L1
+        instruction and data caches, a shared L2 and an optional shared L3.
+
+        The defaults are the hierarchy all the sweeps were run with: 32 KiB
+        8-way L1s and a 256 KiB 16-way L2, no L3. MSHRs and latencies left as
+        None keep the defaults of gem5's L1ICache, L1DCache and L2Cache.
+
+        :param l1i_size, l1d_size, l2_size: cache sizes, e.g. "64KiB".
+        :param l1i_assoc, l1d_assoc, l2_assoc: associativity of each cache.
+        :param l1i_mshrs, l1d_mshrs, l2_mshrs: number of MSHRs, i.e. how many
+        misses each cache can have outstanding.
+        :param *_tag_latency, *_data_latency: tag and data array access
+        latency in cycles.
+        :param l1d_prefetcher, l2_prefetcher: hardware prefetcher of the L1
+        data cache and of the L2: "none", one of PREFETCHERS ("stride",
+        "tagged", "ampm", "bop", "spp") or a dict like {"type": "stride",
+        "degree": 4}. None keeps the default of the gem5 cache class.
+        :param l3_size: size of the shared L3, None for no L3.
+        :param l3_assoc, l3_mshrs, l3_tag_latency, l3_data_latency: L3
+        parameters, only used if l3_size is set.
+        """
+        super().__init__(
+            l1i_size=l1i_size,
+            l1i_assoc=l1i_assoc,
+            l1d_size=l1d_size,
+            l1d_assoc=l1d_assoc,
+            l2_size=l2_size,
+            l2_assoc=l2_assoc,
+        )
+        self._params = {
+            "l1i_size": l1i_size,
+            "l1i_assoc": l1i_assoc,
+            "l1d_size": l1d_size,
+            "l1d_assoc": l1d_assoc,
+            "l2_size": l2_size,
+            "l2_assoc": l2_assoc,
+            "l1i_mshrs": l1i_mshrs,
+            "l1d_mshrs": l1d_mshrs,
+            "l2_mshrs": l2_mshrs,
+            "l1i_tag_latency": l1i_tag_latency,
+            "l1i_data_latency": l1i_data_latency,
+            "l1d_tag_latency": l1d_tag_latency,
+            "l1d_data_latency": l1d_data_latency,
+            "l2_tag_latency": l2_tag_latency,
+            "l2_data_latency": l2_data_latency,
+            "l1d_prefetcher": l1d_prefetcher,
+            "l2_prefetcher": l2_prefetcher,
+            "l3_size": l3_size,
+            "l3_assoc": l3_assoc,
+            "l3_mshrs": l3_mshrs,
+            "l3_tag_latency": l3_tag_latency,
+            "l3_data_latency": l3_data_latency,
+        }
+
+    def _level_params(self, level):
+        params = {
+            "mshrs": self._params[f"{level}_mshrs"],
+            "tag_latency": self._params[f"{level}_tag_latency"],
+            "data_latency": self._params[f"{level}_data_latency"],
+        }
+        prefetcher = self._params.get(f"{level}_prefetcher")
+        if prefetcher is not None:
+            params["prefetcher"] = _make_prefetcher(prefetcher)
+        return params
+
+    def get_params(self):
+        """
+        :return: the parameters of the hierarchy, for the run manifest.
+        """
+        return dict(self._params)
+
+    def incorporate_cache(self, board):
+        # Same topology as PrivateL1SharedL2CacheHierarchy, with the cache
+        # parameters applied and an optional L3 between the L2 and memory.
+        board.connect_system_port(self.membus.cpu_side_ports)
+
+        for _, port in board.get_memory().get_mem_ports():
+            self.membus.mem_side_ports = port
+
+        num_cores = board.get_processor().get_num_cores()
+        self.l1icaches = [
+            _configure(
+                L1ICache(size=self._l1i_size, assoc=self._l1i_assoc, writeback_clean=False),
+                self._level_params("l1i"),
+            )
+            for _ in range(num_cores)
+        ]
+        self.l1dcaches = [
+            _configure(
+                L1DCache(size=self._l1d_size, assoc=self._l1d_assoc),
+                self._level_params("l1d"),
+            )
+            for _ in range(num_cores)
+        ]
+        self.l2bus = L2XBar()
+        self.l2cache = _configure(
+            L2Cache(size=self._l2_size, assoc=self._l2_assoc),
+            self._level_params("l2"),
+        )
+        # ITLB Page walk caches
+        self.iptw_caches = [
+            MMUCache(size="8KiB", writeback_clean=False) for _ in range(num_cores)
+        ]
+        # DTLB Page walk caches
+        self.dptw_caches = [
+            MMUCache(size="8KiB", writeback_clean=False) for _ in range(num_cores)
+        ]
+
+        if board.has_coherent_io():
+            self._setup_io_cache(board)
+
+        for i, cpu in enumerate(board.get_processor().get_cores()):
+            cpu.connect_icache(self.l1icaches[i].cpu_side)
+            cpu.connect_dcache(self.l1dcaches[i].cpu_side)
+
+            self.l1icaches[i].mem_side = self.l2bus.cpu_side_ports
+            self.l1dcaches[i].mem_side = self.l2bus.cpu_side_ports
+            self.iptw_caches[i].mem_side = self.l2bus.cpu_side_ports
+            self.dptw_caches[i].mem_side = self.l2bus.cpu_side_ports
+
+            cpu.connect_walker_ports(
+                self.iptw_caches[i].cpu_side, self.dptw_caches[i].cpu_side
+            )
+
+            if board.get_processor().get_isa() == ISA.X86:
+                int_req_port = self.membus.mem_side_ports
+                int_resp_port = self.membus.cpu_side_ports
+                cpu.connect_interrupt(int_req_port, int_resp_port)
+            else:
+                cpu.connect_interrupt()
+
+        self.l2bus.mem_side_ports = self.l2cache.cpu_side
+
+        if self._params["l3_size"] is None:
+            self.membus.cpu_side_ports = self.l2cache.mem_side
+            return
+
+        self.l3bus = L2XBar()
+        self.l3cache = Cache(
+            size=self._params["l3_size"],
+            assoc=self._params["l3_assoc"],
+            tag_latency=self._params["l3_tag_latency"],
+            data_latency=self._params["l3_data_latency"],
+            response_latency=1,
+            mshrs=self._params["l3_mshrs"],
+            tgts_per_mshr=12,
+            writeback_clean=False,
+            clusivity="mostly_incl",
+        )
+        self.l2cache.mem_side = self.l3bus.cpu_side_ports
+        self.l3bus.mem_side_ports = self.l3cache.cpu_side
+        self.membus.cpu_side_ports = self.l3cache.mem_side
+
+
+class MESITwoLevelCache(MESITwoLevelCacheHierarchy):
+    def __init__(self,
+                 l1i_size="32KiB",
+                 l1i_assoc=8,
+                 l1d_size="32KiB",
+                 l1d_assoc=8,
+                 l2_size="256KiB",
+                 l2_assoc=16,
+                 num_l2_banks=1):
+        """
+        MESITwoLevelCache is a Ruby cache hierarchy with private L1 caches and
+        a shared, banked L2 kept coherent with the MESI_Two_Level protocol, the
+        hierarchy used in examples/x86_parsec.py. Ruby models the coherence
+        messages on the network, so it is used to study coherence traffic of
+        multi-threaded workloads.
+
+        The defaults match PrivateL1SharedL2Cache. gem5 has to be built with
+        the MESI_Two_Level protocol (e.g. PROTOCOL=MESI_Two_Level).
+
+        :param l1i_size, l1d_size, l2_size: cache sizes, e.g. "64KiB". l2_size
+        is the total size over all banks.
+        :param l1i_assoc, l1d_assoc, l2_assoc: associativity of each cache.
+        :param num_l2_banks: number of L2 banks (one directory per bank).
+        """
+        super().__init__(
+            l1i_size=l1i_size,
+            l1i_assoc=l1i_assoc,
+            l1d_size=l1d_size,
+            l1d_assoc=l1d_assoc,
+            l2_size=l2_size,
+            l2_assoc=l2_assoc,
+            num_l2_banks=num_l2_banks,
+        )
+        self._params = {
+            "protocol": "MESI_Two_Level",
+            "l1i_size": l1i_size,
+            "l1i_assoc": l1i_assoc,
+            "l1d_size": l1d_size,
+            "l1d_assoc": l1d_assoc,
+            "l2_size": l2_size,
+            "l2_assoc": l2_assoc,
+            "num_l2_banks": num_l2_banks,
+        }
+
+    def get_params(self):
+        """
+        :return: the parameters of the hierarchy, for the run manifest.
+        """
+        return dict(self._params)
@@ -0,0 +1,99 @@
+from gem5.components.memory.memory import ChanneledMemory
+from gem5.components.memory.dram_interfaces.ddr4 import DDR4_2400_8x8
+from gem5.components.memory.dram_interfaces.ddr5 import (
+    DDR5_4400_4x8,
+    DDR5_6400_4x8,
+)
+from gem5.components.memory.dram_interfaces.lpddr5 import (
+    LPDDR5_6400_1x16_BG_BL32,
+)
+from gem5.components.memory.dram_interfaces.hbm import HBM_1000_4H_1x128
+
+
+class DDR4_3200_8x8(DDR4_2400_8x8):
+    """
+    DDR4_3200_8x8 is DDR4_2400_8x8 with the clock and the JEDEC DDR4-3200AA
+    (22-22-22) timings, gem5 does not ship a DDR4-3200 interface.
+
+    A x64 channel has a theoretical peak bandwidth of 25.6 GB/s.
+    """
+    # 1600 MHz
+    tCK = "0.625ns"
+    # 8 beats across an x64 interface, 2 beats per clock
+    tBURST = "2.5ns"
+
+    # 22-22-22
+    tRCD = "13.75ns"
+    tCL = "13.75ns"
+    tRP = "13.75ns"
+
+    # max(4nCK, 2.5ns) and max(4nCK, 4.9ns) for 1 KiB pages
+    tRRD = "2.5ns"
+    tRRD_L = "4.9ns"
+
+
+# DRAM interfaces that can be selected by name, the bandwidth is the peak of
+# one channel
+DRAM_INTERFACES = {
+    "DDR4-2400": DDR4_2400_8x8,             # x64, 19.2 GB/s
+    "DDR4-3200": DDR4_3200_8x8,             # x64, 25.6 GB/s
+    "DDR5-4400": DDR5_4400_4x8,             # x32 sub-channel, 17.6 GB/s
+    "DDR5-6400": DDR5_6400_4x8,             # x32 sub-channel, 25.6 GB/s
+    "LPDDR5-6400": LPDDR5_6400_1x16_BG_BL32,  # x16, 12.8 GB/s
+    "HBM-1000": HBM_1000_4H_1x128,          # x128 pseudo-channel, 16 GB/s
+}
+
+
+class DDR4(ChanneledMemory):
+    """
+    DDR4 models a 1 GiB single channel DDR4 DRAM memory with a data
+    bus clocked at 2400MHz.
+
+    The theoretical peak bandwidth of DDR4 is 19.2 GB/s.
+    """
+    def __init__(self):
+        super().__init__(DDR4_2400_8x8, 1, 128, size="1GiB")
+
+
+class DRAM(ChanneledMemory):
+    def __init__(self,
+                 interface="DDR4-2400",
+                 channels=1,
+                 interleave_size=128,
+                 size="1GiB",
+                 addr_mapping=None):
+        """
+        DRAM is a multi-channel memory built from one of DRAM_INTERFACES.
+
+        The defaults are the memory all the sweeps were run with, the same as
+        DDR4: one DDR4-2400 channel of 1 GiB. The peak bandwidth is the
+        bandwidth of one channel of the interface times the channels.
+
+        :param interface: name of the DRAM interface, a key of DRAM_INTERFACES.
+        :param channels: number of channels (memory controllers).
+        :param interleave_size: bytes mapped to a channel before moving to the
+        next one, e.g. 64 for cache line interleaving or 4096 for pages.
+        :param size: total size of the memory, split evenly between channels.
+        :param addr_mapping: address mapping of the interface, e.g.
+        "RoRaBaCoCh", None keeps the default of the interface.
+        """
+        super().__init__(
+            DRAM_INTERFACES[interface],
+            channels,
+            interleave_size,
+            size=size,
+            addr_mapping=addr_mapping,
+        )
+        self._params = {
+            "interface": interface,
+            "channels": channels,
+            "interleave_size": interleave_size,
+            "size": size,
+            "addr_mapping": addr_mapping,
+        }
+
+    def get_params(self):
+        """
+        :return: the parameters of the memory, for the run manifest.
+        """
+        return dict(self._params)
@@ -0,0 +1,36 @@
+from m5.objects import Process
+
+
+def set_se_multiprogram_workload(board, programs):
+    """
+    set_se_multiprogram_workload runs a different SE mode program on every
+    core of the board, e.g. one benchmark per core of a HeterogeneousCPU.
+    The simulation ends when the last program exits.
+
+    Work items are not used as exit events: every program would reset the
+    statistics at its own m5_work_begin, so the statistics cover the whole
+    run of all programs.
+
+    :param board: a board whose processor has one core per program.
+    :param programs: list of (binary, arguments) tuples in core order, binary
+    is a BinaryResource.
+    """
+    cores = board.get_processor().get_cores()
+    if len(programs) != len(cores):
+        raise ValueError(
+            f"{len(programs)} programs for {len(cores)} cores, SE mode needs "
+            "exactly one program per core"
+        )
+
+    # Sets up the SE workload of the board, the processes are replaced below
+    binary, arguments = programs[0]
+    board.set_se_binary_workload(
+        binary, exit_on_work_items=False, arguments=list(arguments)
+    )
+
+    for pid, (core, (binary, arguments)) in enumerate(zip(cores, programs)):
+        path = binary.get_local_path()
+        process = Process(pid=100 + pid)
+        process.executable = path
+        process.cmd = [path] + list(arguments)
+        core.set_workload(process)
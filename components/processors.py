@@ -4,11 +4,93 @@ from gem5.components.processors.base_cpu_processor import BaseCPUProcessor
 
 from m5.objects import RiscvO3CPU
 from m5.objects import RiscvMinorCPU
+from m5.objects import (
+    MinorFUPool,
+    MinorDefaultIntFU,
+    MinorDefaultIntMulFU,
+    MinorDefaultIntDivFU,
+    MinorDefaultFloatSimdFU,
+    MinorDefaultPredFU,
+    MinorDefaultMemFU,
+    MinorDefaultMiscFU,
+    MinorDefaultVecFU,
+)
+from m5.objects import FUPool
 from m5.objects.FuncUnitConfig import *
-from m5.objects.BranchPredictor import (
-    TournamentBP,
+
+from o3_config import (
+    DEFAULT_COM_SIZE,
+    DEFAULT_FU_POOL,
+    STAGE_WIDTHS,
+    validate_o3_params,
 )
 
+from .branch_predictors import make_branch_predictor
+
+
+# Area weight of one functional unit of the O3 FU pool, see o3_area_score
+FU_AREA = {
+    "int_alu": 8,
+    "int_mult_div": 24,
+    "fp_alu": 16,
+    "fp_mult_div": 32,
+    "simd": 24,
+    "pred_alu": 4,
+    "read_port": 12,
+    "write_port": 12,
+    "rdwr_port": 16,
+    "ipr_port": 2,
+}
+
+# gem5 functional unit of every entry of an fu_pool dict, see DEFAULT_FU_POOL
+FU_CLASSES = {
+    "int_alu": IntALU,
+    "int_mult_div": IntMultDiv,
+    "fp_alu": FP_ALU,
+    "fp_mult_div": FP_MultDiv,
+    "simd": SIMD_Unit,
+    "pred_alu": PredALU,
+    "read_port": ReadPort,
+    "write_port": WritePort,
+    "rdwr_port": RdWrPort,
+    "ipr_port": IprPort,
+}
+
+
+def o3_area_score(width, rob_size, num_int_regs, num_fp_regs, fu_pool=None,
+                  lfst_size=1024, ssit_size=1024, **params):
+    """
+    o3_area_score is the area score of one out of order core, see
+    OutOfOrderCPU.get_area_score. With per-stage widths the mean stage width
+    is scored, functional units and store set tables add or remove area
+    relative to the gem5 defaults (FU_AREA), so a configuration of the nine
+    sweep parameters only keeps its score.
+
+    **IMPORTANT**: This is not a real area model.
+    """
+    widths = [params.get(key) or width for key in STAGE_WIDTHS]
+    if len(set(widths)) > 1:
+        width = sum(widths) / len(widths)
+    fu = dict(DEFAULT_FU_POOL, **(fu_pool or {}))
+    return (
+        width * (2 * rob_size + num_int_regs + num_fp_regs)
+        + 4 * width
+        + 2 * rob_size
+        + num_int_regs
+        + num_fp_regs
+        + sum(FU_AREA[name] * (count - DEFAULT_FU_POOL[name]) for name, count in fu.items())
+        + (lfst_size + ssit_size - 2 * 1024) // 64
+    )
+
+
+def o3_fu_pool(fu_pool):
+    """
+    o3_fu_pool builds an FUPool with the counts of DEFAULT_FU_POOL, updated
+    with the counts of fu_pool (e.g. {"int_alu": 4, "rdwr_port": 2}).
+    """
+    counts = dict(DEFAULT_FU_POOL, **fu_pool)
+    return FUPool(FUList=[FU_CLASSES[name](count=count) for name, count in counts.items()])
+
 
 class OutOfOrderCPUCore(RiscvO3CPU):
     def __init__(self, 
@@ -20,7 +102,22 @@ class OutOfOrderCPUCore(RiscvO3CPU):
                  fetchQ_size,
                  instructionQ_size,
                  loadQ_size,
-                 storeQ_size):
+                 storeQ_size,
+                 branch_pred=None,
+                 fetch_width=None,
+                 decode_width=None,
+                 rename_width=None,
+                 dispatch_width=None,
+                 issue_width=None,
+                 wb_width=None,
+                 commit_width=None,
+                 squash_width=None,
+                 delays=None,
+                 cache_load_ports=None,
+                 cache_store_ports=None,
+                 fu_pool=None,
+                 lfst_size=None,
+                 ssit_size=None):
         """
         OutOfOrderCPUCore extends RiscvO3CPU. RiscvO3CPU is one of gem5's
         internal models the implements an out of order pipeline.
@@ -30,8 +127,9 @@ class OutOfOrderCPUCore(RiscvO3CPU):
         of entries in the reorder buffer, the number of physical integer
         registers, and the number of physical floating point registers.
 
-        There are many other parameters for the O3 CPU model, but we are only
-        interested in the ones mentioned above.
+        The other parameters are optional, None keeps the gem5 default (see
+        o3_config.py). The combination is checked with validate_o3_params,
+        an illegal one raises ValueError.
 
         :param width: sets the width of fetch, decode, raname, issue, wb, and
         commit stages.
@@ -39,23 +137,75 @@ class OutOfOrderCPUCore(RiscvO3CPU):
         :param num_int_regs: determines the size of the integer register file.
         :param num_int_regs: determines the size of the vector/floating point
         register file.
+        :param branch_pred: branch predictor, a name of BRANCH_PREDICTORS or a
+        dict with its parameters (see make_branch_predictor), None for the
+        default TournamentBP.
+        :param fetch_width, ..., commit_width: width of a single stage,
+        overrides width.
+        :param squash_width: instructions squashed per cycle.
+        :param delays: stage-to-stage delays in cycles, e.g.
+        {"fetchToDecodeDelay": 2}, see DEFAULT_DELAYS.
+        :param cache_load_ports, cache_store_ports: loads and stores sent to
+        the L1D cache per cycle.
+        :param fu_pool: functional unit counts, e.g. {"int_alu": 4}, see
+        DEFAULT_FU_POOL.
+        :param lfst_size, ssit_size: entries of the store set predictor tables,
+        powers of two.
         """
+        stage_widths = dict(
+            fetch_width=fetch_width,
+            decode_width=decode_width,
+            rename_width=rename_width,
+            dispatch_width=dispatch_width,
+            issue_width=issue_width,
+            wb_width=wb_width,
+            commit_width=commit_width,
+        )
+        optional = dict(
+            squash_width=squash_width,
+            delays=delays,
+            cache_load_ports=cache_load_ports,
+            cache_store_ports=cache_store_ports,
+            fu_pool=fu_pool,
+            lfst_size=lfst_size,
+            ssit_size=ssit_size,
+        )
+        optional = {key: value for key, value in optional.items() if value is not None}
+        validate_o3_params(dict(
+            width=width, rob_size=rob_size, num_int_regs=num_int_regs,
+            num_fp_regs=num_fp_regs, fetchB_size=fetchB_size,
+            fetchQ_size=fetchQ_size, instructionQ_size=instructionQ_size,
+            loadQ_size=loadQ_size, storeQ_size=storeQ_size,
+            **stage_widths, **optional,
+        ))
+        stage_widths = {key: value or width for key, value in stage_widths.items()}
+
         super().__init__()
         # Width of the pipeline stages, max is 12
-        self.fetchWidth = width
-        self.decodeWidth = width
-        self.renameWidth = width
-        self.dispatchWidth = width
-        self.issueWidth = width
-        self.wbWidth = width
-        self.commitWidth = width
+        self.fetchWidth = stage_widths["fetch_width"]
+        self.decodeWidth = stage_widths["decode_width"]
+        self.renameWidth = stage_widths["rename_width"]
+        self.dispatchWidth = stage_widths["dispatch_width"]
+        self.issueWidth = stage_widths["issue_width"]
+        self.wbWidth = stage_widths["wb_width"]
+        self.commitWidth = stage_widths["commit_width"]
+        if squash_width is not None:
+            self.squashWidth = squash_width
+
+        # Stage-to-stage delays, the time buffers have to hold the longest one
+        if delays:
+            for name, cycles in delays.items():
+                setattr(self, name, cycles)
+            com_size = max(DEFAULT_COM_SIZE, *delays.values())
+            self.backComSize = com_size
+            self.forwardComSize = com_size
         
         # Number of physical registers
         self.numPhysIntRegs = num_int_regs
         self.numPhysFloatRegs = num_fp_regs
 
         # Branch predictor
-        self.branchPred = TournamentBP()
+        self.branchPred = make_branch_predictor(branch_pred)
 
         # Queue sizes and buffer sizes
         self.fetchBufferSize = fetchB_size # default is 64B, shouldn't be biger than cache block size
@@ -67,6 +217,20 @@ class OutOfOrderCPUCore(RiscvO3CPU):
         # Reorder buffer size
         self.numROBEntries = rob_size
 
+        # L1D cache ports and functional units
+        if cache_load_ports is not None:
+            self.cacheLoadPorts = cache_load_ports
+        if cache_store_ports is not None:
+            self.cacheStorePorts = cache_store_ports
+        if fu_pool is not None:
+            self.fuPool = o3_fu_pool(fu_pool)
+
+        # Store set memory dependence predictor
+        if lfst_size is not None:
+            self.LFSTSize = lfst_size
+        if ssit_size is not None:
+            self.SSITSize = ssit_size
+
 
 class OutOfOrderCPUStdCore(BaseCPUCore):
     def __init__(self, 
@@ -78,7 +242,9 @@ class OutOfOrderCPUStdCore(BaseCPUCore):
                  fetchQ_size,
                  instructionQ_size,
                  loadQ_size,
-                 storeQ_size):
+                 storeQ_size,
+                 branch_pred=None,
+                 **params):
         """
         OutOfOrderCPUStdCore wraps OutOfOrderCPUCore into a gem5 standard
         library core.
@@ -89,6 +255,7 @@ class OutOfOrderCPUStdCore(BaseCPUCore):
         :param num_int_regs: determines the size of the integer register file.
         :param num_int_regs: determines the size of the vector/floating point
         register file.
+        :param params: the optional parameters of OutOfOrderCPUCore.
         """
         core = OutOfOrderCPUCore(width, 
                                  rob_size, 
@@ -98,7 +265,9 @@ class OutOfOrderCPUStdCore(BaseCPUCore):
                                  fetchQ_size, 
                                  instructionQ_size, 
                                  loadQ_size, 
-                                 storeQ_size)
+                                 storeQ_size,
+                                 branch_pred,
+                                 **params)
         
         super().__init__(core, ISA.RISCV)
 
@@ -113,11 +282,15 @@ class OutOfOrderCPU(BaseCPUProcessor):
                  fetchQ_size,
                  instructionQ_size,
                  loadQ_size,
-                 storeQ_size):
+                 storeQ_size,
+                 num_cores=1,
+                 branch_pred=None,
+                 **params):
         """
-        OutOfOrderCPU models a single core CPU with support for the RISC-V
-        instruction set architecture (ISA). This model uses the O3 CPU model
-        which is an out of order pipelined CPU.
+        OutOfOrderCPU models a CPU of num_cores identical cores (a single core
+        by default) with support for the RISC-V instruction set architecture
+        (ISA). This model uses the O3 CPU model which is an out of order
+        pipelined CPU.
 
         Some parameters of the O3 CPU model are set in this class. Please refer
         to the OutOfOrderCPUCore class for more information.
@@ -128,11 +301,18 @@ class OutOfOrderCPU(BaseCPUProcessor):
         :param num_int_regs: determines the size of the integer register file.
         :param num_int_regs: determines the size of the vector/floating point
         register file.
+        :param num_cores: number of cores, for multi-threaded workloads.
+        :param branch_pred: branch predictor of the cores, see
+        OutOfOrderCPUCore.
+        :param params: the optional parameters of OutOfOrderCPUCore (per-stage
+        widths, delays, cache ports, fu_pool, ...).
         """
         cores = [
-            OutOfOrderCPUStdCore(width, rob_size, num_int_regs, num_fp_regs, fetchB_size, fetchQ_size, instructionQ_size, loadQ_size, storeQ_size)
+            OutOfOrderCPUStdCore(width, rob_size, num_int_regs, num_fp_regs, fetchB_size, fetchQ_size, instructionQ_size, loadQ_size, storeQ_size, branch_pred, **params)
+            for _ in range(num_cores)
         ]
         super().__init__(cores)
+        self._num_cores = num_cores
         self._width = width
         self._rob_size = rob_size
         self._num_int_regs = num_int_regs
@@ -142,40 +322,243 @@ class OutOfOrderCPU(BaseCPUProcessor):
         self._instructionQ_size = instructionQ_size
         self._loadQ_size = loadQ_size
         self._storeQ_size = storeQ_size
+        self._params = dict(params)
 
     def get_area_score(self):
         """
         get_area_score calculates the area score of a pipeline using its
-        parameters width, rob_size, num_int_regs, and num_fp_regs.
+        parameters width, rob_size, num_int_regs, and num_fp_regs, and the
+        optional ones that change area (see o3_area_score).
 
         **IMPORTANT**: This is not a real area model.
 
         :return: the area score of a pipeline using its parameters width,
-        rob_size, num_int_regs, and num_fp_regs.
-        """
-        score = (
-            self._width * (2 * self._rob_size + self._num_int_regs + self._num_fp_regs)
-            + 4 * self._width
-            + 2 * self._rob_size
-            + self._num_int_regs
-            + self._num_fp_regs
+        rob_size, num_int_regs, and num_fp_regs, times the number of cores.
+        """
+        score = o3_area_score(
+            self._width, self._rob_size, self._num_int_regs, self._num_fp_regs,
+            **self._params
         )
-        return score
+        return score * self._num_cores
+
+# MinorCPU defaults, the in-order configuration all sweeps were run with
+INORDER_DEFAULTS = {
+    "width": 2,
+    "decode_width": None,
+    "execute_width": None,
+    "fetch_limit": 1,
+    "fetch_line_width": 0,
+    "fetch2_buffer": 2,
+    "decode_buffer": 3,
+    "execute_buffer": 7,
+    "num_int_alus": 2,
+    "num_fp_units": 1,
+    "lsq_requests": 1,
+    "lsq_transfers": 2,
+    "store_buffer": 5,
+    "mem_accesses": 2,
+}
+
+
+def inorder_widths(width, decode_width=None, execute_width=None, **_):
+    """
+    inorder_widths returns the (decode, execute) widths of an in-order core:
+    decode_width and execute_width, or width where they are None.
+    """
+    return (
+        width if decode_width is None else decode_width,
+        width if execute_width is None else execute_width,
+    )
+
+
+def inorder_area_score(width, fetch2_buffer, decode_buffer, execute_buffer,
+                       num_int_alus, num_fp_units, store_buffer,
+                       decode_width=None, execute_width=None, **_):
+    """
+    inorder_area_score is the area score of one in-order core, on the same
+    scale as o3_area_score: the 32 integer and 32 floating point registers
+    (ported for the execute width) are scored like physical registers, the
+    inter-stage buffers (entries of decode width instructions for fetch2 and
+    decode, execute width for execute) like ROB entries, plus the functional
+    units and the store buffer.
+
+    **IMPORTANT**: This is not a real area model.
+    """
+    decode, execute = inorder_widths(width, decode_width, execute_width)
+    return (
+        2 * decode * (fetch2_buffer + decode_buffer)
+        + 2 * execute * execute_buffer
+        + execute * (32 + 32)
+        + 2 * decode + 2 * execute
+        + 8 * (num_int_alus + num_fp_units)
+        + 2 * store_buffer
+        + 32
+        + 32
+    )
+
+
+def minor_fu_pool(num_int_alus, num_fp_units):
+    """
+    minor_fu_pool builds the MinorDefaultFUPool with num_int_alus integer ALUs
+    and num_fp_units float/SIMD units (the default pool has 2 and 1).
+    """
+    return MinorFUPool(funcUnits=
+        [MinorDefaultIntFU() for _ in range(num_int_alus)]
+        + [MinorDefaultIntMulFU(), MinorDefaultIntDivFU()]
+        + [MinorDefaultFloatSimdFU() for _ in range(num_fp_units)]
+        + [
+            MinorDefaultPredFU(),
+            MinorDefaultMemFU(),
+            MinorDefaultMiscFU(),
+            MinorDefaultVecFU(),
+        ]
+    )
+
 
 class InOrderCPUCore(RiscvMinorCPU):
-    def __init__(self):
+    def __init__(self,
+                 branch_pred=None,
+                 width=2,
+                 decode_width=None,
+                 execute_width=None,
+                 fetch_limit=1,
+                 fetch_line_width=0,
+                 fetch2_buffer=2,
+                 decode_buffer=3,
+                 execute_buffer=7,
+                 num_int_alus=2,
+                 num_fp_units=1,
+                 lsq_requests=1,
+                 lsq_transfers=2,
+                 store_buffer=5,
+                 mem_accesses=2):
+        """
+        InOrderCPUCore extends RiscvMinorCPU, gem5's four stage (fetch1,
+        fetch2, decode, execute) in-order pipeline. The defaults are the
+        MinorCPU defaults (INORDER_DEFAULTS).
+
+        :param branch_pred: branch predictor, see OutOfOrderCPUCore.
+        :param width: instructions decoded, issued and committed per cycle.
+        :param decode_width: instructions decode takes in from fetch2 per
+        cycle (decodeInputWidth), width if None.
+        :param execute_width: instructions execute takes in from decode,
+        issues and commits per cycle (executeInputWidth, executeIssueLimit,
+        executeCommitLimit), width if None.
+        :param fetch_limit: cache line fetches fetch1 keeps in flight.
+        :param fetch_line_width: bytes fetch1 fetches per request, 0 for a
+        whole cache line.
+        :param fetch2_buffer, decode_buffer, execute_buffer: entries of the
+        input buffers of fetch2, decode and execute.
+        :param num_int_alus: number of integer ALUs.
+        :param num_fp_units: number of float/SIMD units.
+        :param lsq_requests: entries of the LSQ requests queue.
+        :param lsq_transfers: entries of the LSQ transfers queue.
+        :param store_buffer: entries of the store buffer.
+        :param mem_accesses: max number of memory accesses in flight.
+        """
         super().__init__()
-        # Only changes the branch predictor others are default for in-order
-        self.branchPred = TournamentBP()
+        self.branchPred = make_branch_predictor(branch_pred)
+
+        # Fetch side: lines in flight and bytes per fetch
+        self.fetch1FetchLimit = fetch_limit
+        self.fetch1LineWidth = fetch_line_width
+
+        # Width of decode and execute
+        decode_width, execute_width = inorder_widths(width, decode_width, execute_width)
+        self.decodeInputWidth = decode_width
+        self.executeInputWidth = execute_width
+        self.executeIssueLimit = execute_width
+        self.executeCommitLimit = execute_width
+
+        # Input buffers between the stages
+        self.fetch2InputBufferSize = fetch2_buffer
+        self.decodeInputBufferSize = decode_buffer
+        self.executeInputBufferSize = execute_buffer
+
+        # Functional units
+        self.executeFuncUnits = minor_fu_pool(num_int_alus, num_fp_units)
+
+        # Load store queue
+        self.executeLSQRequestsQueueSize = lsq_requests
+        self.executeLSQTransfersQueueSize = lsq_transfers
+        self.executeLSQStoreBufferSize = store_buffer
+        self.executeMaxAccessesInMemory = mem_accesses
 
 class InOrderCPUStdCore(BaseCPUCore):
-    def __init__(self):
-        core = InOrderCPUCore()
+    def __init__(self, branch_pred=None, **params):
+        core = InOrderCPUCore(branch_pred, **params)
         super().__init__(core, ISA.RISCV)
 
+# Area score of a default in-order core
+INORDER_AREA_SCORE = inorder_area_score(**INORDER_DEFAULTS)
+
+
 class InOrderCPU(BaseCPUProcessor):
-    def __init__(self):
+    def __init__(self, num_cores=1, branch_pred=None, **params):
+        """
+        InOrderCPU models a CPU of num_cores in-order MinorCPU cores (a single
+        core by default).
+
+        :param num_cores: number of cores, for multi-threaded workloads.
+        :param branch_pred: branch predictor of the cores, see
+        OutOfOrderCPUCore.
+        :param params: parameters of InOrderCPUCore (width, fetch2_buffer,
+        ...), the ones left out keep the MinorCPU defaults.
+        """
         core = [
-            InOrderCPUStdCore()
+            InOrderCPUStdCore(branch_pred, **params) for _ in range(num_cores)
         ]
-        super().__init__(core)
\ No newline at end of file
+        super().__init__(core)
+        self._num_cores = num_cores
+        self._params = dict(INORDER_DEFAULTS, **params)
+
+    def get_area_score(self):
+        """
+        get_area_score returns the area score of the in-order cores on the
+        same scale as OutOfOrderCPU.get_area_score, see inorder_area_score.
+
+        **IMPORTANT**: This is not a real area model.
+        """
+        return inorder_area_score(**self._params) * self._num_cores
+
+
+class HeterogeneousCPU(BaseCPUProcessor):
+    def __init__(self, num_big, num_little, big_params, branch_pred=None):
+        """
+        HeterogeneousCPU models a big.LITTLE CPU: num_big out of order "big"
+        cores followed by num_little in-order "little" cores (MinorCPU), all
+        sharing the cache hierarchy of the board. Cores 0 to num_big - 1 are
+        big, the others are little.
+
+        :param num_big: number of OutOfOrderCPUStdCore cores.
+        :param num_little: number of InOrderCPUStdCore cores.
+        :param big_params: keyword arguments of OutOfOrderCPUStdCore (width,
+        rob_size, ...), e.g. sweep.base.
+        :param branch_pred: branch predictor of all cores, see
+        OutOfOrderCPUCore.
+        """
+        cores = [
+            OutOfOrderCPUStdCore(**big_params, branch_pred=branch_pred)
+            for _ in range(num_big)
+        ] + [
+            InOrderCPUStdCore(branch_pred) for _ in range(num_little)
+        ]
+        super().__init__(cores)
+        self._num_big = num_big
+        self._num_little = num_little
+        self._big_params = dict(big_params)
+
+    def get_num_big(self):
+        return self._num_big
+
+    def get_num_little(self):
+        return self._num_little
+
+    def get_area_score(self):
+        """
+        get_area_score adds up the area scores of the big and little cores.
+
+        **IMPORTANT**: This is not a real area model.
+        """
+        big = o3_area_score(**self._big_params)
+        return big * self._num_big + INORDER_AREA_SCORE * self._num_little
\ No newline at end of file
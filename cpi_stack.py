@@ -0,0 +1,229 @@
+#!/usr/bin/env python3
+"""
+cpi_stack.py
+
+Top-down CPI stack per run, computed from the O3 stall counters collected by
+parse_stats.py (see stats-to-fetch.txt), and stacked bar plots across each
+sweep group, to see which bottleneck each knob relieves.
+
+Usage:
+
+  ./cpi_stack.py results-bfs/bfs-all.csv [results-daxpy/daxpy-all.csv ...] \
+    [--output-csv cpi_stack.csv] [--save-plots --plots-dir plots/cpi-stack] \
+    [--cpi] [--clock-period 1000] [--mispredict-penalty 10]
+
+Every issue slot (width x cycles) of a run is attributed to one category:
+
+  retiring          slots used by committed instructions
+  bad speculation   slots used by squashed instructions plus the slots lost
+                    while recovering (rename squash cycles)
+  frontend bound    slots lost because rename had nothing to rename
+                    (rename idle cycles)
+  backend memory    the remaining slots, split between memory and core by the
+  backend core      share of LQ/SQ/LSQ full events vs ROB/IQ/register full
+                    events
+
+If numCycles, rename.idleCycles or rename.squashCycles were not collected
+(older results), the stack is approximated from simTicks, fetch.icacheStallCycles
+(frontend is 0 without it) and branchMispredicts, and the run is marked
+approx=True. In-order runs have no O3 counters and are skipped.
+"""
+
+import argparse
+import os
+
+import numpy as np
+import pandas as pd
+import matplotlib.pyplot as plt
+
+from sweep import o3_params, parse_run_id
+
+CORE = "board.processor.cores.core."
+
+CATEGORIES = [
+    "retiring",
+    "bad_speculation",
+    "frontend_bound",
+    "backend_memory",
+    "backend_core",
+]
+
+MEMORY_EVENTS = ["rename.LQFullEvents", "rename.SQFullEvents", "iew.lsqFullEvents"]
+CORE_EVENTS = [
+    "rename.ROBFullEvents",
+    "rename.IQFullEvents",
+    "rename.fullRegistersEvents",
+    "iew.iqFullEvents",
+]
+
+
+def _col(df, stat):
+    """
+    The column of a core stat as floats, or NaN if it was not collected.
+    """
+    name = CORE + stat
+    if name in df.columns:
+        return df[name].astype(float)
+    return pd.Series(np.nan, index=df.index)
+
+
+def run_info(df):
+    """
+    run_info returns the workload, sweep group, config, system and width of
+    every run, from the manifest columns when parse_stats.py was run with
+    --manifest and from the run name otherwise.
+    """
+    info = pd.DataFrame([parse_run_id(run) for run in df.index], index=df.index)
+    for field in ["workload", "group", "config", "cpu", "system", "system_group"]:
+        if field in df.columns:
+            info[field] = df[field].where(df[field].notna(), info[field])
+    # Runs on a non-default cache/memory system are plotted in their own group
+    other_system = info["system"] != "default"
+    info.loc[other_system, "group"] = (
+        info["group"] + "@" + info["system_group"].fillna(info["system"])
+    )[other_system]
+    if "params.width" in df.columns:
+        info["width"] = df["params.width"]
+    else:
+        info["width"] = [
+            (o3_params(config) or {}).get("width", np.nan)
+            for config in info["config"]
+        ]
+    return info
+
+
+def cpi_stack(df, clock_period=1000, mispredict_penalty=10):
+    """
+    cpi_stack computes the normalized top-down stack of every O3 run.
+
+    :param df: collected statistics, one row per run (parse_stats.py CSV).
+    :param clock_period: ticks per cycle, used when numCycles is missing.
+    :param mispredict_penalty: cycles lost per branch misprediction, used when
+    rename.squashCycles is missing.
+    :return: a DataFrame with the run info, the fraction of slots in each
+    category, the CPI and the CPI of each category (cpi_<category>).
+    """
+    info = run_info(df)
+    o3 = (info["cpu"] == "o3") & info["width"].notna()
+    df, info = df[o3], info[o3]
+
+    width = info["width"].astype(float)
+    insts = df["simInsts"].astype(float)
+
+    cycles = _col(df, "numCycles")
+    approx = cycles.isna()
+    cycles = cycles.fillna(df["simTicks"].astype(float) / clock_period)
+    slots = width * cycles
+
+    # Slots that issued an instruction; the ones that did not commit were squashed
+    issued = _col(df, "numIssuedDist::mean") * cycles
+    retiring = insts / slots
+
+    recovery = _col(df, "rename.squashCycles")
+    approx |= recovery.isna()
+    recovery = recovery.fillna(_col(df, "commit.branchMispredicts") * mispredict_penalty)
+    bad_spec = ((issued - insts).clip(lower=0).fillna(0) + width * recovery) / slots
+
+    idle = _col(df, "rename.idleCycles")
+    approx |= idle.isna()
+    # Without rename idle cycles only icache stalls are known to be frontend
+    idle = idle.fillna(_col(df, "fetch.icacheStallCycles")).fillna(0)
+    frontend = width * idle / slots
+
+    # Everything else is the backend; never let the approximations go negative
+    frontend = np.minimum(frontend.fillna(0), (1 - retiring - bad_spec).clip(lower=0))
+    backend = (1 - retiring - bad_spec - frontend).clip(lower=0)
+
+    mem_events = sum(_col(df, stat).fillna(0) for stat in MEMORY_EVENTS)
+    core_events = sum(_col(df, stat).fillna(0) for stat in CORE_EVENTS)
+    events = mem_events + core_events
+    mem_share = (mem_events / events.where(events > 0)).fillna(0)
+
+    stack = pd.DataFrame({
+        "retiring": retiring,
+        "bad_speculation": bad_spec,
+        "frontend_bound": frontend,
+        "backend_memory": backend * mem_share,
+        "backend_core": backend * (1 - mem_share),
+    })
+    # Normalize so every run sums to exactly one
+    stack = stack.div(stack.sum(axis=1), axis=0)
+
+    cpi = cycles / insts
+    out = info[["workload", "group", "config", "width"]].join(stack)
+    out["cpi"] = cpi
+    for cat in CATEGORIES:
+        out[f"cpi_{cat}"] = stack[cat] * cpi
+    out["approx"] = approx
+    return out
+
+
+def plot_group(stack, workload, group, use_cpi):
+    rows = stack[(stack["workload"] == workload) & (stack["group"] == group)]
+    cols = [f"cpi_{cat}" for cat in CATEGORIES] if use_cpi else CATEGORIES
+    data = rows[cols].copy()
+    data.columns = CATEGORIES
+    ax = data.plot(kind="bar", stacked=True, figsize=(max(6, len(rows) * 0.8), 4))
+    ax.set_title(f"{workload}: top-down {'CPI' if use_cpi else 'slots'} ({group})")
+    ax.set_xlabel("Run")
+    ax.set_ylabel("CPI" if use_cpi else "Fraction of issue slots")
+    ax.legend(loc="upper left", bbox_to_anchor=(1, 1))
+    plt.xticks(rotation=45, ha="right")
+    plt.tight_layout()
+
+
+def main():
+    p = argparse.ArgumentParser(
+        description="Top-down CPI stack per run from O3 stall counters"
+    )
+    p.add_argument('csvs', nargs='+',
+                   help="CSV files written by parse_stats.py")
+    p.add_argument('--output-csv', default='cpi_stack.csv',
+                   help="Write the stacks to this CSV file (default: cpi_stack.csv)")
+    p.add_argument('--save-plots', action='store_true',
+                   help="Save plots as PNGs instead of displaying them")
+    p.add_argument('--plots-dir', default='plots/cpi-stack',
+                   help="Directory under which to save PNGs (default: plots/cpi-stack)")
+    p.add_argument('--cpi', action='store_true',
+                   help="Plot absolute CPI components instead of slot fractions")
+    p.add_argument('--clock-period', type=float, default=1000,
+                   help="Ticks per cycle, used when numCycles is missing (default: 1000)")
+    p.add_argument('--mispredict-penalty', type=float, default=10,
+                   help="Cycles per mispredict, used when rename.squashCycles is missing (default: 10)")
+    args = p.parse_args()
+
+    df = pd.concat([pd.read_csv(path, index_col='Run') for path in args.csvs])
+    df = df[~df.index.duplicated(keep='last')]
+
+    stack = cpi_stack(df, args.clock_period, args.mispredict_penalty)
+    if stack.empty:
+        print("No O3 runs found; exiting.")
+        return
+
+    print("\nTop-down stacks:\n")
+    with pd.option_context("display.width", 200, "display.max_columns", None,
+                           "display.precision", 3):
+        print(stack[["workload", "group"] + CATEGORIES + ["cpi", "approx"]])
+    if stack["approx"].any():
+        print("\n[note] some runs lack numCycles/rename.idleCycles/rename.squashCycles; "
+              "their stacks are approximated (approx=True)")
+
+    stack.to_csv(args.output_csv)
+    print(f"✓ Saved CPI stacks to '{args.output_csv}'")
+
+    if args.save_plots:
+        os.makedirs(args.plots_dir, exist_ok=True)
+    groups = stack[["workload", "group"]].drop_duplicates()
+    for workload, group in groups.itertuples(index=False):
+        plot_group(stack, workload, group, args.cpi)
+        if args.save_plots:
+            outname = os.path.join(args.plots_dir, f"{workload}-{group}.png")
+            plt.savefig(outname)
+            plt.close()
+            print(f"→ Saved {workload} {group} stack to '{outname}'")
+        else:
+            plt.show()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,370 @@
+#!/usr/bin/env python3
+"""
+dashboard.py
+
+Live progress of running sweeps. Every run of the sweep scripts publishes
+its progress to <run>/status.json (see watchdog and roi_phase in
+exit_handlers.py): committed instructions, host inst rate and ROI phase.
+The dashboard collects them into one progress bar per run and an overall
+ETA, in the terminal or as an HTML page that reloads itself.
+
+Usage:
+
+  # Output directories of multisim (m5out), results directories of
+  # jobqueue.py and its --scratch-dir, where the running jobs are
+  ./dashboard.py m5out [/tmp/gem5-jobs ...] [--watch 10] [--all]
+  ./dashboard.py m5out --html dashboard.html [--watch 10]
+
+  # With the ids of the whole sweep, so the runs not started yet count
+  ./dashboard.py m5out --script local-bfs-test.py [--gem5 gem5riscv]
+  ./dashboard.py m5out --ids-file bfs-runs.txt
+
+A run only gets its directory when gem5 instantiates it (manifest_on_start
+in exit_handlers.py), and its status.json right after. A run is pending
+while it has no status.json yet: a listed id (--script, --ids-file) with no
+directory, or a run that is starting. It is running while its status.json
+is updated, stale when it has not been updated for --stale seconds (a
+killed or hung gem5), and complete, stopped, failed or partial once it
+ended (see run_status in sweep.py).
+
+The length of a run is estimated with the committed instructions of the
+complete runs of the same workload and flag set, all CPU configurations run
+the same binary. Until one of them completed, its runs have no percentage
+and no ETA. The overall ETA is the instructions left of the running and
+pending runs over the current inst rate of all running runs. Without
+--script or --ids-file the runs that have not started are unknown, so the
+ETA only covers the started runs and is labeled so.
+"""
+
+import argparse
+import html
+import os
+import statistics
+import time
+
+from jobqueue import list_ids
+from sweep import (
+    MANIFEST_NAME,
+    STATUS_NAME,
+    parse_run_id,
+    read_manifest,
+    read_status,
+    run_status,
+)
+
+# Order of the states in the summary and the tables
+STATES = ["running", "stale", "pending", "complete", "stopped", "failed", "partial"]
+
+BAR_WIDTH = 30
+
+
+def _is_run(path):
+    return (
+        os.path.isfile(os.path.join(path, MANIFEST_NAME))
+        or os.path.isfile(os.path.join(path, STATUS_NAME))
+    )
+
+
+def find_runs(dirs):
+    """
+    find_runs lists the run directories under dirs: their subdirectories
+    with a manifest.json or a status.json, and one level deeper for the
+    scratch directories of jobqueue.py (<scratch>/<id>-<suffix>/<id>).
+
+    :return: a list of (id, path). A run found in several directories is
+        listed once, with its most recently modified copy.
+    """
+    found = {}
+    for base in dirs:
+        for name in sorted(os.listdir(base)):
+            path = os.path.join(base, name)
+            if not os.path.isdir(path):
+                continue
+            candidates = [(name, path)]
+            if not _is_run(path):
+                candidates = [
+                    (sub, os.path.join(path, sub)) for sub in sorted(os.listdir(path))
+                    if os.path.isdir(os.path.join(path, sub))
+                ]
+            for sim_id, run_path in candidates:
+                if not _is_run(run_path):
+                    continue
+                mtime = max(
+                    os.path.getmtime(os.path.join(run_path, f))
+                    for f in (MANIFEST_NAME, STATUS_NAME)
+                    if os.path.isfile(os.path.join(run_path, f))
+                )
+                if sim_id not in found or mtime > found[sim_id][1]:
+                    found[sim_id] = (run_path, mtime)
+    return [(sim_id, path) for sim_id, (path, _) in sorted(found.items())]
+
+
+def run_progress(sim_id, path, stale=600, now=None):
+    """
+    run_progress reads the state and progress of one run.
+
+    :param stale: seconds without an update after which a running run is
+        reported as stale.
+    :return: a dict with id, workload, flag_set, state, roi, insts, rate,
+        host_seconds and updated.
+    """
+    now = time.time() if now is None else now
+    fields = read_manifest(path) or parse_run_id(sim_id)
+    status = read_status(path) or {}
+    state = run_status(path)
+    if state == "partial":
+        if status.get("status") == "running":
+            state = "running" if now - status.get("updated", 0) <= stale else "stale"
+        elif not status:
+            state = "pending"
+    return {
+        "id": sim_id,
+        "workload": fields.get("workload"),
+        "flag_set": fields.get("flag_set"),
+        "state": state,
+        "roi": status.get("roi"),
+        "insts": status.get("committed_insts"),
+        "rate": status.get("inst_rate") if state == "running" else None,
+        "host_seconds": status.get("host_seconds"),
+        "updated": status.get("updated"),
+    }
+
+
+def add_expected(runs, ids):
+    """
+    add_expected adds a pending run for every id of the sweep that has no
+    run directory yet.
+
+    :param ids: the simulation ids of the sweep, e.g. from list_ids.
+    """
+    found = {run["id"] for run in runs}
+    for sim_id in ids:
+        if sim_id in found:
+            continue
+        fields = parse_run_id(sim_id)
+        runs.append({
+            "id": sim_id,
+            "workload": fields["workload"],
+            "flag_set": fields["flag_set"],
+            "state": "pending",
+            "roi": None,
+            "insts": None,
+            "rate": None,
+            "host_seconds": None,
+            "updated": None,
+        })
+    return runs
+
+
+def estimate(runs):
+    """
+    estimate adds the expected instructions ("expected"), the completed
+    fraction ("fraction") and the seconds left ("eta") to every run. The
+    expected instructions of a run are the median of the complete runs of
+    its workload and flag set.
+
+    :return: the overall ETA in seconds, or None if it cannot be estimated.
+    """
+    lengths = {}
+    for run in runs:
+        if run["state"] == "complete" and run["insts"]:
+            lengths.setdefault((run["workload"], run["flag_set"]), []).append(run["insts"])
+    expected = {key: statistics.median(values) for key, values in lengths.items()}
+
+    left, rate = 0, 0
+    for run in runs:
+        run["expected"] = expected.get((run["workload"], run["flag_set"]))
+        run["fraction"] = run["eta"] = None
+        if run["state"] == "complete":
+            run["fraction"] = 1.0
+        elif run["state"] in ("running", "pending") and run["expected"]:
+            done = run["insts"] or 0
+            # A run may commit more instructions than the median
+            run["fraction"] = min(done / run["expected"], 0.99)
+            run_left = max(run["expected"] - done, 0)
+            left += run_left
+            if run["rate"]:
+                run["eta"] = run_left / run["rate"]
+        if run["state"] == "running" and run["rate"]:
+            rate += run["rate"]
+
+    pending_unknown = any(
+        run["state"] in ("running", "pending") and not run["expected"] for run in runs
+    )
+    if not rate or pending_unknown:
+        return None
+    return left / rate
+
+
+def summary(runs):
+    counts = dict.fromkeys(STATES, 0)
+    for run in runs:
+        counts[run["state"]] += 1
+    return counts
+
+
+def _format_seconds(seconds):
+    if seconds is None:
+        return "-"
+    seconds = int(seconds)
+    return "%d:%02d:%02d" % (seconds // 3600, seconds // 60 % 60, seconds % 60)
+
+
+def _format_count(n):
+    if n is None:
+        return "-"
+    for unit, scale in (("G", 1e9), ("M", 1e6), ("k", 1e3)):
+        if n >= scale:
+            return f"{n / scale:.1f}{unit}"
+    return f"{n:.0f}"
+
+
+def _bar(fraction):
+    if fraction is None:
+        return "[" + "?" * BAR_WIDTH + "]"
+    filled = int(round(fraction * BAR_WIDTH))
+    return "[" + "#" * filled + "." * (BAR_WIDTH - filled) + "]"
+
+
+def _shown(runs, show_all):
+    keep = STATES if show_all else ["running", "stale"]
+    return sorted(
+        (run for run in runs if run["state"] in keep),
+        key=lambda run: (STATES.index(run["state"]), run["id"]),
+    )
+
+
+def _eta_label(started_only):
+    return "ETA of the started runs" if started_only else "ETA"
+
+
+def render_text(runs, eta, show_all=False, started_only=False):
+    """
+    render_text formats the dashboard for the terminal: the number of runs
+    per state, the overall ETA and a progress bar per running run (per run
+    with show_all).
+
+    :param started_only: runs lists the started runs only, the ETA is
+        labeled so.
+    """
+    counts = summary(runs)
+    total = len(runs)
+    ended = total - counts["running"] - counts["stale"] - counts["pending"]
+    rate = sum(run["rate"] or 0 for run in runs)
+    lines = [
+        ", ".join(f"{state}: {counts[state]}" for state in STATES) + f" (total {total})",
+        f"progress: {ended / total:.1%} of the runs ended, "
+        f"{_format_count(rate)} inst/s, {_eta_label(started_only)} {_format_seconds(eta)}"
+        if total else "no runs",
+        "",
+    ]
+    shown = _shown(runs, show_all)
+    width = max((len(run["id"]) for run in shown), default=0)
+    for run in shown:
+        percent = "" if run["fraction"] is None else f"{run['fraction']:.0%}"
+        lines.append(
+            f"{run['id']:<{width}} {run['state']:<8} {_bar(run['fraction'])} {percent:>4} "
+            f"{_format_count(run['insts']):>7} insts {_format_count(run['rate']):>7} inst/s "
+            f"{run['roi'] or '-':<9} ETA {_format_seconds(run['eta'])}"
+        )
+    return "\n".join(lines)
+
+
+def render_html(runs, eta, refresh=None, show_all=False, started_only=False):
+    """
+    render_html formats the dashboard as a standalone HTML page, reloading
+    itself every refresh seconds.
+    """
+    counts = summary(runs)
+    rows = []
+    for run in _shown(runs, show_all):
+        bar = (
+            "" if run["fraction"] is None
+            else f'<progress max="1" value="{run["fraction"]:.3f}"></progress> {run["fraction"]:.0%}'
+        )
+        rows.append(
+            "<tr>" + "".join(f"<td>{cell}</td>" for cell in [
+                html.escape(run["id"]), run["state"], bar,
+                _format_count(run["insts"]), _format_count(run["rate"]),
+                run["roi"] or "-", _format_seconds(run["eta"]),
+            ]) + "</tr>"
+        )
+    head = "".join(
+        f"<th>{name}</th>" for name in ["Run", "State", "Progress", "Insts", "Inst/s", "ROI", "ETA"]
+    )
+    meta = f'<meta http-equiv="refresh" content="{refresh}">' if refresh else ""
+    return f"""<!DOCTYPE html>
+<html><head><meta charset="utf-8">{meta}<title>gem5 sweep progress</title>
+<style>
+body {{ font-family: sans-serif; }}
+table {{ border-collapse: collapse; }}
+td, th {{ padding: 2px 8px; text-align: left; border-bottom: 1px solid #ddd; }}
+progress {{ width: 200px; }}
+</style></head><body>
+<h1>gem5 sweep progress</h1>
+<p>{", ".join(f"{state}: {counts[state]}" for state in STATES)} (total {len(runs)})
+&mdash; {_eta_label(started_only)} {_format_seconds(eta)} &mdash; updated {time.strftime("%Y-%m-%d %H:%M:%S")}</p>
+<table><tr>{head}</tr>
+{chr(10).join(rows)}
+</table></body></html>
+"""
+
+
+def collect(dirs, stale, ids=None):
+    runs = [run_progress(sim_id, path, stale) for sim_id, path in find_runs(dirs)]
+    if ids:
+        add_expected(runs, ids)
+    eta = estimate(runs)
+    return runs, eta
+
+
+def main():
+    p = argparse.ArgumentParser(
+        description="Progress bars and ETA of running gem5 sweeps"
+    )
+    p.add_argument("dirs", nargs="+",
+                   help="Output directories of the runs (m5out, results or scratch directories)")
+    p.add_argument("--watch", type=float, default=None, metavar="SECONDS",
+                   help="Refresh every SECONDS instead of printing once")
+    p.add_argument("--html", metavar="FILE",
+                   help="Write an HTML page instead of printing to the terminal")
+    p.add_argument("--all", action="store_true",
+                   help="List every run, not only the running ones")
+    p.add_argument("--stale", type=float, default=600,
+                   help="Seconds without a progress update before a running run is stale (default: 600)")
+    ids = p.add_mutually_exclusive_group()
+    ids.add_argument("--script",
+                     help="Sweep script whose runs (\"<gem5> <script> --list\") count as pending until they start")
+    ids.add_argument("--ids-file",
+                     help="Text file with the simulation ids of the sweep, one per line")
+    p.add_argument("--gem5", default="gem5riscv", help="gem5 binary for --script (default: gem5riscv)")
+    args = p.parse_args()
+
+    ids = None
+    if args.script:
+        ids = list_ids(args.gem5, os.path.abspath(args.script))
+    elif args.ids_file:
+        with open(args.ids_file) as f:
+            ids = [line.strip() for line in f if line.strip() and not line.startswith("#")]
+    started_only = ids is None
+
+    while True:
+        runs, eta = collect(args.dirs, args.stale, ids)
+        if args.html:
+            tmp = args.html + ".tmp"
+            with open(tmp, "w") as f:
+                f.write(render_html(runs, eta, args.watch, args.all, started_only))
+            os.replace(tmp, args.html)
+            print(f"✓ Saved dashboard to '{args.html}'")
+        else:
+            if args.watch:
+                # Clear the terminal before every refresh
+                print("\033[2J\033[H", end="")
+            print(render_text(runs, eta, args.all, started_only))
+        if not args.watch:
+            break
+        time.sleep(args.watch)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,189 @@
+#!/usr/bin/env python3
+"""
+equal_area.py
+
+Compare the tuned in-order (MinorCPU) configurations of inorder_sweeps with
+the O3 configurations at equal area: per workload, the area/performance
+Pareto front of each CPU type, and for every O3 point the fastest in-order
+point that fits in the same area.
+
+Usage:
+
+  ./equal_area.py results-bfs/bfs-all.csv [results-daxpy/daxpy-all.csv ...] \
+    [--output-csv equal_area.csv] [--area-model analytic] \
+    [--save-plots --plots-dir plots/equal-area]
+
+The CSVs have to be written by parse_stats.py --manifest, the area of a run
+is the get_area_score() of its processor recorded in the manifest, or with
+--area-model analytic the area in mm² of the cores and caches estimated by
+area_model.py.
+Performance is the speedup over the base in-order run ("inorder") of the
+workload, i.e. its simSeconds over the simSeconds of the run.
+
+Per O3 run the table has:
+
+  best_inorder      fastest in-order configuration with area <= the O3 area
+  inorder_speedup   speedup of that in-order configuration
+  o3_vs_inorder     speedup of the O3 run over it (> 1: the O3 core is
+                    faster at equal area)
+"""
+
+import argparse
+import os
+
+import numpy as np
+import pandas as pd
+import matplotlib.pyplot as plt
+
+from area_model import MODELS, estimate_runs
+from sweep import parse_run_id, run_id
+
+
+def pareto(points):
+    """
+    pareto returns the rows of points (area, speedup columns) that no other
+    row beats with less or equal area and higher speedup, sorted by area.
+    """
+    points = points.sort_values(["area", "speedup"], ascending=[True, False])
+    best = -np.inf
+    keep = []
+    for run, speedup in points["speedup"].items():
+        keep.append(speedup > best)
+        best = max(best, speedup)
+    return points[keep]
+
+
+def run_table(df):
+    """
+    run_table returns workload, cpu, config, area and speedup over the base
+    in-order run of every in-order and O3 run on the default system.
+    """
+    info = pd.DataFrame([parse_run_id(run) for run in df.index], index=df.index)
+    for field in ["workload", "cpu", "config", "system", "flag_set"]:
+        if field in df.columns:
+            info[field] = df[field].where(df[field].notna(), info[field])
+    keep = info["cpu"].isin(["inorder", "o3"]) & (info["system"] == "default")
+    df, info = df[keep], info[keep]
+
+    out = info[["workload", "cpu", "config", "flag_set"]].copy()
+    out["area"] = df["area"].astype(float) if "area" in df.columns else np.nan
+    seconds = df["simSeconds"].astype(float)
+    base_ids = [
+        run_id("inorder", workload, flag_set)
+        for workload, flag_set in zip(out["workload"], out["flag_set"])
+    ]
+    out["speedup"] = seconds.reindex(base_ids).to_numpy() / seconds.to_numpy()
+    return out.dropna(subset=["area", "speedup"])
+
+
+def equal_area(runs):
+    """
+    equal_area matches every O3 run with the fastest in-order run of the same
+    workload and flag set whose area is not larger.
+
+    :return: a DataFrame indexed by O3 run with workload, config, area,
+    speedup, best_inorder, inorder_area, inorder_speedup and o3_vs_inorder.
+    """
+    rows = []
+    for (workload, flag_set), group in runs.groupby(["workload", "flag_set"], dropna=False):
+        inorder = group[group["cpu"] == "inorder"]
+        for run, o3 in group[group["cpu"] == "o3"].iterrows():
+            fits = inorder[inorder["area"] <= o3["area"]]
+            row = {
+                "Run": run, "workload": workload, "flag_set": flag_set,
+                "config": o3["config"], "area": o3["area"], "speedup": o3["speedup"],
+                "best_inorder": None, "inorder_area": np.nan,
+                "inorder_speedup": np.nan, "o3_vs_inorder": np.nan,
+            }
+            if not fits.empty:
+                best = fits.loc[fits["speedup"].idxmax()]
+                row.update({
+                    "best_inorder": best["config"],
+                    "inorder_area": best["area"],
+                    "inorder_speedup": best["speedup"],
+                    "o3_vs_inorder": o3["speedup"] / best["speedup"],
+                })
+            rows.append(row)
+    if not rows:
+        return pd.DataFrame()
+    return pd.DataFrame(rows).set_index("Run")
+
+
+def plot_workload(runs, workload, area_label="Area score"):
+    rows = runs[runs["workload"] == workload]
+    fig, ax = plt.subplots(figsize=(6, 4))
+    for cpu, color in [("inorder", "tab:green"), ("o3", "tab:blue")]:
+        points = rows[rows["cpu"] == cpu]
+        if points.empty:
+            continue
+        ax.scatter(points["area"], points["speedup"], color=color, alpha=0.5, label=cpu)
+        front = pareto(points)
+        ax.step(front["area"], front["speedup"], where="post", color=color)
+    ax.set_xscale("log")
+    ax.set_title(f"{workload}: speedup over in-order vs area")
+    ax.set_xlabel(area_label)
+    ax.set_ylabel("Speedup over base in-order")
+    ax.legend()
+    plt.tight_layout()
+
+
+def main():
+    p = argparse.ArgumentParser(
+        description="Compare tuned in-order and O3 configurations at equal area"
+    )
+    p.add_argument('csvs', nargs='+',
+                   help="CSV files written by parse_stats.py --manifest")
+    p.add_argument('--output-csv', default='equal_area.csv',
+                   help="Write the O3 vs in-order table to this CSV file (default: equal_area.csv)")
+    p.add_argument('--area-model', choices=sorted(MODELS),
+                   help="Use the area in mm² of this area_model.py model instead of the area score")
+    p.add_argument('--save-plots', action='store_true',
+                   help="Save plots as PNGs instead of displaying them")
+    p.add_argument('--plots-dir', default='plots/equal-area',
+                   help="Directory under which to save PNGs (default: plots/equal-area)")
+    args = p.parse_args()
+
+    df = pd.concat([pd.read_csv(path, index_col='Run') for path in args.csvs])
+    df = df[~df.index.duplicated(keep='last')]
+    area_label = "Area score"
+    if args.area_model:
+        df["area"] = estimate_runs(df, args.area_model)["area_mm2"].reindex(df.index)
+        area_label = "Area (mm²)"
+
+    runs = run_table(df)
+    table = equal_area(runs)
+    if table.empty:
+        print("No runs with an area found; run parse_stats.py with --manifest. Exiting.")
+        return
+
+    with pd.option_context("display.width", 200, "display.max_columns", None,
+                           "display.max_rows", None, "display.precision", 3):
+        for workload in runs["workload"].unique():
+            print(f"\n{workload}: area/speedup Pareto front\n")
+            for cpu in ["inorder", "o3"]:
+                front = pareto(runs[(runs["workload"] == workload) & (runs["cpu"] == cpu)])
+                print(f"  {cpu}: " + ", ".join(
+                    f"{config} ({area:.0f}, {speedup:.2f}x)"
+                    for config, area, speedup in front[["config", "area", "speedup"]].itertuples(index=False)
+                ))
+        print("\nO3 vs the best in-order configuration of equal or smaller area:\n")
+        print(table)
+
+    table.to_csv(args.output_csv)
+    print(f"✓ Saved equal area table to '{args.output_csv}'")
+
+    if args.save_plots:
+        os.makedirs(args.plots_dir, exist_ok=True)
+    for workload in runs["workload"].unique():
+        plot_workload(runs, workload, area_label)
+        if args.save_plots:
+            outname = os.path.join(args.plots_dir, f"{workload}.png")
+            plt.savefig(outname)
+            plt.close()
+            print(f"→ Saved {workload} plot to '{outname}'")
+        else:
+            plt.show()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,361 @@
+"""
+exit_handlers.py
+
+Exit event handlers for the sweep scripts. Every helper returns a dict that
+can be passed as on_exit_event to gem5's Simulator.
+
+pipeview_window:
+    Captures an O3PipeView trace (readable by Konata) only for a window of
+    instructions inside the ROI, instead of for the whole run. gem5 compresses
+    the trace while writing it when the file name ends in ".gz". Use
+    pipeview.py to index the trace and cut instruction ranges out of it.
+
+completion_marker:
+    Records in the run's status.json that the workload exited and at which
+    tick, see run_status in sweep.py.
+
+watchdog:
+    Publishes the progress of a run (committed instructions, host inst rate)
+    to its status.json for dashboard.py, and stops a run that exceeds its
+    host time or simulated tick budget, or whose cores stop committing
+    instructions (a deadlocked configuration), recording the reason in
+    status.json, so one pathological design point cannot hold a multisim
+    pool hostage.
+
+roi_phase:
+    Resets the stats at WORKBEGIN and dumps them at WORKEND like gem5's
+    default handlers, and records the ROI phase of the run in status.json.
+
+short_roi:
+    Simulates only the first instructions of the ROI and ends the run, for
+    the regression benchmarks of benchmark.py.
+
+Use merge_handlers to combine the dicts of several helpers, it runs every
+handler of an exit event that more than one of them handles.
+
+manifest_on_start is not an exit handler: it writes the manifest of a run
+when its board is instantiated, so only the simulation a gem5 process
+actually runs gets one (not every simulation of the script, e.g. under
+--list or in the other multisim processes).
+"""
+import time
+
+import m5
+
+from gem5.simulate.exit_event import ExitEvent
+
+from sweep import run_dir, write_manifest, write_status
+
+# gem5 translates this exit cause to ExitEvent.MAX_INSTS
+MAX_INSTS_CAUSE = "a thread reached the max instruction count"
+
+# gem5 translates this exit cause to ExitEvent.SCHEDULED_TICK
+SCHEDULED_TICK_CAUSE = "Tick exit reached"
+
+# Simulated ticks between two watchdog checks: 1 ms, 1M cycles at 1GHz. No
+# core committing a single instruction for that long is a deadlock.
+WATCHDOG_TICKS = 10**9
+
+
+def merge_handlers(*handlers):
+    """
+    merge_handlers combines on_exit_event dicts. When several dicts handle
+    the same exit event, all their generators run on it, in order, and the
+    simulation ends if any of them says so.
+
+    :return: the on_exit_event dict for the Simulator.
+    """
+    merged = {}
+    for handler in handlers:
+        for event, generator in handler.items():
+            merged.setdefault(event, []).append(generator)
+
+    def run_all(generators):
+        while True:
+            # A list, not a generator expression: every handler must run
+            yield any([next(generator) for generator in generators])
+
+    return {
+        event: generators[0] if len(generators) == 1 else run_all(generators)
+        for event, generators in merged.items()
+    }
+
+
+def manifest_on_start(board, outdir, sim_id, **fields):
+    """
+    manifest_on_start writes the manifest of a run (see write_manifest in
+    sweep.py) once its board is instantiated, i.e. only in the process
+    that simulates it.
+
+    :param board: board of the run.
+    :param outdir: output directory of gem5, m5.options.outdir.
+    :param sim_id: id of the run.
+    :param fields: manifest fields, see write_manifest.
+    """
+    post_instantiate = board._post_instantiate
+
+    def _post_instantiate():
+        post_instantiate()
+        write_manifest(outdir, sim_id, **fields)
+
+    board._post_instantiate = _post_instantiate
+
+
+def _schedule_insts(board, insts):
+    """
+    Exit the simulation loop after `insts` more committed instructions.
+    """
+    core = board.get_processor().get_cores()[0].core
+    core.scheduleInstStop(0, insts, MAX_INSTS_CAUSE)
+
+
+def pipeview_window(board, skip, length, trace_file="pipeview.trace.gz"):
+    """
+    pipeview_window traces `length` instructions starting `skip` committed
+    instructions after WORKBEGIN (m5_work_begin) with the O3PipeView debug
+    flag. The trace is written to `trace_file` in the run's output directory.
+
+    Stats are still reset at WORKBEGIN like gem5's default handler does, and
+    the simulation keeps running after the window, so the stats of a traced
+    run are the same as the stats of an untraced one.
+
+    Requires a gem5.opt or gem5.debug build, gem5.fast has no tracing.
+
+    :param board: board running an OutOfOrderCPU.
+    :param skip: number of instructions between WORKBEGIN and the window.
+    :param length: number of instructions in the window.
+    :param trace_file: name of the trace file, ".gz" compresses it.
+    :return: the on_exit_event dict for the Simulator.
+    """
+    def start():
+        m5.trace.output(trace_file)
+        m5.debug.flags["O3PipeView"].enable()
+        _schedule_insts(board, length)
+
+    def stop():
+        m5.debug.flags["O3PipeView"].disable()
+
+    def on_workbegin():
+        m5.stats.reset()
+        if skip:
+            _schedule_insts(board, skip)
+        else:
+            start()
+        yield False
+        while True:
+            m5.stats.reset()
+            yield False
+
+    def on_max_insts():
+        if skip:
+            start()
+            yield False
+        stop()
+        while True:
+            yield False
+
+    return {
+        ExitEvent.WORKBEGIN: on_workbegin(),
+        ExitEvent.MAX_INSTS: on_max_insts(),
+    }
+
+
+def completion_marker(outdir, sim_id, board=None):
+    """
+    completion_marker writes status.json into the run directory when the
+    workload exits, then ends the simulation like gem5's default handler.
+
+    gem5 dumps the final stats when the process exits, after this handler,
+    so a run is only complete once stats.txt also ends with the end of dump
+    marker (see stats_complete in sweep.py). A run killed before, or that
+    crashes while dumping, is left "partial".
+
+    :param outdir: output directory of gem5, m5.options.outdir.
+    :param sim_id: id of the run, the name of its directory in outdir.
+    :param board: board of the run, to also record the instructions it
+        committed (dashboard.py estimates the length of similar runs with
+        them).
+    :return: the on_exit_event dict for the Simulator.
+    """
+    def on_exit():
+        _mark_exited(outdir, sim_id, board)
+        yield True
+
+    return {ExitEvent.EXIT: on_exit()}
+
+
+def _mark_exited(outdir, sim_id, board=None):
+    # The completion marker run_status in sweep.py requires
+    fields = {}
+    if board is not None:
+        fields["committed_insts"] = _committed_insts(board)
+    write_status(
+        run_dir(outdir, sim_id),
+        status="exited",
+        tick=m5.curTick(),
+        updated=time.time(),
+        **fields,
+        # Forget how an earlier attempt of this run ended, the runner
+        # records the exit status of this process after it exits
+        exit_status=None,
+        stopped=None,
+    )
+
+
+def _committed_insts(board):
+    return sum(core.core.totalInsts() for core in board.get_processor().get_cores())
+
+
+def watchdog(board, outdir, sim_id, max_seconds=None, max_ticks=None, check_ticks=WATCHDOG_TICKS,
+             roi="pre-roi"):
+    """
+    watchdog checks a run every check_ticks simulated ticks. At every check
+    it publishes the progress of the run to its status.json (status
+    "running", tick, committed instructions, host seconds and the host inst
+    rate since the last check) for dashboard.py, and it stops the run when:
+
+      - it ran for more than max_seconds of host time,
+      - it simulated more than max_ticks ticks,
+      - no core committed an instruction since the last check.
+
+    The reason is written to status.json and the simulation ends like on a
+    normal exit, so gem5 still dumps the stats. run_status in sweep.py
+    reports the run as "stopped", parse_stats.py skips it unless
+    --allow-partial is given.
+
+    The first check is scheduled when the board is instantiated. Budgets are
+    only enforced at checks: a run that stops advancing simulated time (a
+    host-side hang) is not caught here, see the --timeout of jobqueue.py.
+
+    :param board: board of the run.
+    :param outdir: output directory of gem5, m5.options.outdir.
+    :param sim_id: id of the run, the name of its directory in outdir.
+    :param max_seconds: host seconds budget, None for no limit.
+    :param max_ticks: simulated ticks budget, None for no limit.
+    :param check_ticks: simulated ticks between two checks.
+    :param roi: ROI phase the run starts in, "pre-roi" until roi_phase sees
+        WORKBEGIN, or e.g. "whole-run" for runs whose work items are not
+        exit events.
+    :return: the on_exit_event dict for the Simulator.
+    """
+    path = run_dir(outdir, sim_id)
+    state = {"start": time.monotonic(), "last": time.monotonic(), "insts": 0}
+
+    post_instantiate = board._post_instantiate
+
+    def _post_instantiate():
+        post_instantiate()
+        state["start"] = state["last"] = time.monotonic()
+        write_status(
+            path,
+            status="running",
+            started=time.time(),
+            updated=time.time(),
+            tick=m5.curTick(),
+            committed_insts=0,
+            host_seconds=0.0,
+            inst_rate=None,
+            roi=roi,
+            # Forget how an earlier attempt of this run ended
+            exit_status=None,
+            stopped=None,
+        )
+        m5.scheduleTickExitFromCurrent(check_ticks, SCHEDULED_TICK_CAUSE)
+
+    board._post_instantiate = _post_instantiate
+
+    def stop_reason(insts, seconds):
+        if max_seconds is not None and seconds > max_seconds:
+            return f"host time budget of {max_seconds}s exceeded"
+        if max_ticks is not None and m5.curTick() > max_ticks:
+            return f"simulated tick budget of {max_ticks} exceeded"
+        if insts == state["insts"]:
+            return f"no instruction committed in {check_ticks} ticks"
+        return None
+
+    def on_scheduled_tick():
+        while True:
+            now = time.monotonic()
+            insts = _committed_insts(board)
+            seconds = now - state["start"]
+            progress = dict(
+                tick=m5.curTick(),
+                committed_insts=insts,
+                host_seconds=seconds,
+                inst_rate=(insts - state["insts"]) / max(now - state["last"], 1e-9),
+                updated=time.time(),
+            )
+            reason = stop_reason(insts, seconds)
+            if reason is not None:
+                print(f"watchdog: stopping {sim_id}: {reason}")
+                write_status(path, status="stopped", stopped=reason, **progress)
+                yield True
+            write_status(path, status="running", **progress)
+            state["insts"], state["last"] = insts, now
+            m5.scheduleTickExitFromCurrent(check_ticks, SCHEDULED_TICK_CAUSE)
+            yield False
+
+    return {ExitEvent.SCHEDULED_TICK: on_scheduled_tick()}
+
+
+def roi_phase(outdir, sim_id):
+    """
+    roi_phase resets the stats at WORKBEGIN (m5_work_begin) and dumps them
+    at WORKEND (m5_work_end), like gem5's default handlers, and records the
+    phase of the run ("roi", then "post-roi") in its status.json.
+
+    :param outdir: output directory of gem5, m5.options.outdir.
+    :param sim_id: id of the run, the name of its directory in outdir.
+    :return: the on_exit_event dict for the Simulator.
+    """
+    path = run_dir(outdir, sim_id)
+
+    def on_workbegin():
+        while True:
+            m5.stats.reset()
+            write_status(path, roi="roi", roi_begin_tick=m5.curTick())
+            yield False
+
+    def on_workend():
+        while True:
+            m5.stats.dump()
+            write_status(path, roi="post-roi", roi_end_tick=m5.curTick())
+            yield False
+
+    return {
+        ExitEvent.WORKBEGIN: on_workbegin(),
+        ExitEvent.WORKEND: on_workend(),
+    }
+
+
+def short_roi(board, insts, outdir=None, sim_id=None):
+    """
+    short_roi resets the stats at WORKBEGIN (m5_work_begin) and ends the
+    simulation `insts` committed instructions later, so the stats dumped at
+    exit cover exactly that window of the ROI. A workload that ends before
+    is simulated to its end like without this handler, merge it with
+    completion_marker to mark that end too.
+
+    :param board: board of the run.
+    :param insts: number of instructions simulated after WORKBEGIN.
+    :param outdir: output directory of gem5, to write the completion marker
+        of completion_marker when the window ends (None for none).
+    :param sim_id: id of the run.
+    :return: the on_exit_event dict for the Simulator.
+    """
+    def on_workbegin():
+        m5.stats.reset()
+        _schedule_insts(board, insts)
+        yield False
+        while True:
+            yield False
+
+    def on_max_insts():
+        if outdir is not None:
+            _mark_exited(outdir, sim_id, board)
+        yield True
+
+    return {
+        ExitEvent.WORKBEGIN: on_workbegin(),
+        ExitEvent.MAX_INSTS: on_max_insts(),
+    }
@@ -0,0 +1,520 @@
+#!/usr/bin/env python3
+"""
+jobqueue.py
+
+Run the simulations of the sweep scripts from a job queue instead of one
+multisim pool, so any number of worker processes on any number of hosts can
+share a sweep. The queue is a SQLite database: sweep points are enqueued
+once, workers claim them under a lease, run them with gem5 one at a time and
+copy the run directory (stats.txt, manifest.json, config.ini, ...) to a
+shared results directory.
+
+Usage:
+
+  # Enqueue every simulation of a script (ids from "<gem5> <script> --list"),
+  # or only some of them
+  ./jobqueue.py enqueue --db sweep.db local-bfs-test.py [--gem5 gem5riscv]
+  ./jobqueue.py enqueue --db sweep.db local-daxpy-test.py --ids-file daxpy-runs.txt
+
+  # Start workers, on every host that sees the database and the results dir
+  ./jobqueue.py worker --db sweep.db --results-dir m5out [--gem5 gem5riscv] \
+    [--workers 8] [--lease 600] [--scratch-dir /tmp/gem5-jobs] [--timeout 14400]
+
+  # Progress and ETA, and requeueing failed jobs
+  ./jobqueue.py status --db sweep.db [--failed]
+  ./jobqueue.py requeue --db sweep.db [--failed] [--ids ID ...] [--incomplete m5out]
+
+  # Resume a sweep in a new queue: enqueue only the runs that are not
+  # complete in the results directory yet
+  ./jobqueue.py enqueue --db resume.db local-bfs-test.py --resume m5out
+
+A job is pending, running, done or failed. A worker renews the lease of its
+job while gem5 runs; if a worker dies, its lease expires and another worker
+claims the job again, or fails it with "lease expired" if that was its last
+attempt. A job whose gem5 process fails is retried until it has failed
+--max-attempts times. Each run goes to a scratch directory first and is
+moved into <results-dir>/<id> only when it is complete: gem5 exited with 0,
+the run wrote its completion marker and stats.txt ends with a full dump
+(see run_status in sweep.py). The exit status is recorded in the run's
+status.json. So the results directory holds finished runs only and
+parse_stats.py can read it with --base-dir.
+
+Runs stopped by the watchdog of the sweep scripts (see exit_handlers.py) or
+killed after --timeout host seconds are failed right away, with the reason
+as their error, instead of being retried. The stats of watchdog-stopped
+runs are uploaded, parse_stats.py reads them with --allow-partial.
+
+SQLite needs working file locks: put the database on a local disk of one
+host for single-host runs, or on a shared filesystem with POSIX locking
+(not every NFS setup has it) for multi-host runs.
+"""
+
+import argparse
+import os
+import shutil
+import socket
+import sqlite3
+import subprocess
+import tempfile
+import threading
+import time
+
+from sweep import read_status, run_status, stats_complete, write_status
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS jobs (
+    id TEXT PRIMARY KEY,
+    script TEXT NOT NULL,
+    state TEXT NOT NULL DEFAULT 'pending',
+    attempts INTEGER NOT NULL DEFAULT 0,
+    max_attempts INTEGER NOT NULL DEFAULT 3,
+    worker TEXT,
+    lease_until REAL,
+    enqueued REAL,
+    started REAL,
+    finished REAL,
+    exit_code INTEGER,
+    error TEXT,
+    host_seconds REAL
+)
+"""
+
+STATES = ["pending", "running", "done", "failed"]
+
+# Lines of simerr kept in the error of a failed job
+ERROR_LINES = 20
+
+
+def connect(db):
+    """
+    connect opens the queue database, creating it if needed. Transactions
+    are explicit (see claim), every other statement commits on its own.
+    """
+    conn = sqlite3.connect(db, timeout=60, isolation_level=None)
+    conn.row_factory = sqlite3.Row
+    conn.execute(SCHEMA)
+    return conn
+
+
+def enqueue(conn, script, ids, max_attempts=3):
+    """
+    enqueue adds the simulations ids of script as pending jobs. Ids that are
+    already queued are left alone, use requeue to run them again.
+
+    :return: the number of new jobs.
+    """
+    script = os.path.abspath(script)
+    now = time.time()
+    before = conn.total_changes
+    conn.executemany(
+        "INSERT OR IGNORE INTO jobs (id, script, max_attempts, enqueued) VALUES (?, ?, ?, ?)",
+        [(sim_id, script, max_attempts, now) for sim_id in ids],
+    )
+    return conn.total_changes - before
+
+
+def reap(conn, now=None):
+    """
+    reap fails the running jobs whose lease expired on their last attempt:
+    their worker died and no worker may claim them again.
+
+    :return: the number of failed jobs.
+    """
+    now = time.time() if now is None else now
+    cur = conn.execute(
+        """
+        UPDATE jobs SET state = 'failed', worker = NULL, lease_until = NULL,
+            finished = ?, error = 'lease expired'
+        WHERE state = 'running' AND lease_until < ? AND attempts >= max_attempts
+        """,
+        (now, now),
+    )
+    return cur.rowcount
+
+
+def claim(conn, worker, lease):
+    """
+    claim takes the oldest pending job, or a running job whose lease expired
+    (its worker died), and leases it to worker for lease seconds. Expired
+    jobs without attempts left are failed first, see reap.
+
+    :return: the job row, or None if there is nothing to run.
+    """
+    now = time.time()
+    conn.execute("BEGIN IMMEDIATE")
+    try:
+        reap(conn, now)
+        job = conn.execute(
+            """
+            SELECT * FROM jobs
+            WHERE (state = 'pending' AND attempts < max_attempts)
+               OR (state = 'running' AND lease_until < ?)
+            ORDER BY enqueued, id LIMIT 1
+            """,
+            (now,),
+        ).fetchone()
+        if job is not None:
+            conn.execute(
+                """
+                UPDATE jobs SET state = 'running', worker = ?, lease_until = ?,
+                    started = ?, attempts = attempts + 1
+                WHERE id = ?
+                """,
+                (worker, now + lease, now, job["id"]),
+            )
+        conn.execute("COMMIT")
+    except BaseException:
+        conn.execute("ROLLBACK")
+        raise
+    return job
+
+
+def renew(conn, sim_id, worker, lease):
+    """
+    renew extends the lease of a running job.
+
+    :return: False if the job is no longer leased to worker.
+    """
+    cur = conn.execute(
+        "UPDATE jobs SET lease_until = ? WHERE id = ? AND worker = ? AND state = 'running'",
+        (time.time() + lease, sim_id, worker),
+    )
+    return cur.rowcount == 1
+
+
+def finish(conn, sim_id, worker, exit_code, error=None, host_seconds=None, run_state="complete"):
+    """
+    finish records the outcome of a job: done if exit_code is 0 and the run
+    is complete, failed if it was stopped (running it again would hit the
+    same budget), otherwise pending again until it ran out of attempts, then
+    failed.
+
+    :param run_state: run_status of the run directory, see sweep.py.
+    """
+    conn.execute(
+        """
+        UPDATE jobs SET
+            state = CASE WHEN ? = 0 AND ? = 'complete' THEN 'done'
+                         WHEN ? != 'stopped' AND attempts < max_attempts THEN 'pending'
+                         ELSE 'failed' END,
+            worker = NULL, lease_until = NULL, finished = ?,
+            exit_code = ?, error = ?, host_seconds = ?
+        WHERE id = ? AND worker = ?
+        """,
+        (exit_code, run_state, run_state, time.time(), exit_code, error, host_seconds, sim_id, worker),
+    )
+
+
+def incomplete_ids(conn, results_dir):
+    """
+    incomplete_ids lists the done jobs whose run in results_dir is not
+    complete (see run_status in sweep.py), e.g. runs deleted or damaged
+    after they were uploaded, or uploaded by an older worker without the
+    completeness check.
+    """
+    return [
+        row["id"] for row in conn.execute("SELECT id FROM jobs WHERE state = 'done' ORDER BY id")
+        if run_status(os.path.join(results_dir, row["id"])) != "complete"
+    ]
+
+
+def requeue(conn, ids=None, failed=False):
+    """
+    requeue resets jobs to pending with no attempts: the given ids, the
+    failed jobs, or both.
+
+    :return: the number of requeued jobs.
+    """
+    where, args = [], []
+    if ids:
+        where.append("id IN (%s)" % ",".join("?" * len(ids)))
+        args.extend(ids)
+    if failed:
+        where.append("state = 'failed'")
+    if not where:
+        return 0
+    cur = conn.execute(
+        "UPDATE jobs SET state = 'pending', attempts = 0, worker = NULL, "
+        "lease_until = NULL, exit_code = NULL, error = NULL WHERE " + " OR ".join(where),
+        args,
+    )
+    return cur.rowcount
+
+
+def list_ids(gem5, script):
+    """
+    list_ids returns the simulation ids of a multisim script, as printed by
+    "<gem5> <script> --list".
+    """
+    out = subprocess.run(
+        [gem5, script, "--list"], check=True, capture_output=True, text=True
+    ).stdout
+    return [line.strip() for line in out.splitlines() if line.strip()]
+
+
+def _tail(path, lines=ERROR_LINES):
+    if not os.path.isfile(path):
+        return None
+    with open(path, errors="replace") as f:
+        return "".join(f.readlines()[-lines:]).strip() or None
+
+
+def _run_dir(scratch, sim_id):
+    # multisim writes to <outdir>/<id>, a plain run to <outdir>
+    nested = os.path.join(scratch, sim_id)
+    return nested if os.path.isdir(nested) else scratch
+
+
+def upload(run_path, results_dir, sim_id):
+    """
+    upload copies a finished run directory to <results_dir>/<sim_id>,
+    replacing an older copy. The copy is made under a temporary name and
+    renamed, so readers never see a half-copied run.
+    """
+    dest = os.path.join(results_dir, sim_id)
+    tmp = f"{dest}.tmp-{socket.gethostname()}-{os.getpid()}"
+    shutil.rmtree(tmp, ignore_errors=True)
+    shutil.copytree(run_path, tmp)
+    shutil.rmtree(dest, ignore_errors=True)
+    os.replace(tmp, dest)
+    return dest
+
+
+def run_job(conn, job, worker, gem5, results_dir, scratch_dir, lease, timeout=None):
+    """
+    run_job runs one claimed job with gem5 in a scratch directory, renewing
+    its lease every lease / 3 seconds, uploads the run directory and records
+    the outcome. If the lease is lost (another worker took the job over),
+    gem5 is stopped and nothing is uploaded. If gem5 runs for more than
+    timeout seconds it is killed and the run is recorded as stopped.
+
+    Complete runs and runs stopped by the watchdog of the sweep scripts
+    (see exit_handlers.py), whose stats are dumped, are uploaded.
+
+    :return: the exit code of gem5.
+    """
+    sim_id = job["id"]
+    scratch = tempfile.mkdtemp(prefix=f"{sim_id}-", dir=scratch_dir)
+    start = time.time()
+    try:
+        with open(os.path.join(scratch, "worker.log"), "w") as log:
+            proc = subprocess.Popen(
+                [gem5, "-re", "--outdir", scratch, job["script"], sim_id],
+                cwd=os.path.dirname(job["script"]),
+                stdout=log, stderr=subprocess.STDOUT,
+            )
+            stopped = None
+            while True:
+                wait = lease / 3
+                if timeout is not None:
+                    wait = max(0, min(wait, start + timeout - time.time()))
+                try:
+                    exit_code = proc.wait(timeout=wait)
+                    break
+                except subprocess.TimeoutExpired:
+                    if timeout is not None and time.time() - start >= timeout:
+                        proc.kill()
+                        exit_code = proc.wait()
+                        stopped = f"host timeout of {timeout:g}s exceeded, gem5 killed"
+                        print(f"[{worker}] {sim_id}: {stopped}")
+                        break
+                    if not renew(conn, sim_id, worker, lease):
+                        proc.kill()
+                        proc.wait()
+                        print(f"[{worker}] lost the lease of {sim_id}, stopped")
+                        return None
+
+        run_path = _run_dir(scratch, sim_id)
+        host_seconds = time.time() - start
+        write_status(run_path, exit_status=exit_code, worker=worker, host_seconds=host_seconds)
+        if stopped:
+            write_status(run_path, status="stopped", stopped=stopped)
+        # gem5 can exit with 0 without finishing the stats dump, e.g. when
+        # the script has no simulation of this id
+        state = run_status(run_path)
+        error = None
+        if state == "stopped":
+            error = read_status(run_path)["stopped"]
+        elif state != "complete":
+            error = (
+                _tail(os.path.join(run_path, "simerr"))
+                or _tail(os.path.join(scratch, "worker.log"))
+            )
+            if exit_code == 0:
+                error = f"gem5 exited with 0 but the run is {state}" + (f"\n{error}" if error else "")
+        if stats_complete(os.path.join(run_path, "stats.txt")) and state in ("complete", "stopped"):
+            upload(run_path, results_dir, sim_id)
+        finish(conn, sim_id, worker, exit_code, error, host_seconds, state)
+        return exit_code
+    finally:
+        shutil.rmtree(scratch, ignore_errors=True)
+
+
+def worker_loop(db, worker, gem5, results_dir, scratch_dir, lease, max_jobs=None, idle_exit=True, timeout=None):
+    """
+    worker_loop claims and runs jobs until the queue is empty (or max_jobs
+    jobs ran). Every worker thread has its own database connection.
+    """
+    conn = connect(db)
+    ran = 0
+    while max_jobs is None or ran < max_jobs:
+        job = claim(conn, worker, lease)
+        if job is None:
+            if idle_exit:
+                break
+            time.sleep(lease / 10)
+            continue
+        print(f"[{worker}] running {job['id']} (attempt {job['attempts'] + 1})")
+        exit_code = run_job(conn, job, worker, gem5, results_dir, scratch_dir, lease, timeout)
+        if exit_code is not None:
+            print(f"[{worker}] {job['id']} exited with {exit_code}")
+        ran += 1
+    conn.close()
+
+
+def status(conn):
+    """
+    status returns the number of jobs per state, and the estimated seconds
+    left: the mean host seconds of the done jobs times the jobs left, over
+    the number of jobs running now.
+
+    :return: (counts dict, eta seconds or None).
+    """
+    counts = dict.fromkeys(STATES, 0)
+    for row in conn.execute("SELECT state, COUNT(*) AS n FROM jobs GROUP BY state"):
+        counts[row["state"]] = row["n"]
+    mean = conn.execute(
+        "SELECT AVG(host_seconds) FROM jobs WHERE state = 'done'"
+    ).fetchone()[0]
+    left = counts["pending"] + counts["running"]
+    eta = None
+    if mean is not None and left:
+        eta = mean * left / max(1, counts["running"])
+    return counts, eta
+
+
+def _format_seconds(seconds):
+    seconds = int(seconds)
+    return "%d:%02d:%02d" % (seconds // 3600, seconds // 60 % 60, seconds % 60)
+
+
+def _load_ids(path):
+    with open(path) as f:
+        return [line.strip() for line in f if line.strip() and not line.startswith("#")]
+
+
+def main():
+    p = argparse.ArgumentParser(
+        description="SQLite job queue to run sweep simulations on many workers and hosts"
+    )
+    sub = p.add_subparsers(dest="command", required=True)
+
+    p_enqueue = sub.add_parser("enqueue", help="Enqueue the simulations of a sweep script")
+    p_enqueue.add_argument("script", help="Sweep script, e.g. local-bfs-test.py")
+    p_enqueue.add_argument("--db", required=True, help="Queue database")
+    p_enqueue.add_argument("--ids", nargs="+", help="Simulation ids to enqueue (default: all of the script)")
+    p_enqueue.add_argument("--ids-file", help="Text file with one simulation id per line")
+    p_enqueue.add_argument("--gem5", default="gem5riscv", help="gem5 binary (default: gem5riscv)")
+    p_enqueue.add_argument("--max-attempts", type=int, default=3,
+                           help="Runs of a job before it is marked failed (default: 3)")
+    p_enqueue.add_argument("--resume", metavar="RESULTS_DIR",
+                           help="Skip the simulations that are already complete in this results directory")
+
+    p_worker = sub.add_parser("worker", help="Claim and run jobs until the queue is empty")
+    p_worker.add_argument("--db", required=True, help="Queue database")
+    p_worker.add_argument("--results-dir", required=True,
+                          help="Shared directory the finished runs are copied to")
+    p_worker.add_argument("--gem5", default="gem5riscv", help="gem5 binary (default: gem5riscv)")
+    p_worker.add_argument("--workers", type=int, default=1,
+                          help="Jobs to run in parallel on this host (default: 1)")
+    p_worker.add_argument("--lease", type=float, default=600,
+                          help="Lease of a job in seconds, renewed while it runs (default: 600)")
+    p_worker.add_argument("--scratch-dir", default=None,
+                          help="Local directory for running jobs (default: the system temp dir)")
+    p_worker.add_argument("--max-jobs", type=int, default=None,
+                          help="Jobs each worker runs before exiting (default: no limit)")
+    p_worker.add_argument("--timeout", type=float, default=None,
+                          help="Host seconds after which a job's gem5 is killed and the job failed (default: no limit)")
+    p_worker.add_argument("--wait", action="store_true",
+                          help="Keep polling for new jobs instead of exiting when the queue is empty")
+
+    p_status = sub.add_parser("status", help="Show the progress of the queue")
+    p_status.add_argument("--db", required=True, help="Queue database")
+    p_status.add_argument("--failed", action="store_true", help="List the failed jobs and their errors")
+
+    p_requeue = sub.add_parser("requeue", help="Reset jobs to pending")
+    p_requeue.add_argument("--db", required=True, help="Queue database")
+    p_requeue.add_argument("--ids", nargs="+", help="Simulation ids to requeue")
+    p_requeue.add_argument("--failed", action="store_true", help="Requeue all failed jobs")
+    p_requeue.add_argument("--incomplete", metavar="RESULTS_DIR",
+                           help="Requeue the done jobs whose run in this results directory is not complete")
+    args = p.parse_args()
+
+    if args.command == "enqueue":
+        if args.ids_file:
+            ids = _load_ids(args.ids_file)
+        elif args.ids:
+            ids = args.ids
+        else:
+            ids = list_ids(args.gem5, os.path.abspath(args.script))
+        if args.resume:
+            complete = {
+                sim_id for sim_id in ids
+                if run_status(os.path.join(args.resume, sim_id)) == "complete"
+            }
+            print(f"Skipping {len(complete)} simulations already complete in '{args.resume}'")
+            ids = [sim_id for sim_id in ids if sim_id not in complete]
+        conn = connect(args.db)
+        added = enqueue(conn, args.script, ids, args.max_attempts)
+        print(f"✓ Enqueued {added} of {len(ids)} simulations of {args.script} in '{args.db}'")
+
+    elif args.command == "worker":
+        os.makedirs(args.results_dir, exist_ok=True)
+        results_dir = os.path.abspath(args.results_dir)
+        if args.scratch_dir:
+            os.makedirs(args.scratch_dir, exist_ok=True)
+        host = socket.gethostname()
+        threads = [
+            threading.Thread(target=worker_loop, args=(
+                args.db, f"{host}:{os.getpid()}:{i}", args.gem5, results_dir,
+                args.scratch_dir, args.lease, args.max_jobs, not args.wait, args.timeout,
+            ))
+            for i in range(args.workers)
+        ]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+    elif args.command == "status":
+        conn = connect(args.db)
+        reap(conn)
+        counts, eta = status(conn)
+        total = sum(counts.values())
+        print(", ".join(f"{state}: {counts[state]}" for state in STATES) + f" (total {total})")
+        if total:
+            print(f"progress: {(counts['done'] + counts['failed']) / total:.1%}"
+                  + (f", ETA {_format_seconds(eta)}" if eta is not None else ""))
+        for row in conn.execute(
+            "SELECT id, worker, started FROM jobs WHERE state = 'running' ORDER BY started"
+        ):
+            print(f"  running {row['id']} on {row['worker']} for {_format_seconds(time.time() - row['started'])}")
+        if args.failed:
+            for row in conn.execute(
+                "SELECT id, attempts, exit_code, error FROM jobs WHERE state = 'failed' ORDER BY id"
+            ):
+                print(f"\n✗ {row['id']} ({row['attempts']} attempts, exit code {row['exit_code']})")
+                if row["error"]:
+                    print("    " + row["error"].replace("\n", "\n    "))
+
+    elif args.command == "requeue":
+        conn = connect(args.db)
+        ids = list(args.ids or [])
+        if args.incomplete:
+            ids += incomplete_ids(conn, args.incomplete)
+        count = requeue(conn, ids, args.failed)
+        print(f"✓ Requeued {count} jobs")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,101 @@
+"""
+usage:
+    to run all simulations:
+        gem5riscv -re -m gem5.utils.multisim <script name>
+    to get the id of each simulation:
+        gem5riscv <script name> --list
+    to run a specific simulation:
+        gem5riscv <script name> <id>
+
+Regression benchmarks: a short window of the ROI of every workload on the
+very-small, base and very-big O3 configurations and on the base in-order
+configuration. Run it with benchmark.py, which runs the simulations one at
+a time to time them, records the results and flags regressions.
+"""
+import os
+import sys
+
+script_dir = os.path.abspath(os.path.dirname(__file__))
+if script_dir not in sys.path:
+    sys.path.insert(0, script_dir)
+
+import m5
+
+from components import (
+    RISCVBoard,
+    PrivateL1SharedL2Cache,
+    DRAM,
+    InOrderCPU,
+    OutOfOrderCPU,
+)
+from exit_handlers import completion_marker, manifest_on_start, merge_handlers, short_roi
+from sweep import (
+    DEFAULT_FLAG_SET,
+    FLAG_SETS,
+    WORKLOADS,
+    build_binary,
+    inorder_base,
+    o3_params,
+    run_id,
+)
+from gem5.simulate.simulator import Simulator
+from gem5.resources.resource import BinaryResource
+from gem5.utils.multisim import multisim
+
+multisim.set_num_processes(8)
+
+def get_board(cpu):
+    cache = PrivateL1SharedL2Cache()
+    memory = DRAM()
+
+    board = RISCVBoard(
+        clk_freq="1GHz", processor=cpu, cache_hierarchy=cache, memory=memory
+    )
+
+    return board
+
+# Single-threaded workloads of WORKLOADS that are benchmarked
+workloads = ["bfs", "bubble-sort", "daxpy", "queens"]
+
+# O3 configurations of o3_sweeps that are benchmarked, next to the base
+# in-order configuration
+o3_configs = ["very-small", "base", "very-big"]
+
+# Instructions simulated after WORKBEGIN, see short_roi in exit_handlers.py
+roi_insts = 1000000
+
+flag_set = DEFAULT_FLAG_SET
+
+for workload in workloads:
+    binary = BinaryResource(local_path=build_binary(workload, flag_set))
+
+    points = [("inorder", "inorder", inorder_base)]
+    points += [(f"o3-{name}", "o3", o3_params(name)) for name in o3_configs]
+    for config, cpu_type, params in points:
+        if cpu_type == "inorder":
+            cpu = InOrderCPU(**params)
+        else:
+            cpu = OutOfOrderCPU(**params)
+        board = get_board(cpu)
+        board.set_se_binary_workload(binary, arguments=WORKLOADS[workload]["arguments"])
+
+        sim_id = run_id(config, workload, flag_set)
+        manifest_on_start(
+            board, m5.options.outdir, sim_id,
+            cpu=cpu_type, config=config.removeprefix("o3-"), group="bench",
+            params=params, roi_insts=roi_insts,
+            area=board.get_processor().get_area_score(),
+            cache=board.get_cache_hierarchy().get_params(),
+            memory=board.get_memory().get_params(),
+            workload=workload, flag_set=flag_set, cflags=FLAG_SETS[flag_set],
+            binary=binary.get_local_path(),
+        )
+        simulator = Simulator(
+            board=board,
+            id=sim_id,
+            on_exit_event=merge_handlers(
+                completion_marker(m5.options.outdir, sim_id, board),
+                short_roi(board, roi_insts, m5.options.outdir, sim_id),
+            ),
+        )
+        multisim.add_simulator(simulator)
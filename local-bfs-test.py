@@ -14,13 +14,38 @@ script_dir = os.path.abspath(os.path.dirname(__file__))
 if script_dir not in sys.path:
     sys.path.insert(0, script_dir)
 
+import m5
+
 from components import (
     RISCVBoard,
     PrivateL1SharedL2Cache,
-    DDR4,
+    MESITwoLevelCache,
+    DRAM,
     InOrderCPU,
     OutOfOrderCPU,
 )
+from exit_handlers import (
+    completion_marker,
+    manifest_on_start,
+    merge_handlers,
+    pipeview_window,
+    roi_phase,
+    watchdog,
+)
+from sweep import (
+    DEFAULT_SYSTEM,
+    FLAG_SETS,
+    build_binary,
+    O3_GROUPS,
+    inorder_base,
+    inorder_sweeps,
+    o3_design,
+    o3_sweeps,
+    run_dir,
+    run_id,
+    run_status,
+    system_sweeps,
+)
 from gem5.simulate.simulator import Simulator
 from gem5.resources.resource import obtain_resource
 from gem5.resources.resource import BinaryResource
@@ -29,10 +54,16 @@ from pathlib import Path
 
 multisim.set_num_processes(8)
 
-def get_board_inorder():
-    cache = PrivateL1SharedL2Cache()
-    memory = DDR4()
-    cpu = InOrderCPU()
+def get_cache(system):
+    # Multi-core systems of multicore_sweeps may use the Ruby hierarchy
+    if "ruby" in system:
+        return MESITwoLevelCache(**system["ruby"])
+    return PrivateL1SharedL2Cache(**system.get("cache", {}))
+
+def get_board_inorder(system, **params):
+    cache = get_cache(system)
+    memory = DRAM(**system.get("memory", {}))
+    cpu = InOrderCPU(num_cores=system.get("cores", 1), branch_pred=system.get("branch_pred"), **params)
 
     board = RISCVBoard(
         clk_freq="1GHz", processor=cpu, cache_hierarchy=cache, memory=memory
@@ -40,10 +71,10 @@ def get_board_inorder():
 
     return board
 
-def get_board_o3(width, rob_size, num_int_regs, num_fp_regs, fetchB_size, fetchQ_size, instructionQ_size, loadQ_size, storeQ_size):
-    cache = PrivateL1SharedL2Cache()
-    memory = DDR4()
-    cpu = OutOfOrderCPU(width, rob_size, num_int_regs, num_fp_regs, fetchB_size, fetchQ_size, instructionQ_size, loadQ_size, storeQ_size)
+def get_board_o3(system, width, rob_size, num_int_regs, num_fp_regs, fetchB_size, fetchQ_size, instructionQ_size, loadQ_size, storeQ_size, **core_params):
+    cache = get_cache(system)
+    memory = DRAM(**system.get("memory", {}))
+    cpu = OutOfOrderCPU(width, rob_size, num_int_regs, num_fp_regs, fetchB_size, fetchQ_size, instructionQ_size, loadQ_size, storeQ_size, num_cores=system.get("cores", 1), branch_pred=system.get("branch_pred"), **core_params)
 
     board = RISCVBoard(
         clk_freq="1GHz", processor=cpu, cache_hierarchy=cache, memory=memory
@@ -51,110 +82,122 @@ def get_board_o3(width, rob_size, num_int_regs, num_fp_regs, fetchB_size, fetchQ
 
     return board
 
-# Binary path for a local resource
-binary = BinaryResource(local_path="/home/kutaybulun/Repos/my-gem5-experiments/workloads/breadFirstSearch/bfs")
-
-# In-order CPU configuration
-board_inorder = get_board_inorder()
-
-board_inorder.set_se_binary_workload(
-    binary
-)
-
-simulator_inorder = Simulator(board=board_inorder, id="inorder-bfs")
-multisim.add_simulator(simulator_inorder)
-
-# Out-of-order CPU configurations
-# For sweeping the parameters we have a base configuration.
-base= {
-    "width": 4,
-    "rob_size": 128,
-    "num_int_regs": 128,
-    "num_fp_regs": 128,
-    "fetchB_size": 64,
-    "fetchQ_size": 32,
-    "instructionQ_size": 64,
-    "loadQ_size": 128,
-    "storeQ_size": 128,
-}
-
-very_big = {
-    "width": 12,
-    "rob_size": 512,
-    "num_int_regs": 512,
-    "num_fp_regs": 512,
-    "fetchB_size": 64,
-    "fetchQ_size": 512,
-    "instructionQ_size": 512,
-    "loadQ_size": 512,
-    "storeQ_size": 512,
-}
-
-very_small = {
-    "width": 4,
-    "rob_size": 32,
-    "num_int_regs": 64,
-    "num_fp_regs": 64,
-    "fetchB_size": 32,
-    "fetchQ_size": 16,
-    "instructionQ_size": 16,
-    "loadQ_size": 32,
-    "storeQ_size": 32,
-}
-
-sweeps = []
-
-# Very big configuration
-sweeps.append(("very-big", very_big))
-sweeps.append(("base", base))
-sweeps.append(("very-small", very_small))
-
-# Sweep width
-for w in [2, 4, 8, 10, 12]:
-    cfg = base.copy()
-    cfg["width"] = w
-    sweeps.append(("width-%02d" % w, cfg))
-
-# Sweep ROB size
-for rob in [32, 64, 128, 256, 512]:
-    cfg = base.copy()
-    cfg["rob_size"] = rob
-    sweeps.append(("rob-%03d" % rob, cfg))
-
-# Sweep register file size
-for regs in [32, 64, 128, 256, 512]:
-    cfg = base.copy()
-    cfg["num_int_regs"] = regs
-    cfg["num_fp_regs"] = regs
-    sweeps.append(("physical-regs-%03d" % regs, cfg))
-
-# Sweep fetch queue size
-for fetchQ in [32, 64, 128, 256, 512]:
-    cfg = base.copy()
-    cfg["fetchQ_size"] = fetchQ
-    sweeps.append(("fetchQ-%02d" % fetchQ, cfg))
-
-# Sweep instruction queue size
-for instructionQ in [32, 64, 128, 256, 512]:
-    cfg = base.copy()
-    cfg["instructionQ_size"] = instructionQ
-    sweeps.append(("instructionQ-%02d" % instructionQ, cfg))
-
-# Sweep load queue and store queue size
-for lsQ in [32, 64, 128, 256, 512]:
-    cfg = base.copy()
-    cfg["loadQ_size"] = lsQ
-    cfg["storeQ_size"] = lsQ
-    sweeps.append(("lsQ-%02d" % lsQ, cfg))
-
-for name, params in sweeps:
-    board_o3 = get_board_o3(**params)
-    board_o3.set_se_binary_workload(
-        binary
-    )
-    sim_o3 = Simulator(
-        board=board_o3,
-        id=f"o3-{name}-bfs",
+def run_handlers(board, sim_id):
+    # Exit event handlers of every run: progress and ROI phase in the run's
+    # status.json for dashboard.py, the watchdog, and the completion marker
+    return merge_handlers(
+        completion_marker(m5.options.outdir, sim_id, board),
+        watchdog(board, m5.options.outdir, sim_id, max_seconds, max_ticks),
+        roi_phase(m5.options.outdir, sim_id),
     )
-    multisim.add_simulator(sim_o3)
 
+workload = "bfs"
+
+# Compiler flag sets to build the workload with, see FLAG_SETS in sweep.py.
+# Every flag set adds a full sweep, e.g. ["O2", "O3", "O3-unroll", "O3-rvv"].
+flag_sets = ["O2"]
+
+# In-order configurations simulated next to the base in-order run, [] for
+# the base in-order run only, e.g. inorder_sweeps() for the sweeps of
+# sweep.py or only some of their groups:
+# [point for point in inorder_sweeps() if point[1] == "inorder-width"].
+inorder_points = []
+
+# O3 configurations to simulate: the one-dimensional sweeps around the base
+# configuration, or a multi-knob design for sensitivity.py, e.g.
+# o3_design("fractional") or o3_design("random", n=64, seed=0). The
+# per-stage width, delay, port and FU mix sweeps are opt-in, e.g.
+# o3_sweeps(groups="all") or o3_sweeps(groups=O3_GROUPS + ["ports"]).
+o3_points = o3_sweeps()
+
+# Cache and memory configurations every point above is run with, see
+# system_sweeps in sweep.py, e.g. system_sweeps() for all of them.
+system_points = [DEFAULT_SYSTEM]
+
+# Opt-in O3PipeView capture for Konata, see pipeview_window in
+# exit_handlers.py. Set to (skip, length) to trace `length` instructions
+# starting `skip` instructions after WORKBEGIN, e.g. (1000000, 100000).
+# Pack and slice the traces with pipeview.py.
+pipeview = None
+# O3 configurations that are traced when pipeview is set
+pipeview_configs = ["base", "very-big"]
+
+# Budgets of every run, see watchdog in exit_handlers.py: a run is stopped
+# after max_seconds of host time or max_ticks simulated ticks (None for no
+# limit), or as soon as its cores stop committing instructions.
+max_seconds = 4 * 3600
+max_ticks = None
+
+# Skip the runs whose results in the output directory are already complete,
+# to rerun only the failed and killed ones of a sweep, see run_status in
+# sweep.py.
+resume = False
+
+for flag_set in flag_sets:
+    # Binary compiled with this flag set, built once and cached per flag set
+    binary = BinaryResource(local_path=build_binary(workload, flag_set))
+    cflags = FLAG_SETS[flag_set]
+
+    for system_name, system_group, system in system_points:
+        # Fields shared by the manifests of all runs on this system
+        run_fields = dict(
+            workload=workload, flag_set=flag_set, cflags=cflags,
+            binary=binary.get_local_path(),
+            system=system_name, system_group=system_group,
+            cores=system.get("cores", 1),
+            branch_pred=system.get("branch_pred"),
+        )
+
+        # In-order CPU configurations, the base one is the "inorder" run
+        for name, group, params in [("inorder", "inorder", inorder_base)] + inorder_points:
+            board_inorder = get_board_inorder(system, **params)
+
+            board_inorder.set_se_binary_workload(
+                binary
+            )
+
+            config = "inorder" if name == "inorder" else f"inorder-{name}"
+            sim_id = run_id(config, workload, flag_set, system_name)
+            if resume and run_status(run_dir(m5.options.outdir, sim_id)) == "complete":
+                continue
+            manifest_on_start(
+                board_inorder, m5.options.outdir, sim_id,
+                cpu="inorder", config=name, group=group, params=params,
+                area=board_inorder.get_processor().get_area_score(),
+                cache=board_inorder.get_cache_hierarchy().get_params(),
+                memory=board_inorder.get_memory().get_params(),
+                **run_fields,
+            )
+            simulator_inorder = Simulator(
+                board=board_inorder,
+                id=sim_id,
+                on_exit_event=run_handlers(board_inorder, sim_id),
+            )
+            multisim.add_simulator(simulator_inorder)
+
+        # Out-of-order CPU configurations
+        for name, group, params in o3_points:
+            board_o3 = get_board_o3(system, **params)
+            board_o3.set_se_binary_workload(
+                binary
+            )
+            sim_id = run_id(f"o3-{name}", workload, flag_set, system_name)
+            if resume and run_status(run_dir(m5.options.outdir, sim_id)) == "complete":
+                continue
+            manifest_on_start(
+                board_o3, m5.options.outdir, sim_id,
+                cpu="o3", config=name, group=group, params=params,
+                area=board_o3.get_processor().get_area_score(),
+                cache=board_o3.get_cache_hierarchy().get_params(),
+                memory=board_o3.get_memory().get_params(),
+                **run_fields,
+            )
+            on_exit_event = run_handlers(board_o3, sim_id)
+            if pipeview is not None and name in pipeview_configs:
+                on_exit_event = merge_handlers(on_exit_event, pipeview_window(board_o3, *pipeview))
+            sim_o3 = Simulator(
+                board=board_o3,
+                id=sim_id,
+                on_exit_event=on_exit_event,
+            )
+            multisim.add_simulator(sim_o3)
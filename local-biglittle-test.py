@@ -0,0 +1,132 @@
+"""
+usage:
+    to run all simulations:
+        gem5riscv -re -m gem5.utils.multisim <script name>
+    to get the id of each simulation:
+        gem5riscv <script name> --list
+    to run a specific simulation:
+        gem5riscv <script name> <id>
+
+Runs a multi-program mix on big.LITTLE processors (see HeterogeneousCPU),
+one program per core, for every split of hetero_sweeps and every placement
+policy. Compare throughput and performance per area with biglittle.py.
+"""
+import os
+import sys
+import glob
+
+script_dir = os.path.abspath(os.path.dirname(__file__))
+if script_dir not in sys.path:
+    sys.path.insert(0, script_dir)
+
+import m5
+
+from components import (
+    RISCVBoard,
+    PrivateL1SharedL2Cache,
+    DRAM,
+    HeterogeneousCPU,
+    set_se_multiprogram_workload,
+)
+from exit_handlers import completion_marker, manifest_on_start, merge_handlers, watchdog
+from sweep import (
+    DEFAULT_FLAG_SET,
+    FLAG_SETS,
+    MIXES,
+    PLACEMENT_POLICIES,
+    WORKLOADS,
+    build_binary,
+    hetero_sweeps,
+    load_speedups,
+    o3_params,
+    place_programs,
+    run_dir,
+    run_id,
+    run_status,
+)
+from gem5.simulate.simulator import Simulator
+from gem5.resources.resource import BinaryResource
+from gem5.utils.multisim import multisim
+
+multisim.set_num_processes(8)
+
+def get_board_hetero(num_big, num_little, big_config):
+    cache = PrivateL1SharedL2Cache()
+    memory = DRAM()
+    cpu = HeterogeneousCPU(num_big, num_little, o3_params(big_config))
+
+    board = RISCVBoard(
+        clk_freq="1GHz", processor=cpu, cache_hierarchy=cache, memory=memory
+    )
+
+    return board
+
+mix = "mix4"
+flag_set = DEFAULT_FLAG_SET
+
+# big.LITTLE splits of 4 cores with base O3 big cores, see hetero_sweeps in
+# sweep.py
+hetero_points = hetero_sweeps(len(MIXES[mix]), big_config="base")
+
+# Placement policies to compare, see place_programs in sweep.py
+policies = PLACEMENT_POLICIES
+
+# Single-core results the "speedup" policy ranks the programs with
+speedups = load_speedups(glob.glob(os.path.join(script_dir, "results-*", "*-all.csv")))
+
+binaries = {
+    workload: BinaryResource(local_path=build_binary(workload, flag_set))
+    for workload in MIXES[mix]
+}
+
+# Host seconds and simulated ticks budgets of every run, see watchdog in
+# exit_handlers.py
+max_seconds = 4 * 3600
+max_ticks = None
+
+# Skip the runs whose results in the output directory are already complete,
+# see run_status in sweep.py
+resume = False
+
+for name, group, params in hetero_points:
+    placements = {}
+    for policy in policies:
+        programs = place_programs(MIXES[mix], params["num_big"], policy, speedups)
+        # Splits with only one kind of core have a single placement
+        if programs in placements.values():
+            continue
+        placements[policy] = programs
+
+    for policy, programs in placements.items():
+        sim_id = run_id(f"hetero-{name}-{policy}", mix, flag_set)
+        if resume and run_status(run_dir(m5.options.outdir, sim_id)) == "complete":
+            continue
+
+        board = get_board_hetero(**params)
+        set_se_multiprogram_workload(board, [
+            (binaries[workload], WORKLOADS[workload]["arguments"])
+            for workload in programs
+        ])
+
+        manifest_on_start(
+            board, m5.options.outdir, sim_id,
+            cpu="hetero", config=f"{name}-{policy}", group=group,
+            params=params, policy=policy, programs=programs,
+            area=board.get_processor().get_area_score(),
+            cache=board.get_cache_hierarchy().get_params(),
+            memory=board.get_memory().get_params(),
+            workload=mix, flag_set=flag_set, cflags=FLAG_SETS[flag_set],
+            cores=len(programs),
+        )
+        simulator = Simulator(
+            board=board,
+            id=sim_id,
+            on_exit_event=merge_handlers(
+                completion_marker(m5.options.outdir, sim_id, board),
+                # Work items are not exit events of multi-program runs (see
+                # set_se_multiprogram_workload), the stats cover the whole run
+                watchdog(board, m5.options.outdir, sim_id, max_seconds, max_ticks,
+                         roi="whole-run"),
+            ),
+        )
+        multisim.add_simulator(simulator)
@@ -0,0 +1,201 @@
+"""
+usage:
+    to run all simulations:
+        gem5riscv -re -m gem5.utils.multisim <script name>
+    to get the id of each simulation:
+        gem5riscv <script name> --list
+    to run a specific simulation:
+        gem5riscv <script name> <id>
+"""
+import os
+import sys
+
+script_dir = os.path.abspath(os.path.dirname(__file__))
+if script_dir not in sys.path:
+    sys.path.insert(0, script_dir)
+
+import m5
+
+from components import (
+    RISCVBoard,
+    PrivateL1SharedL2Cache,
+    MESITwoLevelCache,
+    DRAM,
+    InOrderCPU,
+    OutOfOrderCPU,
+)
+from exit_handlers import (
+    completion_marker,
+    manifest_on_start,
+    merge_handlers,
+    pipeview_window,
+    roi_phase,
+    watchdog,
+)
+from sweep import (
+    DEFAULT_SYSTEM,
+    FLAG_SETS,
+    build_binary,
+    O3_GROUPS,
+    inorder_base,
+    inorder_sweeps,
+    o3_design,
+    o3_sweeps,
+    multicore_sweeps,
+    run_dir,
+    run_id,
+    run_status,
+    system_sweeps,
+)
+from gem5.simulate.simulator import Simulator
+from gem5.resources.resource import obtain_resource
+from gem5.resources.resource import BinaryResource
+from gem5.utils.multisim import multisim
+from pathlib import Path
+
+multisim.set_num_processes(8)
+
+def get_cache(system):
+    # Multi-core systems of multicore_sweeps may use the Ruby hierarchy
+    if "ruby" in system:
+        return MESITwoLevelCache(**system["ruby"])
+    return PrivateL1SharedL2Cache(**system.get("cache", {}))
+
+def get_board_inorder(system, **params):
+    cache = get_cache(system)
+    memory = DRAM(**system.get("memory", {}))
+    cpu = InOrderCPU(num_cores=system.get("cores", 1), branch_pred=system.get("branch_pred"), **params)
+
+    board = RISCVBoard(
+        clk_freq="1GHz", processor=cpu, cache_hierarchy=cache, memory=memory
+    )
+
+    return board
+
+def get_board_o3(system, width, rob_size, num_int_regs, num_fp_regs, fetchB_size, fetchQ_size, instructionQ_size, loadQ_size, storeQ_size, **core_params):
+    cache = get_cache(system)
+    memory = DRAM(**system.get("memory", {}))
+    cpu = OutOfOrderCPU(width, rob_size, num_int_regs, num_fp_regs, fetchB_size, fetchQ_size, instructionQ_size, loadQ_size, storeQ_size, num_cores=system.get("cores", 1), branch_pred=system.get("branch_pred"), **core_params)
+
+    board = RISCVBoard(
+        clk_freq="1GHz", processor=cpu, cache_hierarchy=cache, memory=memory
+    )
+
+    return board
+
+def run_handlers(board, sim_id):
+    # Exit event handlers of every run: progress and ROI phase in the run's
+    # status.json for dashboard.py, the watchdog, and the completion marker
+    return merge_handlers(
+        completion_marker(m5.options.outdir, sim_id, board),
+        watchdog(board, m5.options.outdir, sim_id, max_seconds, max_ticks),
+        roi_phase(m5.options.outdir, sim_id),
+    )
+
+workload = "daxpy-mt"
+
+# Compiler flag sets to build the workload with, see FLAG_SETS in sweep.py.
+# Every flag set adds a full sweep, e.g. ["O2", "O3", "O3-unroll", "O3-rvv"].
+flag_sets = ["O2"]
+
+# Only the base in-order configuration runs on the multi-core systems
+inorder_points = []
+
+# O3 configurations to simulate on every core of the multi-core systems, the
+# base configuration by default, see o3_sweeps in sweep.py.
+o3_points = [point for point in o3_sweeps() if point[0] == "base"]
+
+# Multi-core systems to run on, classic and Ruby MESI_Two_Level caches with
+# 1 to 8 cores, see multicore_sweeps in sweep.py. The workload runs one
+# thread per core.
+system_points = multicore_sweeps()
+
+# Opt-in O3PipeView capture for Konata, see pipeview_window in
+# exit_handlers.py. Set to (skip, length) to trace `length` instructions
+# starting `skip` instructions after WORKBEGIN, e.g. (1000000, 100000).
+# Pack and slice the traces with pipeview.py.
+pipeview = None
+# O3 configurations that are traced when pipeview is set
+pipeview_configs = ["base", "very-big"]
+
+# Budgets of every run, see watchdog in exit_handlers.py: a run is stopped
+# after max_seconds of host time or max_ticks simulated ticks (None for no
+# limit), or as soon as its cores stop committing instructions.
+max_seconds = 4 * 3600
+max_ticks = None
+
+# Skip the runs whose results in the output directory are already complete,
+# to rerun only the failed and killed ones of a sweep, see run_status in
+# sweep.py.
+resume = False
+
+for flag_set in flag_sets:
+    # Binary compiled with this flag set, built once and cached per flag set
+    binary = BinaryResource(local_path=build_binary(workload, flag_set))
+    cflags = FLAG_SETS[flag_set]
+
+    for system_name, system_group, system in system_points:
+        # Fields shared by the manifests of all runs on this system
+        run_fields = dict(
+            workload=workload, flag_set=flag_set, cflags=cflags,
+            binary=binary.get_local_path(),
+            system=system_name, system_group=system_group,
+            cores=system.get("cores", 1),
+            branch_pred=system.get("branch_pred"),
+        )
+
+        # In-order CPU configurations, the base one is the "inorder" run
+        for name, group, params in [("inorder", "inorder", inorder_base)] + inorder_points:
+            board_inorder = get_board_inorder(system, **params)
+
+            board_inorder.set_se_binary_workload(
+                binary,
+                arguments=[str(system.get("cores", 1))]
+            )
+
+            config = "inorder" if name == "inorder" else f"inorder-{name}"
+            sim_id = run_id(config, workload, flag_set, system_name)
+            if resume and run_status(run_dir(m5.options.outdir, sim_id)) == "complete":
+                continue
+            manifest_on_start(
+                board_inorder, m5.options.outdir, sim_id,
+                cpu="inorder", config=name, group=group, params=params,
+                area=board_inorder.get_processor().get_area_score(),
+                cache=board_inorder.get_cache_hierarchy().get_params(),
+                memory=board_inorder.get_memory().get_params(),
+                **run_fields,
+            )
+            simulator_inorder = Simulator(
+                board=board_inorder,
+                id=sim_id,
+                on_exit_event=run_handlers(board_inorder, sim_id),
+            )
+            multisim.add_simulator(simulator_inorder)
+
+        # Out-of-order CPU configurations
+        for name, group, params in o3_points:
+            board_o3 = get_board_o3(system, **params)
+            board_o3.set_se_binary_workload(
+                binary,
+                arguments=[str(system.get("cores", 1))]
+            )
+            sim_id = run_id(f"o3-{name}", workload, flag_set, system_name)
+            if resume and run_status(run_dir(m5.options.outdir, sim_id)) == "complete":
+                continue
+            manifest_on_start(
+                board_o3, m5.options.outdir, sim_id,
+                cpu="o3", config=name, group=group, params=params,
+                area=board_o3.get_processor().get_area_score(),
+                cache=board_o3.get_cache_hierarchy().get_params(),
+                memory=board_o3.get_memory().get_params(),
+                **run_fields,
+            )
+            on_exit_event = run_handlers(board_o3, sim_id)
+            if pipeview is not None and name in pipeview_configs:
+                on_exit_event = merge_handlers(on_exit_event, pipeview_window(board_o3, *pipeview))
+            sim_o3 = Simulator(
+                board=board_o3,
+                id=sim_id,
+                on_exit_event=on_exit_event,
+            )
+            multisim.add_simulator(sim_o3)
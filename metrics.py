@@ -0,0 +1,321 @@
+#!/usr/bin/env python3
+"""
+metrics.py
+
+Derived metrics: columns computed from the stats of a table of runs (a CSV
+of parse_stats.py, the runs of a results store), instead of recomputing
+speedups and MPKIs by hand in a spreadsheet. A metric is an expression over
+stat names, evaluated on whole columns at once:
+
+  {STAT}               the stat column STAT, e.g. {simSeconds}
+  {PATTERN}            the sum of the stats matching a shell wildcard
+                       pattern, e.g. {board.cache_hierarchy.l1dcaches*.overallMisses::total}
+  {mean:PATTERN}       their mean (and {sum:PATTERN}, like parse_stats.py)
+  {METRIC}             another metric, e.g. {ipc}
+  baseline(X)          X of the baseline run of each run: the run of the
+                       baseline configuration (default "inorder", e.g.
+                       "o3-base") with the same workload, flag set and system
+  coalesce(X, Y)       X, or Y where X is missing
+  log, exp, sqrt, abs, where   the numpy functions
+
+and + - * / ** and numbers. The built-in metrics are in METRICS:
+
+  ipc, cpi             instructions per cycle of the cores (mean) and cycles
+                       per instruction
+  speedup              simSeconds of the baseline run over simSeconds
+  ipc_norm, cpi_norm   IPC and CPI normalized to the baseline run
+  l1d_mpki, l1i_mpki, l2_mpki
+                       misses per 1000 instructions of the L1 data, L1
+                       instruction and L2 caches (of all cores); the misses
+                       are computed from the miss latencies where a table has
+                       no miss counts, as the results-* CSVs
+  l1d_misses, ...      the misses of each level
+
+Summaries across workloads: geomean(df, "speedup") is the geometric mean of
+a metric per configuration over the workloads, where a configuration is a
+run id without its workload (see configuration_of), so runs on another
+system or flag set (o3-base@l1d-16KiB, o3-base-O3) are kept apart.
+
+Usage:
+
+  # The metrics of a CSV, as a new CSV
+  ./metrics.py results-bfs/bfs-all.csv --metrics speedup cpi l1d_mpki \
+    [--baseline o3-base] [--output-csv bfs-metrics.csv]
+
+  # Own metrics, and the geometric mean over the workloads
+  ./metrics.py results-*/*-all.csv --metrics speedup \
+    --define 'l2_share={l2_misses} / ({l1d_misses} + {l1i_misses})' l2_share --geomean speedup
+
+Tables without manifest columns get their workload, flag set and system
+from the run ids (see parse_run_id in sweep.py). parse_stats.py --metrics
+and query.py use the same metrics.
+"""
+
+import argparse
+import fnmatch
+import glob
+import re
+
+import numpy as np
+import pandas as pd
+
+from sweep import parse_run_id, run_id
+
+BASELINE = "inorder"
+
+TOKEN_RE = re.compile(r"\{([^{}]+)\}")
+
+CACHES = {
+    "l1d": "board.cache_hierarchy.l1dcaches*",
+    "l1i": "board.cache_hierarchy.l1icaches*",
+    "l2": "board.cache_hierarchy.l2cache*",
+}
+
+METRICS = {
+    "ipc": "{mean:board.processor.cores*.core.ipc}",
+    "cpi": "1 / {ipc}",
+    "speedup": "baseline({simSeconds}) / {simSeconds}",
+    "ipc_norm": "{ipc} / baseline({ipc})",
+    "cpi_norm": "{cpi} / baseline({cpi})",
+}
+for _level, _caches in CACHES.items():
+    METRICS[f"{_level}_misses"] = (
+        f"coalesce({{{_caches}.overallMisses::total}}, "
+        f"{{{_caches}.overallMissLatency::total}} / {{{_caches}.overallAvgMissLatency::total}})"
+    )
+    METRICS[f"{_level}_mpki"] = f"1000 * {{{_level}_misses}} / {{simInsts}}"
+
+FUNCTIONS = {
+    "log": np.log,
+    "exp": np.exp,
+    "sqrt": np.sqrt,
+    "abs": np.abs,
+    "where": np.where,
+}
+
+
+def parse_definitions(definitions):
+    """
+    parse_definitions reads NAME=EXPRESSION metric definitions.
+
+    :return: a dict name -> expression.
+    """
+    out = {}
+    for text in definitions or []:
+        name, sep, expr = text.partition("=")
+        if not sep or not name.strip().isidentifier():
+            raise ValueError(f"bad metric {text!r}, expected NAME=EXPRESSION")
+        out[name.strip()] = expr.strip()
+    return out
+
+
+def run_fields(df):
+    """
+    run_fields returns the workload, flag_set and system of every run of df,
+    from its columns, or from the run ids where it has none.
+    """
+    recovered = pd.DataFrame(
+        [parse_run_id(run) for run in df.index], index=df.index
+    )[["workload", "flag_set", "system"]]
+    fields = df.reindex(columns=recovered.columns)
+    return fields.combine_first(recovered)
+
+
+def configuration_of(run, workload, flag_set):
+    """
+    configuration_of removes the workload from a run id, e.g.
+    "o3-base@l2-1MiB-bfs-O3" -> "o3-base@l2-1MiB-O3".
+    """
+    suffix = ""
+    if isinstance(flag_set, str) and run.endswith(f"-{flag_set}"):
+        suffix = f"-{flag_set}"
+        run = run[:-len(suffix)]
+    if run.endswith(f"-{workload}"):
+        run = run[:-len(workload) - 1]
+    return run + suffix
+
+
+def configurations(df):
+    """
+    configurations returns the configuration of every run of df (see
+    configuration_of).
+    """
+    fields = run_fields(df)
+    return pd.Series(
+        [configuration_of(run, workload, flag_set)
+         for run, workload, flag_set in zip(df.index, fields["workload"], fields["flag_set"])],
+        index=df.index,
+    )
+
+
+def baseline_ids(df, baseline=BASELINE):
+    """
+    baseline_ids returns the id of the baseline run of every run of df,
+    e.g. "inorder-bfs" for "o3-width-08-bfs".
+    """
+    fields = run_fields(df)
+    return [
+        run_id(baseline, workload, flag_set if isinstance(flag_set, str) else None,
+               system if isinstance(system, str) else "default")
+        for workload, flag_set, system in zip(fields["workload"], fields["flag_set"], fields["system"])
+    ]
+
+
+def _column(df, token):
+    # The column of a {token} that is not a metric
+    if token in df.columns:
+        return df[token].astype(np.float64)
+    op, _, pattern = token.partition(":")
+    if op not in ("sum", "mean"):
+        op, pattern = "sum", token
+    regex = re.compile(fnmatch.translate(pattern))
+    matches = [col for col in df.columns if regex.match(col)]
+    if not matches:
+        return pd.Series(np.nan, index=df.index)
+    values = df[matches].astype(np.float64)
+    return values.sum(axis=1, min_count=1) if op == "sum" else values.mean(axis=1)
+
+
+def evaluate(df, expr, baseline=BASELINE, metrics=None, _seen=()):
+    """
+    evaluate computes an expression (see the module docstring) for every
+    run of df.
+
+    :param baseline: configuration of the baseline runs of baseline().
+    :param metrics: the metrics {METRIC} may refer to (default: METRICS).
+    :return: a float Series indexed like df.
+    """
+    metrics = METRICS if metrics is None else metrics
+    base_ids = []
+    namespace = dict(FUNCTIONS)
+
+    def resolve(match):
+        token = match.group(1).strip()
+        if token in metrics:
+            if token in _seen:
+                raise ValueError(f"metric {token!r} refers to itself")
+            value = evaluate(df, metrics[token], baseline, metrics, _seen + (token,))
+        else:
+            value = _column(df, token)
+        name = f"_v{len(namespace)}"
+        namespace[name] = value
+        return name
+
+    def baseline_of(values):
+        if not base_ids:
+            base_ids.extend(baseline_ids(df, baseline))
+        values = pd.Series(values, index=df.index)
+        return pd.Series(values.reindex(base_ids).to_numpy(), index=df.index)
+
+    namespace["baseline"] = baseline_of
+    namespace["coalesce"] = lambda a, b: pd.Series(a, index=df.index).fillna(pd.Series(b, index=df.index))
+    code = TOKEN_RE.sub(resolve, expr)
+    try:
+        with np.errstate(divide="ignore", invalid="ignore"):
+            value = eval(code, {"__builtins__": {}}, namespace)
+    except Exception as e:
+        raise ValueError(f"cannot evaluate {expr!r}: {e}") from None
+    if np.isscalar(value):
+        return pd.Series(float(value), index=df.index)
+    return pd.Series(value, index=df.index, dtype=np.float64).replace([np.inf, -np.inf], np.nan)
+
+
+def add_metrics(df, names, baseline=BASELINE, metrics=None, all_runs=None):
+    """
+    add_metrics adds the metrics among names as columns of df. Names that
+    are not metrics are left alone.
+
+    :param all_runs: the table the baseline runs are looked up in, e.g. all
+        runs of a store when df is a selection of them (default: df).
+    """
+    metrics = METRICS if metrics is None else metrics
+    names = [name for name in names if name in metrics]
+    if not names:
+        return df
+    table = df if all_runs is None else all_runs
+    df = df.copy()
+    for name in names:
+        df[name] = evaluate(table, metrics[name], baseline, metrics).reindex(df.index)
+    return df
+
+
+def stats_of(names, metrics=None):
+    """
+    stats_of lists the stats (names and patterns) the metrics among names
+    use, e.g. to pass them to parse_stats.py.
+    """
+    metrics = METRICS if metrics is None else metrics
+    stats, todo, seen = [], list(names), set()
+    while todo:
+        name = todo.pop(0)
+        if name in seen or name not in metrics:
+            continue
+        seen.add(name)
+        for token in TOKEN_RE.findall(metrics[name]):
+            token = token.strip()
+            if token in metrics:
+                todo.append(token)
+            elif token not in stats:
+                stats.append(token)
+    return stats
+
+
+def geomean(df, column, by="configuration", across="workload", complete=True):
+    """
+    geomean returns the geometric mean of column per value of by (e.g. per
+    configuration) over the values of across (e.g. the workloads).
+
+    :param complete: only keep the values of by that have a positive value
+        for every value of across, so every mean covers the same workloads.
+    :return: a Series indexed by the values of by.
+    """
+    table = df.pivot_table(index=by, columns=across, values=column, aggfunc="mean")
+    table = table.where(table > 0)
+    if complete:
+        table = table.dropna()
+    return np.exp(np.log(table).mean(axis=1)).rename(f"geomean {column}")
+
+
+def main():
+    p = argparse.ArgumentParser(
+        description="Derived metrics of tables of runs"
+    )
+    p.add_argument("csv", nargs="+", help="CSVs written by parse_stats.py or exported from a store")
+    p.add_argument("--metrics", nargs="+", default=[], help="Metrics to compute (default: all built-in)")
+    p.add_argument("--define", nargs="+", default=[], metavar="NAME=EXPRESSION",
+                   help="Define metrics, e.g. 'l1_mpki={l1d_mpki} + {l1i_mpki}'")
+    p.add_argument("--baseline", default=BASELINE,
+                   help=f"Configuration of the baseline runs, e.g. o3-base (default: {BASELINE})")
+    p.add_argument("--geomean", nargs="+", default=[], metavar="METRIC",
+                   help="Print the geometric mean of these metrics per configuration over the workloads")
+    p.add_argument("--output-csv", default=None, help="Write the runs with their metrics to this CSV file")
+    args = p.parse_args()
+
+    metrics = dict(METRICS, **parse_definitions(args.define))
+    names = args.metrics or list(metrics)
+    unknown = [name for name in names + args.geomean if name not in metrics]
+    if unknown:
+        p.error(f"unknown metrics: {', '.join(unknown)}")
+
+    paths = [path for pattern in args.csv for path in sorted(glob.glob(pattern)) or [pattern]]
+    df = pd.concat([pd.read_csv(path, index_col=0) for path in paths], sort=False)
+    df = df[~df.index.duplicated(keep="last")]
+    df.index.name = "Run"
+    out = add_metrics(df, list(dict.fromkeys(names + args.geomean)), args.baseline, metrics)
+
+    with pd.option_context("display.width", 200, "display.max_rows", 500, "display.max_columns", 50):
+        print(out[names])
+    if args.geomean:
+        out["configuration"] = configurations(out)
+        out["workload"] = run_fields(out)["workload"]
+    for name in args.geomean:
+        means = geomean(out, name)
+        print(f"\nGeometric mean of {name} over {out['workload'].nunique()} workloads:\n")
+        print(means.sort_values(ascending=False).to_string())
+    if args.output_csv:
+        out.to_csv(args.output_csv)
+        print(f"✓ Saved {len(out)} runs with their metrics to '{args.output_csv}'")
+
+
+if __name__ == '__main__':
+    main()
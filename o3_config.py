@@ -0,0 +1,195 @@
+"""
+o3_config.py
+
+The full parameter set of OutOfOrderCPU beyond the nine sweep parameters of
+sweep.base: per-stage widths, stage-to-stage delays, cache ports, the
+functional unit pool, the squash width and the store set predictor tables.
+
+An O3 configuration is a params dict like sweep.base, with any of the
+optional keys below. resolve_o3_params fills in the defaults and
+validate_o3_params checks that gem5 accepts the combination, so a bad design
+point fails when the sweep is built instead of inside a simulator process.
+
+This module does not import gem5, it is used by components/processors.py and
+by sweep.py.
+"""
+
+# Widths of the seven pipeline stages. Each one defaults to "width".
+STAGE_WIDTHS = [
+    "fetch_width",
+    "decode_width",
+    "rename_width",
+    "dispatch_width",
+    "issue_width",
+    "wb_width",
+    "commit_width",
+]
+
+# gem5's O3 CPU supports at most 12 instructions per stage and cycle
+MAX_WIDTH = 12
+
+# Stage-to-stage delays in cycles (BaseO3CPU defaults). All of them go
+# through time buffers, whose sizes (backComSize/forwardComSize) are grown to
+# the largest delay.
+DEFAULT_DELAYS = {
+    "decodeToFetchDelay": 1,
+    "renameToFetchDelay": 1,
+    "iewToFetchDelay": 1,
+    "commitToFetchDelay": 1,
+    "renameToDecodeDelay": 1,
+    "iewToDecodeDelay": 1,
+    "commitToDecodeDelay": 1,
+    "fetchToDecodeDelay": 1,
+    "iewToRenameDelay": 1,
+    "commitToRenameDelay": 1,
+    "decodeToRenameDelay": 1,
+    "commitToIEWDelay": 1,
+    "renameToIEWDelay": 2,
+    "issueToExecuteDelay": 1,
+    "iewToCommitDelay": 1,
+    "renameToROBDelay": 1,
+}
+
+# Default size of the time buffers, BaseO3CPU backComSize and forwardComSize
+DEFAULT_COM_SIZE = 5
+
+# Functional units of the pool and their counts in gem5's DefaultFUPool. The
+# RISC-V vector instructions execute on the SIMD units, loads and stores on
+# the read, write and read/write ports.
+DEFAULT_FU_POOL = {
+    "int_alu": 6,
+    "int_mult_div": 2,
+    "fp_alu": 4,
+    "fp_mult_div": 2,
+    "simd": 4,
+    "pred_alu": 1,
+    "read_port": 0,
+    "write_port": 0,
+    "rdwr_port": 4,
+    "ipr_port": 1,
+}
+
+# The optional parameters and their defaults (BaseO3CPU defaults). The
+# default cache ports are effectively unlimited, the memory ports of the FU
+# pool limit the loads and stores issued per cycle.
+OPTIONAL_DEFAULTS = {
+    "squash_width": 8,
+    "cache_load_ports": 200,
+    "cache_store_ports": 200,
+    "lfst_size": 1024,
+    "ssit_size": 1024,
+    "delays": {},
+    "fu_pool": {},
+}
+
+# The nine parameters every O3 configuration has, see sweep.base
+REQUIRED = [
+    "width",
+    "rob_size",
+    "num_int_regs",
+    "num_fp_regs",
+    "fetchB_size",
+    "fetchQ_size",
+    "instructionQ_size",
+    "loadQ_size",
+    "storeQ_size",
+]
+
+# Architectural registers of RV64, the minimum number of physical registers
+ARCH_INT_REGS = 32
+ARCH_FP_REGS = 32
+
+# Largest fetch buffer, the cache line size of the cache hierarchy
+CACHE_LINE_SIZE = 64
+
+
+def _power_of_two(n):
+    return isinstance(n, int) and n > 0 and n & (n - 1) == 0
+
+
+def resolve_o3_params(params):
+    """
+    resolve_o3_params returns the complete configuration: every stage width
+    (defaulting to "width"), all delays, the full FU pool and the other
+    optional parameters, with the values of params taking precedence.
+
+    :param params: O3 params dict, e.g. sweep.base plus optional keys.
+    :return: a new dict.
+    """
+    resolved = dict(OPTIONAL_DEFAULTS)
+    resolved.update(params)
+    for key in STAGE_WIDTHS:
+        if resolved.get(key) is None:
+            resolved[key] = resolved["width"]
+    resolved["delays"] = dict(DEFAULT_DELAYS, **(params.get("delays") or {}))
+    resolved["fu_pool"] = dict(DEFAULT_FU_POOL, **(params.get("fu_pool") or {}))
+    return resolved
+
+
+def o3_param_errors(params):
+    """
+    o3_param_errors lists what gem5 would reject in a configuration.
+
+    :return: a list of messages, empty if the configuration is legal.
+    """
+    missing = [key for key in REQUIRED if key not in params]
+    if missing:
+        return [f"missing parameters: {', '.join(missing)}"]
+    unknown = set(params) - set(REQUIRED) - set(STAGE_WIDTHS) - set(OPTIONAL_DEFAULTS)
+    # branch_pred is passed along to the core with the other parameters
+    unknown.discard("branch_pred")
+    errors = [f"unknown parameter {key!r}" for key in sorted(unknown)]
+
+    p = resolve_o3_params(params)
+    # Stage widths left out are the width, which is checked once
+    for key in ["width"] + [key for key in STAGE_WIDTHS if params.get(key) is not None]:
+        if not 1 <= p[key] <= MAX_WIDTH:
+            errors.append(f"{key}={p[key]} is outside 1..{MAX_WIDTH}")
+    if p["squash_width"] < 1:
+        errors.append(f"squash_width={p['squash_width']} must be at least 1")
+    if p["num_int_regs"] < ARCH_INT_REGS:
+        errors.append(f"num_int_regs={p['num_int_regs']} is below the {ARCH_INT_REGS} architectural registers")
+    if p["num_fp_regs"] < ARCH_FP_REGS:
+        errors.append(f"num_fp_regs={p['num_fp_regs']} is below the {ARCH_FP_REGS} architectural registers")
+    for key in ["rob_size", "fetchQ_size", "instructionQ_size", "loadQ_size", "storeQ_size"]:
+        if p[key] < 1:
+            errors.append(f"{key}={p[key]} must be at least 1")
+    if p["rob_size"] < p["commit_width"]:
+        errors.append(f"rob_size={p['rob_size']} is smaller than commit_width={p['commit_width']}")
+    if not _power_of_two(p["fetchB_size"]) or p["fetchB_size"] > CACHE_LINE_SIZE:
+        errors.append(f"fetchB_size={p['fetchB_size']} must be a power of two up to the {CACHE_LINE_SIZE}B cache line")
+    for key in ["lfst_size", "ssit_size"]:
+        if not _power_of_two(p[key]):
+            errors.append(f"{key}={p[key]} must be a power of two")
+    for key in ["cache_load_ports", "cache_store_ports"]:
+        if p[key] < 1:
+            errors.append(f"{key}={p[key]} must be at least 1")
+
+    for name, delay in p["delays"].items():
+        if name not in DEFAULT_DELAYS:
+            errors.append(f"unknown delay {name!r}")
+        elif not isinstance(delay, int) or delay < 1:
+            errors.append(f"{name}={delay} must be a positive number of cycles")
+
+    for name, count in p["fu_pool"].items():
+        if name not in DEFAULT_FU_POOL:
+            errors.append(f"unknown functional unit {name!r}")
+        elif not isinstance(count, int) or count < 0:
+            errors.append(f"fu_pool {name}={count} must be a count >= 0")
+    fu = p["fu_pool"]
+    for name in ["int_alu", "int_mult_div", "fp_alu", "fp_mult_div", "simd"]:
+        if fu.get(name) == 0:
+            errors.append(f"fu_pool needs at least one {name}, its instructions could never issue")
+    if fu.get("rdwr_port", 0) == 0 and (fu.get("read_port", 0) == 0 or fu.get("write_port", 0) == 0):
+        errors.append("fu_pool needs a rdwr_port, or a read_port and a write_port, for loads and stores")
+    return errors
+
+
+def validate_o3_params(params):
+    """
+    validate_o3_params raises ValueError listing every problem of an O3
+    configuration (see o3_param_errors).
+    """
+    errors = o3_param_errors(params)
+    if errors:
+        raise ValueError("illegal O3 configuration: " + "; ".join(errors))
@@ -25,49 +25,108 @@ Options:
   --save-plots   If set, saves plots instead of displaying them
   --plots-dir    Directory under which to save PNGs (default: plots)
   --output-csv   Path to write the collected statistics CSV (default: collected_stats.csv)
+  --manifest     Add the fields of each run's manifest.json (workload, config,
+                 group, flag_set, params.*) as columns, so runs can be joined
+                 on e.g. the compiler flag set
+  --archive      Read the runs from an archive packed by archive.py instead of
+                 from --base-dir, without unpacking it
+  --allow-partial
+                 Also read runs that failed, were stopped by the watchdog
+                 (see exit_handlers.py) or whose stats.txt is truncated (a
+                 run killed while dumping), skipped with a warning by
+                 default, see run_status in sweep.py
+  --metrics      Add derived metrics (speedup, cpi, l1d_mpki, ..., see
+                 metrics.py) as columns, reading the stats they need; the
+                 baseline runs of speedups must be among the runs
+  --baseline     Configuration of the baseline runs of the metrics, e.g.
+                 o3-base (default: inorder)
+
+Stat names may contain shell wildcards, e.g. board.memory.mem_ctrl*.dram.avgRdBW
+(gem5 numbers the memory controllers only when there are several channels);
+every matching stat becomes a column. With a "sum:" or "mean:" prefix the
+matches are folded into one column named after the pattern, e.g.
+sum:board.memory.mem_ctrl*.dram.avgRdBW for the total read bandwidth.
 """
 
 import os
 import re
+import fnmatch
+import math
 import argparse
 import pandas as pd
 import matplotlib.pyplot as plt
 
+import archive
+import metrics
+from sweep import parse_run_id, read_manifest, run_status
+
 STAT_LINE_RE = re.compile(
     r'^(?P<name>\S+)\s+'
     r'(?P<value>[+-]?\d+(?:\.\d*)?(?:[eE][+-]?\d+)?|nan)'
     r'(?:\s+#.*)?$'
 )
 
-def parse_stats_file(path, wanted_stats):
+AGGREGATES = {
+    'sum': sum,
+    'mean': lambda vals: sum(vals) / len(vals),
+}
+
+def split_stats(wanted_stats):
+    exact, patterns = set(), []
+    for stat in wanted_stats:
+        op, _, pattern = stat.partition(':')
+        if op not in AGGREGATES:
+            op, pattern = None, stat
+        if op is None and not any(c in pattern for c in '*?['):
+            exact.add(stat)
+        else:
+            patterns.append((stat, op, re.compile(fnmatch.translate(pattern))))
+    return exact, patterns
+
+def parse_stats_lines(lines, wanted_stats):
+    exact, patterns = split_stats(wanted_stats)
     results = {}
+    matches = {}
     seen = False
-    with open(path) as f:
-        for raw in f:
-            line = raw.strip()
-            if not line:
+    for raw in lines:
+        line = raw.strip()
+        if not line:
+            continue
+        if line.startswith('----') and 'Begin Simulation Statistics' in line:
+            if not seen:
+                seen = True
                 continue
-            if line.startswith('----') and 'Begin Simulation Statistics' in line:
-                if not seen:
-                    seen = True
-                    continue
+            else:
+                break
+        if not seen or line.startswith('#'):
+            continue
+        m = STAT_LINE_RE.match(line)
+        if not m:
+            continue
+        name = m.group('name')
+        valstr = m.group('value')
+        try:
+            val = float(valstr)
+        except ValueError:
+            val = float('nan')
+        if name in exact:
+            results[name] = val
+        for stat, op, regex in patterns:
+            if regex.match(name):
+                if op is None:
+                    results[name] = val
                 else:
-                    break
-            if not seen or line.startswith('#'):
-                continue
-            m = STAT_LINE_RE.match(line)
-            if not m:
-                continue
-            name = m.group('name')
-            valstr = m.group('value')
-            try:
-                val = float(valstr)
-            except ValueError:
-                val = float('nan')
-            if name in wanted_stats:
-                results[name] = val
+                    matches.setdefault(stat, []).append(val)
+    for stat, op, _ in patterns:
+        vals = [v for v in matches.get(stat, []) if not math.isnan(v)]
+        if vals:
+            results[stat] = AGGREGATES[op](vals)
     return results
 
+def parse_stats_file(path, wanted_stats):
+    with open(path) as f:
+        return parse_stats_lines(f, wanted_stats)
+
 def load_list_from_file(path):
     items = []
     with open(path) as f:
@@ -78,6 +137,25 @@ def load_list_from_file(path):
             items.append(line)
     return items
 
+def flatten(d, prefix=''):
+    flat = {}
+    for key, val in d.items():
+        if isinstance(val, dict):
+            flat.update(flatten(val, f"{prefix}{key}."))
+        else:
+            flat[f"{prefix}{key}"] = val
+    return flat
+
+def load_run_fields(run_path, run, archive_conn=None):
+    if archive_conn is not None:
+        manifest = archive.read_manifest(archive_conn, run)
+    else:
+        manifest = read_manifest(run_path)
+    if manifest is None:
+        manifest = parse_run_id(run)
+    manifest.pop('id', None)
+    return flatten(manifest)
+
 def main():
     p = argparse.ArgumentParser(
         description="Extract & plot gem5 stats from multiple runs"
@@ -89,9 +167,9 @@ def main():
                             help="Run names (subfolder names under base-dir)")
     runs_group.add_argument('--runs-file', metavar='FILE',
                             help="Text file with one run name per line")
-    stats_group = p.add_mutually_exclusive_group(required=True)
+    stats_group = p.add_mutually_exclusive_group()
     stats_group.add_argument('--stats', nargs='+',
-                             help="Stat names to extract (exactly as in stats.txt)")
+                             help="Stat names to extract (exactly as in stats.txt, or wildcard patterns)")
     stats_group.add_argument('--stats-file', metavar='FILE',
                              help="Text file with one stat name per line")
     p.add_argument('--save-plots', action='store_true',
@@ -100,23 +178,66 @@ def main():
                    help="Directory under which to save PNGs (default: plots)")
     p.add_argument('--output-csv', default='collected_stats.csv',
                    help="Write collected statistics to this CSV file (default: collected_stats.csv)")
+    p.add_argument('--manifest', action='store_true',
+                   help="Add the run manifest fields as columns (recovered from the run name if there is no manifest.json)")
+    p.add_argument('--archive', metavar='FILE',
+                   help="Read the runs from an archive written by archive.py instead of base-dir")
+    p.add_argument('--allow-partial', action='store_true',
+                   help="Read failed and stopped runs and truncated stats.txt files instead of skipping them")
+    p.add_argument('--metrics', nargs='+', default=[],
+                   help="Derived metrics to add as columns (see metrics.py), e.g. speedup cpi l1d_mpki")
+    p.add_argument('--baseline', default=metrics.BASELINE,
+                   help=f"Configuration of the baseline runs of the metrics (default: {metrics.BASELINE})")
     args = p.parse_args()
+    if not (args.stats or args.stats_file or args.metrics):
+        p.error("one of the arguments --stats --stats-file --metrics is required")
+    unknown = [name for name in args.metrics if name not in metrics.METRICS]
+    if unknown:
+        p.error(f"unknown metrics: {', '.join(unknown)}")
 
     runs  = load_list_from_file(args.runs_file) if args.runs_file else args.runs
-    stats = load_list_from_file(args.stats_file) if args.stats_file else args.stats
+    stats = load_list_from_file(args.stats_file) if args.stats_file else list(args.stats or [])
+    stats += [stat for stat in metrics.stats_of(args.metrics) if stat not in stats]
+
+    archive_conn = None
+    if args.archive:
+        if not os.path.isfile(args.archive):
+            p.error(f"no archive '{args.archive}'")
+        archive_conn = archive.connect(args.archive)
+        archived = archive.list_runs(archive_conn)
 
-    rows, idx = [], []
+    rows, idx, fields, columns = [], [], [], {}
     for run in runs:
-        stats_path = os.path.join(args.base_dir, run, 'stats.txt')
-        if not os.path.isfile(stats_path):
-            print(f"[warning] {stats_path} not found, skipping.")
-            continue
-        data = parse_stats_file(stats_path, stats)
+        if archive_conn is not None:
+            stats_path = f"{args.archive}:{run}/stats.txt"
+            text = archive.read_text(archive_conn, run, 'stats.txt')
+            if text is None:
+                print(f"[warning] {stats_path} not found, skipping.")
+                continue
+            state = archived[run]
+        else:
+            stats_path = os.path.join(args.base_dir, run, 'stats.txt')
+            if not os.path.isfile(stats_path):
+                print(f"[warning] {stats_path} not found, skipping.")
+                continue
+            state = run_status(os.path.join(args.base_dir, run))
+        if state != 'complete':
+            if not args.allow_partial:
+                print(f"[warning] run '{run}' is {state} (see --allow-partial), skipping.")
+                continue
+            print(f"[warning] run '{run}' is {state}, reading it anyway.")
+        if archive_conn is not None:
+            data = parse_stats_lines(text.splitlines(), stats)
+        else:
+            data = parse_stats_file(stats_path, stats)
         if not data:
             print(f"[warning] no requested stats in {stats_path}, skipping.")
             continue
         rows.append(data)
+        columns.update(dict.fromkeys(data))
         idx.append(run)
+        if args.manifest:
+            fields.append(load_run_fields(os.path.join(args.base_dir, run), run, archive_conn))
 
     if not rows:
         print("No data collected; exiting.")
@@ -124,6 +245,11 @@ def main():
 
     df = pd.DataFrame(rows, index=idx)
     df.index.name = 'Run'
+    if args.manifest:
+        df = pd.DataFrame(fields, index=df.index).join(df)
+    if args.metrics:
+        df = metrics.add_metrics(df, args.metrics, args.baseline)
+        columns.update(dict.fromkeys(args.metrics))
     print("\nCollected statistics:\n")
     print(df)
 
@@ -135,9 +261,9 @@ def main():
     if args.save_plots:
         os.makedirs(args.plots_dir, exist_ok=True)
     for stat in stats:
-        if stat not in df.columns:
+        if stat not in columns and not split_stats([stat])[1]:
             print(f"[note] stat '{stat}' missing—skipping plot.")
-            continue
+    for stat in columns:
         plt.figure()
         df[stat].plot(marker='o')
         plt.title(f"{stat} vs. Run")
@@ -147,7 +273,7 @@ def main():
         plt.tight_layout()
 
         if args.save_plots:
-            outname = os.path.join(args.plots_dir, f"{stat}.png")
+            outname = os.path.join(args.plots_dir, re.sub(r'[^\w.:-]', '_', stat) + '.png')
             plt.savefig(outname)
             print(f"→ Saved {stat} plot to '{outname}'")
         else:
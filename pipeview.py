@@ -0,0 +1,273 @@
+#!/usr/bin/env python3
+"""
+pipeview.py
+
+Index O3PipeView traces (captured with exit_handlers.pipeview_window) and cut
+instruction ranges out of them for Konata, without decompressing the whole
+trace.
+
+Usage:
+
+  # Repack a gem5 trace into independently compressed blocks plus an index
+  ./pipeview.py pack m5out/o3-base-bfs/pipeview.trace.gz \
+    [-o m5out/o3-base-bfs/pipeview] [--block-insts 100000] [--codec gzip|zstd]
+
+  # Extract the instructions with sequence numbers in [start, end]
+  ./pipeview.py extract m5out/o3-base-bfs/pipeview \
+    --start 1500000 --end 1510000 [-o konata.trace] [--by-index]
+
+  # Show the blocks of a packed trace
+  ./pipeview.py info m5out/o3-base-bfs/pipeview
+
+A packed trace is two files: <out>.pv.gz (or .pv.zst) which is a sequence of
+compressed blocks that are each a valid gzip member / zstd frame (so the file
+can still be decompressed as a whole with gzip -d or zstd -d), and
+<out>.pv.idx.json which records the byte range, instruction count and the
+sequence number range of every block.
+
+zstd needs the 'zstandard' python package, gzip only needs the standard
+library.
+"""
+
+import argparse
+import gzip
+import io
+import json
+import os
+import sys
+
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
+
+RECORD_START = "O3PipeView:fetch:"
+PREFIX = "O3PipeView:"
+
+CODECS = {
+    "gzip": ".pv.gz",
+    "zstd": ".pv.zst",
+}
+
+
+def _require_zstd():
+    if zstandard is None:
+        raise RuntimeError(
+            "zstd traces need the 'zstandard' package (pip install zstandard)"
+        )
+
+
+def open_trace(path):
+    """
+    open_trace opens a plain, gzip or zstd compressed trace for streaming
+    line by line reading.
+    """
+    if path.endswith(".gz"):
+        return gzip.open(path, "rt")
+    if path.endswith(".zst"):
+        _require_zstd()
+        raw = open(path, "rb")
+        reader = zstandard.ZstdDecompressor().stream_reader(raw, read_across_frames=True)
+        return io.TextIOWrapper(reader)
+    return open(path)
+
+
+def iter_records(lines):
+    """
+    iter_records groups the lines of an O3PipeView trace into one record per
+    dynamic instruction. Each record starts with its fetch line.
+
+    :return: a generator of (seq_num, record_lines) tuples.
+    """
+    seq, record = None, []
+    for line in lines:
+        if not line.startswith(PREFIX):
+            continue
+        if line.startswith(RECORD_START):
+            if record:
+                yield seq, record
+            # O3PipeView:fetch:<tick>:<pc>:<upc>:<seq>:<disasm>
+            seq = int(line.split(":", 6)[5])
+            record = [line]
+        elif record:
+            record.append(line)
+    if record:
+        yield seq, record
+
+
+def _compress(data, codec):
+    if codec == "zstd":
+        return zstandard.ZstdCompressor(level=9).compress(data)
+    return gzip.compress(data, compresslevel=6)
+
+
+def _decompress(data, codec):
+    if codec == "zstd":
+        return zstandard.ZstdDecompressor().decompress(data)
+    return gzip.decompress(data)
+
+
+def pack(trace, out, block_insts=100000, codec="gzip"):
+    """
+    pack streams a trace into independently compressed blocks of
+    `block_insts` instructions and writes the index next to it. Only one
+    block is held in memory at a time.
+
+    :return: the path of the index file.
+    """
+    if codec == "zstd":
+        _require_zstd()
+    data_path = out + CODECS[codec]
+    index_path = out + ".pv.idx.json"
+
+    blocks = []
+    offset = 0
+    count = 0
+    with open_trace(trace) as src, open(data_path, "wb") as dst:
+        buf, seqs = [], []
+
+        def flush():
+            nonlocal offset
+            data = _compress("".join(buf).encode(), codec)
+            dst.write(data)
+            blocks.append({
+                "offset": offset,
+                "length": len(data),
+                "first_index": count - len(seqs),
+                "count": len(seqs),
+                "min_seq": min(seqs),
+                "max_seq": max(seqs),
+            })
+            offset += len(data)
+
+        for seq, record in iter_records(src):
+            buf.extend(record)
+            seqs.append(seq)
+            count += 1
+            if len(seqs) >= block_insts:
+                flush()
+                buf, seqs = [], []
+        if seqs:
+            flush()
+
+    index = {
+        "codec": codec,
+        "data": os.path.basename(data_path),
+        "instructions": count,
+        "blocks": blocks,
+    }
+    with open(index_path, "w") as f:
+        json.dump(index, f, indent=1)
+    return index_path
+
+
+def load_index(packed):
+    """
+    load_index reads <packed>.pv.idx.json.
+
+    :return: the index dict, with "data" resolved to the data file path.
+    """
+    with open(packed + ".pv.idx.json") as f:
+        index = json.load(f)
+    index["data"] = os.path.join(os.path.dirname(packed), index["data"])
+    return index
+
+
+def read_blocks(packed, start, end, by_index=False):
+    """
+    read_blocks yields the records whose sequence number (or position in the
+    trace with by_index) is in [start, end], decompressing only the blocks
+    that overlap the range.
+
+    :return: a generator of (seq_num, record_lines) tuples.
+    """
+    index = load_index(packed)
+    with open(index["data"], "rb") as f:
+        for block in index["blocks"]:
+            if by_index:
+                lo = block["first_index"]
+                hi = lo + block["count"] - 1
+            else:
+                lo, hi = block["min_seq"], block["max_seq"]
+            if hi < start or lo > end:
+                continue
+            f.seek(block["offset"])
+            text = _decompress(f.read(block["length"]), index["codec"]).decode()
+            lines = text.splitlines(keepends=True)
+            for i, (seq, record) in enumerate(iter_records(lines)):
+                key = block["first_index"] + i if by_index else seq
+                if start <= key <= end:
+                    yield seq, record
+
+
+def extract(packed, start, end, out, by_index=False):
+    """
+    extract writes the records in [start, end] as a plain O3PipeView trace
+    that Konata can open.
+
+    :return: the number of extracted instructions.
+    """
+    n = 0
+    with open(out, "w") as dst:
+        for _, record in read_blocks(packed, start, end, by_index):
+            dst.writelines(record)
+            n += 1
+    return n
+
+
+def main():
+    p = argparse.ArgumentParser(
+        description="Index O3PipeView traces and extract instruction ranges for Konata"
+    )
+    sub = p.add_subparsers(dest="command", required=True)
+
+    p_pack = sub.add_parser("pack", help="Repack a trace into indexed compressed blocks")
+    p_pack.add_argument("trace", help="O3PipeView trace (plain, .gz or .zst)")
+    p_pack.add_argument("-o", "--out",
+                        help="Output prefix (default: trace path without extensions)")
+    p_pack.add_argument("--block-insts", type=int, default=100000,
+                        help="Instructions per compressed block (default: 100000)")
+    p_pack.add_argument("--codec", choices=sorted(CODECS), default="gzip",
+                        help="Block compression (default: gzip)")
+
+    p_extract = sub.add_parser("extract", help="Extract an instruction range for Konata")
+    p_extract.add_argument("packed", help="Prefix of a packed trace")
+    p_extract.add_argument("--start", type=int, required=True,
+                           help="First sequence number (or position with --by-index)")
+    p_extract.add_argument("--end", type=int, required=True,
+                           help="Last sequence number (or position with --by-index), inclusive")
+    p_extract.add_argument("--by-index", action="store_true",
+                           help="Select by position in the trace instead of sequence number")
+    p_extract.add_argument("-o", "--out", default="konata.trace",
+                           help="Output trace (default: konata.trace)")
+
+    p_info = sub.add_parser("info", help="Show the blocks of a packed trace")
+    p_info.add_argument("packed", help="Prefix of a packed trace")
+
+    args = p.parse_args()
+
+    if args.command == "pack":
+        out = args.out
+        if out is None:
+            out = args.trace
+            for ext in (".gz", ".zst", ".trace", ".txt", ".out"):
+                if out.endswith(ext):
+                    out = out[: -len(ext)]
+        index_path = pack(args.trace, out, args.block_insts, args.codec)
+        print(f"✓ Packed '{args.trace}' into '{out}{CODECS[args.codec]}' (index '{index_path}')")
+    elif args.command == "extract":
+        n = extract(args.packed, args.start, args.end, args.out, args.by_index)
+        print(f"✓ Extracted {n} instructions to '{args.out}'")
+    elif args.command == "info":
+        index = load_index(args.packed)
+        print(f"{index['data']}: {index['instructions']} instructions, "
+              f"{len(index['blocks'])} blocks, codec {index['codec']}")
+        for i, block in enumerate(index["blocks"]):
+            print(f"  block {i}: insts {block['first_index']}-"
+                  f"{block['first_index'] + block['count'] - 1}, "
+                  f"seq {block['min_seq']}-{block['max_seq']}, "
+                  f"{block['length']} bytes")
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,278 @@
+#!/usr/bin/env python3
+"""
+pipeview_analyze.py
+
+Streaming analysis of O3PipeView traces of OutOfOrderCPUCore: per-stage
+latencies (fetch -> decode -> rename -> dispatch -> issue -> complete ->
+commit), per-PC hot spots and an aggregate breakdown of where instructions
+spend their cycles.
+
+The trace is read once, in chunks of --chunk-insts instructions that are
+aggregated with numpy, so memory use does not grow with the trace size (the
+per-PC table grows with the static code size only).
+
+Usage:
+
+  ./pipeview_analyze.py m5out/o3-base-bfs/pipeview.trace.gz \
+    [--clock-period 1000] [--top 20] [--out-prefix results-bfs/pipeview-base]
+
+  # Packed traces (see pipeview.py) are read block by block
+  ./pipeview_analyze.py m5out/o3-base-bfs/pipeview --packed
+
+  # A small trace with a squashed instruction and a nop that skips the IQ
+  ./pipeview_analyze.py examples/pipeview-nop.trace
+
+Options:
+  --clock-period  Ticks per CPU cycle (default: 1000, i.e. 1GHz with 1ps ticks)
+  --top           Number of PCs shown in the hot-spot table (default: 20)
+  --out-prefix    Write <prefix>-stages.csv and <prefix>-pcs.csv
+  --per-inst-csv  Also write every instruction's stage latencies to this CSV
+"""
+
+import argparse
+import sys
+
+import numpy as np
+import pandas as pd
+
+from pipeview import PREFIX, RECORD_START, open_trace, read_blocks
+
+STAGES = ["fetch", "decode", "rename", "dispatch", "issue", "complete", "retire"]
+STAGE_INDEX = {stage: i for i, stage in enumerate(STAGES)}
+
+# Latency between consecutive stages, named after what the instruction waits
+# for in that interval.
+INTERVALS = [
+    ("fetch->decode", "frontend (fetch queue, decode)"),
+    ("decode->rename", "rename (ROB/IQ/LSQ/register full)"),
+    ("rename->dispatch", "dispatch"),
+    ("dispatch->issue", "issue queue (operands, FU busy)"),
+    ("issue->complete", "execute / memory"),
+    ("complete->retire", "commit (waiting for ROB head)"),
+]
+
+# log2 histogram bins in cycles, used for percentiles
+HIST_BINS = 32
+
+
+def iter_chunks(lines, chunk_insts):
+    """
+    iter_chunks parses O3PipeView lines into chunks of at most `chunk_insts`
+    instructions.
+
+    :return: a generator of (ticks, pcs, disasm) tuples. ticks is an
+    (n, len(STAGES)) int64 array where 0 means the stage was never reached
+    (squashed instruction, or a stage a committed instruction skips), pcs is a uint64 array and disasm maps the pcs of
+    the chunk to their disassembly.
+    """
+    ticks = np.zeros((chunk_insts, len(STAGES)), dtype=np.int64)
+    pcs = np.zeros(chunk_insts, dtype=np.uint64)
+    disasm = {}
+    n = -1
+    for line in lines:
+        if not line.startswith(PREFIX):
+            continue
+        if line.startswith(RECORD_START):
+            n += 1
+            if n == chunk_insts:
+                yield ticks, pcs, disasm
+                ticks = np.zeros_like(ticks)
+                pcs = np.zeros_like(pcs)
+                disasm = {}
+                n = 0
+            # O3PipeView:fetch:<tick>:<pc>:<upc>:<seq>:<disasm>
+            fields = line.rstrip("\n").split(":", 6)
+            ticks[n, 0] = int(fields[2])
+            pc = int(fields[3], 16)
+            pcs[n] = pc
+            if pc not in disasm:
+                disasm[pc] = fields[6].strip()
+        elif n >= 0:
+            # O3PipeView:<stage>:<tick>[:store:<tick>]
+            fields = line.split(":", 3)
+            stage = STAGE_INDEX.get(fields[1])
+            if stage is not None:
+                ticks[n, stage] = int(fields[2])
+    if n >= 0:
+        yield ticks[: n + 1], pcs[: n + 1], disasm
+
+
+class PipeViewStats:
+    """
+    PipeViewStats accumulates the stage latencies of a trace chunk by chunk.
+    """
+    def __init__(self, clock_period):
+        self.clock_period = clock_period
+        self.insts = 0
+        self.squashed = 0
+        n = len(INTERVALS)
+        self.sum = np.zeros(n)
+        self.sumsq = np.zeros(n)
+        self.max = np.zeros(n)
+        self.hist = np.zeros((n, HIST_BINS), dtype=np.int64)
+        self.pcs = None
+        self.disasm = {}
+
+    def add(self, ticks, pcs, disasm):
+        self.insts += len(ticks)
+        committed = ticks[:, -1] > 0
+        self.squashed += int((~committed).sum())
+        ticks, pcs = ticks[committed], pcs[committed]
+        if len(ticks) == 0:
+            return
+
+        # A committed instruction can skip stages (nops and other
+        # instructions that never enter the IQ have no issue and complete
+        # tick): take the tick of the previous stage, so the skipped
+        # intervals are 0 cycles and the next one starts where it left off
+        ticks = np.maximum.accumulate(ticks, axis=1)
+
+        # Cycles between consecutive stages, vectorized over the chunk
+        cycles = np.diff(ticks, axis=1) / self.clock_period
+        self.sum += cycles.sum(axis=0)
+        self.sumsq += (cycles ** 2).sum(axis=0)
+        self.max = np.maximum(self.max, cycles.max(axis=0))
+        bins = np.minimum(
+            np.floor(np.log2(cycles + 1)).astype(np.int64), HIST_BINS - 1
+        )
+        for i in range(len(INTERVALS)):
+            self.hist[i] += np.bincount(bins[:, i], minlength=HIST_BINS)
+
+        # Per-PC totals
+        total = (ticks[:, -1] - ticks[:, 0]) / self.clock_period
+        df = pd.DataFrame(cycles, columns=[name for name, _ in INTERVALS])
+        df["total"] = total
+        df["count"] = 1
+        df["pc"] = pcs
+        chunk = df.groupby("pc").sum()
+        self.pcs = chunk if self.pcs is None else self.pcs.add(chunk, fill_value=0)
+        for pc, text in disasm.items():
+            self.disasm.setdefault(pc, text)
+
+    @property
+    def committed(self):
+        return self.insts - self.squashed
+
+    def _percentile(self, i, q):
+        counts = self.hist[i]
+        target = q * counts.sum()
+        b = int(np.searchsorted(np.cumsum(counts), target))
+        # upper edge of the log2 bin
+        return float(2 ** (b + 1) - 1)
+
+    def stage_table(self):
+        """
+        :return: a DataFrame with one row per stage interval: mean, std, max
+        and approximate p50/p90/p99 in cycles, and the share of the total
+        latency spent in the interval.
+        """
+        n = max(self.committed, 1)
+        mean = self.sum / n
+        std = np.sqrt(np.maximum(self.sumsq / n - mean ** 2, 0))
+        df = pd.DataFrame({
+            "interval": [name for name, _ in INTERVALS],
+            "waiting for": [what for _, what in INTERVALS],
+            "mean": mean,
+            "std": std,
+            "max": self.max,
+            "p50<=": [self._percentile(i, 0.5) for i in range(len(INTERVALS))],
+            "p90<=": [self._percentile(i, 0.9) for i in range(len(INTERVALS))],
+            "p99<=": [self._percentile(i, 0.99) for i in range(len(INTERVALS))],
+            "share": self.sum / max(self.sum.sum(), 1e-12),
+        })
+        return df.set_index("interval")
+
+    def pc_table(self):
+        """
+        :return: a DataFrame with one row per PC: count, mean latency of each
+        stage interval, total cycles and share of all cycles, sorted by total
+        cycles.
+        """
+        if self.pcs is None:
+            return pd.DataFrame()
+        df = self.pcs.copy()
+        for name, _ in INTERVALS:
+            df[name] = df[name] / df["count"]
+        df["share"] = df["total"] / df["total"].sum()
+        df["mean"] = df["total"] / df["count"]
+        df["disasm"] = [self.disasm.get(int(pc), "") for pc in df.index]
+        df.index = [f"0x{int(pc):x}" for pc in df.index]
+        df.index.name = "pc"
+        df["count"] = df["count"].astype(np.int64)
+        cols = ["count", "total", "share", "mean"] + [n for n, _ in INTERVALS] + ["disasm"]
+        return df[cols].sort_values("total", ascending=False)
+
+
+def analyze(lines, clock_period=1000, chunk_insts=200000, per_inst_csv=None):
+    """
+    analyze runs a PipeViewStats over the lines of a trace.
+
+    :return: the PipeViewStats.
+    """
+    stats = PipeViewStats(clock_period)
+    header = True
+    for ticks, pcs, disasm in iter_chunks(lines, chunk_insts):
+        stats.add(ticks, pcs, disasm)
+        if per_inst_csv:
+            df = pd.DataFrame(ticks // clock_period, columns=STAGES)
+            df.insert(0, "pc", [f"0x{int(pc):x}" for pc in pcs])
+            df.to_csv(per_inst_csv, mode="w" if header else "a",
+                      header=header, index=False)
+            header = False
+    return stats
+
+
+def main():
+    p = argparse.ArgumentParser(
+        description="Per-stage latency and stall attribution from O3PipeView traces"
+    )
+    p.add_argument("trace", help="O3PipeView trace (plain, .gz or .zst), or a packed trace prefix with --packed")
+    p.add_argument("--packed", action="store_true",
+                   help="The trace is a prefix packed with pipeview.py")
+    p.add_argument("--clock-period", type=int, default=1000,
+                   help="Ticks per CPU cycle (default: 1000)")
+    p.add_argument("--chunk-insts", type=int, default=200000,
+                   help="Instructions aggregated at once (default: 200000)")
+    p.add_argument("--top", type=int, default=20,
+                   help="Number of PCs in the hot-spot table (default: 20)")
+    p.add_argument("--out-prefix",
+                   help="Write <prefix>-stages.csv and <prefix>-pcs.csv")
+    p.add_argument("--per-inst-csv",
+                   help="Write the stage cycles of every instruction to this CSV")
+    args = p.parse_args()
+
+    if args.packed:
+        lines = (
+            line
+            for _, record in read_blocks(args.trace, 0, sys.maxsize, by_index=True)
+            for line in record
+        )
+        stats = analyze(lines, args.clock_period, args.chunk_insts, args.per_inst_csv)
+    else:
+        with open_trace(args.trace) as f:
+            stats = analyze(f, args.clock_period, args.chunk_insts, args.per_inst_csv)
+
+    if stats.insts == 0:
+        print("No O3PipeView records found; exiting.")
+        return
+
+    stages = stats.stage_table()
+    pcs = stats.pc_table()
+
+    print(f"\n{stats.insts} instructions, {stats.committed} committed, "
+          f"{stats.squashed} squashed ({stats.squashed / stats.insts:.1%})")
+    print("\nStage latencies (cycles):\n")
+    with pd.option_context("display.width", 200, "display.max_columns", None,
+                           "display.precision", 2):
+        print(stages)
+        print(f"\nTop {args.top} PCs by total cycles:\n")
+        print(pcs.head(args.top))
+
+    if args.out_prefix:
+        stages.to_csv(f"{args.out_prefix}-stages.csv")
+        pcs.to_csv(f"{args.out_prefix}-pcs.csv")
+        print(f"✓ Saved '{args.out_prefix}-stages.csv' and '{args.out_prefix}-pcs.csv'")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,343 @@
+#!/usr/bin/env python3
+"""
+query.py
+
+Query the runs of a results store (see results_store.py): filter them by
+manifest fields, add derived metrics, group, pivot and plot, in one command
+instead of hand-made run lists and one parse_stats.py call per sweep group.
+
+Usage:
+
+  # The width sweep of bfs, with the speedup over the in-order run
+  ./query.py results.store --where workload=bfs group=width \
+    --select config params.width board.processor.cores.core.ipc speedup
+
+  # Speedup of every O3 preset on every workload, as a table and a plot
+  ./query.py results.store --where cpu=o3 group=preset \
+    --pivot config workload speedup [--plot bar] [--save-plots --plots-dir plots/query]
+
+  # Speedup over the base O3 configuration, and an own metric
+  ./query.py results.store --where workload=daxpy --baseline o3-base \
+    --define 'l1_mpki={l1d_mpki} + {l1i_mpki}' --select config speedup l1_mpki --sort speedup
+
+  # Mean L1D MPKI per sweep group
+  ./query.py results.store --where cpu=o3 --group-by group --agg mean --select l1d_mpki
+
+  Options: [--engine auto|duckdb|polars|pandas] [--sort COLUMN] [--output-csv query.csv]
+
+Filters are FIELD<op>VALUE with op one of = != < <= > >=. With = and !=
+the value may be a comma-separated list and contain shell wildcards, e.g.
+config=width-*,base. Values are compared as numbers when they look like
+numbers. All filters must hold.
+
+Columns are manifest fields (workload, cpu, config, group, params.width,
+...), stats of the store, or the derived metrics of metrics.py (speedup,
+ipc, cpi, l1d_mpki, l2_mpki, ...) and those defined with --define
+NAME=EXPRESSION. Speedups and other baseline() metrics are relative to
+the runs of --baseline (default: the in-order runs), which are looked up
+in the whole store, so a filter may drop them.
+
+Filtering and grouping run on DuckDB or Polars when one of them is
+installed (--engine auto picks the first available), on pandas otherwise;
+the results are the same.
+"""
+
+import argparse
+import fnmatch
+import os
+import re
+
+import pandas as pd
+import matplotlib.pyplot as plt
+
+import metrics
+from results_store import load_store, select_stats
+
+ENGINES = ["duckdb", "polars", "pandas"]
+
+FILTER_RE = re.compile(r"^(?P<field>[^<>=!]+?)(?P<op>==|=|!=|<=|>=|<|>)(?P<value>.*)$")
+
+
+def load(store):
+    """
+    load returns the runs of a store as one DataFrame indexed by run id:
+    the manifest fields, then the stats.
+    """
+    runs, stats = load_store(store)
+    return runs.join(stats)
+
+
+def _number(value):
+    try:
+        return float(value)
+    except ValueError:
+        return None
+
+
+def parse_filters(filters):
+    """
+    parse_filters splits FIELD<op>VALUE filters.
+
+    :return: a list of (field, op, values) tuples. values is a list for =
+        and !=, a number or a string for the comparisons.
+    """
+    parsed = []
+    for text in filters or []:
+        m = FILTER_RE.match(text)
+        if not m:
+            raise ValueError(f"bad filter {text!r}, expected FIELD<op>VALUE")
+        field, op, value = m.group("field").strip(), m.group("op"), m.group("value").strip()
+        op = "=" if op == "==" else op
+        if op in ("=", "!="):
+            values = value.split(",")
+        else:
+            values = _number(value) if _number(value) is not None else value
+        parsed.append((field, op, values))
+    return parsed
+
+
+def _pandas_mask(df, field, op, values):
+    column = df[field]
+    if op in ("=", "!="):
+        mask = pd.Series(False, index=df.index)
+        for value in values:
+            if any(c in value for c in "*?["):
+                regex = re.compile(fnmatch.translate(value))
+                mask |= column.astype(str).map(lambda v: bool(regex.match(v)))
+            elif _number(value) is not None and pd.api.types.is_numeric_dtype(column):
+                mask |= column == _number(value)
+            else:
+                mask |= column.astype(str) == value
+        return ~mask if op == "!=" else mask
+    return {
+        "<": column < values, "<=": column <= values,
+        ">": column > values, ">=": column >= values,
+    }[op].fillna(False)
+
+
+def _sql_condition(df, field, op, values):
+    # One condition of a DuckDB WHERE clause, with its parameters
+    quoted = '"' + field.replace('"', '""') + '"'
+    if op not in ("=", "!="):
+        return f"{quoted} {op} ?", [values]
+    terms, params = [], []
+    numeric = pd.api.types.is_numeric_dtype(df[field])
+    for value in values:
+        if any(c in value for c in "*?["):
+            terms.append(f"CAST({quoted} AS VARCHAR) GLOB ?")
+            params.append(value)
+        elif numeric and _number(value) is not None:
+            terms.append(f"{quoted} = ?")
+            params.append(_number(value))
+        else:
+            terms.append(f"CAST({quoted} AS VARCHAR) = ?")
+            params.append(value)
+    condition = "(" + " OR ".join(terms) + ")"
+    return (f"NOT COALESCE({condition}, FALSE)" if op == "!=" else condition), params
+
+
+def _polars_expr(df, field, op, values):
+    import polars as pl
+    column = pl.col(field)
+    if op not in ("=", "!="):
+        return {"<": column < values, "<=": column <= values,
+                ">": column > values, ">=": column >= values}[op]
+    numeric = pd.api.types.is_numeric_dtype(df[field])
+    expr = pl.lit(False)
+    for value in values:
+        if any(c in value for c in "*?["):
+            expr = expr | column.cast(pl.Utf8).str.contains(fnmatch.translate(value).replace(r"\Z", "$"))
+        elif numeric and _number(value) is not None:
+            expr = expr | (column == _number(value))
+        else:
+            expr = expr | (column.cast(pl.Utf8) == value)
+    expr = expr.fill_null(False)
+    return ~expr if op == "!=" else expr
+
+
+def pick_engine(engine="auto"):
+    """
+    pick_engine returns the engine to use: the requested one, or with
+    "auto" the first of DuckDB, Polars and pandas that is installed.
+    """
+    if engine != "auto":
+        return engine
+    for name in ("duckdb", "polars"):
+        try:
+            __import__(name)
+            return name
+        except ImportError:
+            pass
+    return "pandas"
+
+
+def filter_runs(df, filters, engine="pandas"):
+    """
+    filter_runs keeps the runs for which all filters hold.
+
+    :param filters: list of (field, op, values) from parse_filters.
+    :param engine: "duckdb", "polars" or "pandas".
+    """
+    missing = [field for field, _, _ in filters if field not in df.columns]
+    if missing:
+        raise KeyError(f"unknown fields: {', '.join(missing)}")
+    if not filters:
+        return df
+    if engine == "duckdb":
+        import duckdb
+        conditions, params = [], []
+        for field, op, values in filters:
+            condition, condition_params = _sql_condition(df, field, op, values)
+            conditions.append(condition)
+            params += condition_params
+        con = duckdb.connect()
+        con.register("runs", df.reset_index())
+        out = con.execute(
+            "SELECT * FROM runs WHERE " + " AND ".join(conditions), params
+        ).df()
+        return out.set_index(df.index.name or "index").reindex(columns=df.columns)
+    if engine == "polars":
+        import polars as pl
+        frame = pl.from_pandas(df.reset_index())
+        for field, op, values in filters:
+            frame = frame.filter(_polars_expr(df, field, op, values))
+        return frame.to_pandas().set_index(df.index.name or "index").reindex(columns=df.columns)
+    mask = pd.Series(True, index=df.index)
+    for field, op, values in filters:
+        mask &= _pandas_mask(df, field, op, values)
+    return df[mask]
+
+
+def pivot(df, index, columns, values, agg="mean"):
+    return df.pivot_table(index=index, columns=columns, values=values, aggfunc=agg)
+
+
+def group(df, by, columns, agg="mean", engine="pandas"):
+    """
+    group aggregates the numeric columns among columns per value of the
+    fields in by.
+    """
+    numeric = [c for c in columns if c not in by and pd.api.types.is_numeric_dtype(df[c])]
+    if engine == "duckdb":
+        import duckdb
+        func = {"mean": "AVG", "median": "MEDIAN", "min": "MIN", "max": "MAX",
+                "sum": "SUM", "count": "COUNT"}[agg]
+        quote = lambda c: '"' + c.replace('"', '""') + '"'
+        con = duckdb.connect()
+        con.register("runs", df[by + numeric].reset_index(drop=True))
+        sql = (
+            "SELECT " + ", ".join([quote(c) for c in by] + [f"{func}({quote(c)}) AS {quote(c)}" for c in numeric])
+            + " FROM runs GROUP BY " + ", ".join(quote(c) for c in by)
+            + " ORDER BY " + ", ".join(quote(c) for c in by)
+        )
+        return con.execute(sql).df().set_index(by)
+    if engine == "polars":
+        import polars as pl
+        frame = pl.from_pandas(df[by + numeric].reset_index(drop=True))
+        exprs = [getattr(pl.col(c), agg)().alias(c) for c in numeric]
+        return frame.group_by(by).agg(exprs).sort(by).to_pandas().set_index(by)
+    return df.groupby(by)[numeric].agg(agg)
+
+
+def main():
+    p = argparse.ArgumentParser(
+        description="Filter, derive, group and pivot the runs of a results store"
+    )
+    p.add_argument("store", help="Store directory written by results_store.py")
+    p.add_argument("--where", nargs="+", default=[], metavar="FILTER",
+                   help="Filters FIELD<op>VALUE, e.g. workload=bfs params.width>=4")
+    p.add_argument("--select", nargs="+", default=None, metavar="COLUMN",
+                   help="Fields, stats (wildcards allowed) and derived metrics to show")
+    p.add_argument("--group-by", nargs="+", default=None, metavar="FIELD",
+                   help="Aggregate the selected columns per value of these fields")
+    p.add_argument("--agg", default="mean", choices=["mean", "median", "min", "max", "sum", "count"],
+                   help="Aggregation of --group-by and --pivot (default: mean)")
+    p.add_argument("--pivot", nargs=3, metavar=("INDEX", "COLUMNS", "VALUES"),
+                   help="Pivot to a table, e.g. config workload speedup")
+    p.add_argument("--define", nargs="+", default=[], metavar="NAME=EXPRESSION",
+                   help="Define metrics, see metrics.py, e.g. 'l1_mpki={l1d_mpki} + {l1i_mpki}'")
+    p.add_argument("--baseline", default=metrics.BASELINE,
+                   help=f"Configuration of the baseline runs, e.g. o3-base (default: {metrics.BASELINE})")
+    p.add_argument("--sort", default=None, help="Column to sort the rows by")
+    p.add_argument("--engine", default="auto", choices=["auto"] + ENGINES,
+                   help="Engine for filtering and grouping (default: auto)")
+    p.add_argument("--plot", choices=["bar", "line", "heatmap"], default=None,
+                   help="Plot the result (pivot tables and grouped or selected numeric columns)")
+    p.add_argument("--save-plots", action="store_true",
+                   help="Save plots as PNGs instead of displaying them")
+    p.add_argument("--plots-dir", default="plots/query",
+                   help="Directory under which to save PNGs (default: plots/query)")
+    p.add_argument("--output-csv", default=None, help="Write the result to this CSV file")
+    args = p.parse_args()
+
+    engine = pick_engine(args.engine)
+    all_runs = load(args.store)
+    if all_runs.empty:
+        p.error(f"no runs in '{args.store}'")
+
+    wanted = list(args.select or [])
+    if args.pivot:
+        wanted.append(args.pivot[2])
+    # Filters may use derived metrics too
+    wanted += [field for field, _, _ in parse_filters(args.where)]
+    definitions = dict(metrics.METRICS, **metrics.parse_definitions(args.define))
+    derived = [name for name in wanted if name in definitions and name not in all_runs]
+    df = metrics.add_metrics(all_runs, derived, args.baseline, definitions)
+    df = filter_runs(df, parse_filters(args.where), engine)
+    print(f"{len(df)} of {len(all_runs)} runs ({engine})")
+
+    if args.pivot:
+        index, columns, values = args.pivot
+        result = pivot(df, index, columns, values, args.agg)
+        title = f"{args.agg} {values}: {index} x {columns}"
+    else:
+        selected = []
+        for name in args.select or list(all_runs.columns):
+            if name in df.columns or name in derived:
+                selected.append(name)
+            else:
+                matched = list(select_stats(df, [name]).columns)
+                if not matched:
+                    print(f"[warning] no column '{name}' in '{args.store}', skipping.")
+                selected += matched
+        if args.group_by:
+            result = group(df, args.group_by, selected, args.agg, engine)
+            title = f"{args.agg} per {', '.join(args.group_by)}"
+        else:
+            result = df[selected]
+            title = "runs"
+    if args.sort:
+        result = result.sort_values(args.sort)
+
+    with pd.option_context("display.width", 200, "display.max_rows", 500, "display.max_columns", 50):
+        print(result)
+    if args.output_csv:
+        result.to_csv(args.output_csv)
+        print(f"✓ Saved query result to '{args.output_csv}'")
+
+    if args.plot:
+        numeric = result.select_dtypes("number")
+        if numeric.empty:
+            p.error("nothing numeric to plot")
+        if args.plot == "heatmap":
+            fig, ax = plt.subplots(figsize=(max(6, 0.8 * numeric.shape[1]), max(4, 0.35 * numeric.shape[0])))
+            im = ax.imshow(numeric.to_numpy(dtype=float), aspect="auto", cmap="viridis")
+            ax.set_xticks(range(numeric.shape[1]), [str(c) for c in numeric.columns], rotation=45, ha="right")
+            ax.set_yticks(range(numeric.shape[0]), [str(i) for i in numeric.index])
+            fig.colorbar(im, ax=ax)
+        else:
+            style = dict(marker="o") if args.plot == "line" else {}
+            ax = numeric.plot(kind=args.plot, figsize=(10, 6), **style)
+        ax.set_title(title)
+        plt.tight_layout()
+        if args.save_plots:
+            os.makedirs(args.plots_dir, exist_ok=True)
+            outname = os.path.join(args.plots_dir, re.sub(r"[^\w.-]+", "_", title) + ".png")
+            plt.savefig(outname)
+            print(f"→ Saved {title} plot to '{outname}'")
+        else:
+            plt.show()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,311 @@
+#!/usr/bin/env python3
+"""
+results_store.py
+
+A columnar store of all the statistics of all runs, for comparing and
+querying results without choosing the stats and the runs up front like
+parse_stats.py does. A store is a directory with two tables, both indexed
+by run id:
+
+  runs    the manifest fields of each run (flattened like parse_stats.py
+          --manifest: workload, config, group, params.width, ...), its
+          state (see run_status in sweep.py) and where it was read from
+  stats   every scalar stat of the first dump of stats.txt (the ROI), one
+          float64 column per stat, NaN where a run does not have the stat
+
+The tables are Parquet files when pyarrow or fastparquet is installed,
+pandas pickles otherwise; either way each stat is a column and every
+operation on the store is a vectorized pandas operation.
+
+Usage:
+
+  # Add runs to a store (replacing runs already in it): run directories,
+  # archives of archive.py, or CSVs written by parse_stats.py
+  ./results_store.py ingest results.store --base-dir m5out [--runs ID ... | --runs-file bfs-runs.txt]
+  ./results_store.py ingest results.store --archive runs.archive
+  ./results_store.py ingest results.store --csv results-*/*-all.csv
+
+  # Runs, stats and workloads in a store
+  ./results_store.py info results.store
+
+  # Some stats of some runs as a CSV, like parse_stats.py --manifest
+  ./results_store.py export results.store --stats simSeconds 'board.processor.cores*.core.ipc' \
+    [--runs ID ...] [--output-csv collected_stats.csv]
+
+Ingesting skips failed, stopped and truncated runs unless --allow-partial
+is given, like parse_stats.py. Runs ingested from CSVs are taken as they
+are, their fields are recovered from the run id when the CSV has no
+manifest columns.
+"""
+
+import argparse
+import fnmatch
+import glob
+import os
+import re
+
+import numpy as np
+import pandas as pd
+
+import archive
+from parse_stats import load_list_from_file, load_run_fields, parse_stats_lines
+from sweep import parse_run_id, run_status
+
+# Top-level keys of the run manifests (see write_manifest in sweep.py and
+# the sweep scripts). CSV columns under them are fields, the others stats.
+FIELD_KEYS = [
+    "workload", "flag_set", "cflags", "binary", "system", "system_group",
+    "cores", "branch_pred", "cpu", "config", "group", "params", "area",
+    "cache", "memory", "policy", "programs",
+]
+
+TABLES = ["runs", "stats"]
+
+
+def _parquet_engine():
+    for module in ("pyarrow", "fastparquet"):
+        try:
+            __import__(module)
+            return module
+        except ImportError:
+            pass
+    return None
+
+
+def _table_path(store, table):
+    for suffix in (".parquet", ".pkl"):
+        path = os.path.join(store, table + suffix)
+        if os.path.isfile(path):
+            return path
+    return None
+
+
+def is_store(path):
+    return os.path.isdir(path) and all(_table_path(path, table) for table in TABLES)
+
+
+def load_store(store):
+    """
+    load_store reads a store.
+
+    :return: (runs, stats) DataFrames indexed by run id, empty if the store
+        does not exist yet.
+    """
+    if not is_store(store):
+        empty = pd.DataFrame(index=pd.Index([], name="Run"))
+        return empty, empty.copy()
+    tables = []
+    for table in TABLES:
+        path = _table_path(store, table)
+        tables.append(pd.read_parquet(path) if path.endswith(".parquet") else pd.read_pickle(path))
+    return tuple(tables)
+
+
+def save_store(store, runs, stats):
+    """
+    save_store writes both tables of a store, replacing the old ones. Each
+    table is written under a temporary name and renamed, so readers see the
+    old or the new version.
+    """
+    os.makedirs(store, exist_ok=True)
+    engine = _parquet_engine()
+    suffix = ".parquet" if engine else ".pkl"
+    for table, df in zip(TABLES, (runs, stats)):
+        path = os.path.join(store, table + suffix)
+        tmp = path + ".tmp"
+        if engine:
+            # Parquet needs one type per column, the fields are mixed
+            if table == "runs":
+                df = df.astype({col: str for col in df.columns if df[col].dtype == object})
+            df.to_parquet(tmp, engine=engine)
+        else:
+            df.to_pickle(tmp)
+        os.replace(tmp, path)
+        # A store written before pyarrow was installed
+        for old in (".parquet", ".pkl"):
+            if old != suffix and os.path.isfile(os.path.join(store, table + old)):
+                os.remove(os.path.join(store, table + old))
+
+
+def _all_stats(lines):
+    # Every scalar stat of the first dump
+    return parse_stats_lines(lines, ["*"])
+
+
+def read_runs(runs, base_dir="m5out", archive_path=None, allow_partial=False):
+    """
+    read_runs parses all stats and the manifests of runs from a base
+    directory or an archive.
+
+    :return: (runs, stats) DataFrames of the runs that were read, and a dict
+        run -> reason of the skipped ones.
+    """
+    conn = archive.connect(archive_path) if archive_path else None
+    archived = archive.list_runs(conn) if conn is not None else {}
+    field_rows, stat_rows, idx, skipped = [], [], [], {}
+    for run in runs:
+        run_path = os.path.join(base_dir, run)
+        if conn is not None:
+            text = archive.read_text(conn, run, "stats.txt")
+            state = archived.get(run, "missing")
+            source = f"{archive_path}:{run}"
+        else:
+            stats_path = os.path.join(run_path, "stats.txt")
+            text = None
+            if os.path.isfile(stats_path):
+                with open(stats_path) as f:
+                    text = f.read()
+            state = run_status(run_path)
+            source = run_path
+        if text is None:
+            skipped[run] = "no stats.txt"
+            continue
+        if state != "complete" and not allow_partial:
+            skipped[run] = state
+            continue
+        stats = _all_stats(text.splitlines())
+        if not stats:
+            skipped[run] = "no stats"
+            continue
+        fields = load_run_fields(run_path, run, conn)
+        fields.update(state=state, source=source)
+        field_rows.append(fields)
+        stat_rows.append(stats)
+        idx.append(run)
+    index = pd.Index(idx, name="Run")
+    return (
+        pd.DataFrame(field_rows, index=index),
+        pd.DataFrame(stat_rows, index=index, dtype=np.float64),
+        skipped,
+    )
+
+
+def is_field(column):
+    return column.split(".")[0] in FIELD_KEYS
+
+
+def read_csv(path):
+    """
+    read_csv splits a CSV of parse_stats.py into fields and stats. Fields
+    missing from the CSV are recovered from the run ids.
+
+    :return: (runs, stats) DataFrames.
+    """
+    df = pd.read_csv(path, index_col=0)
+    df.index.name = "Run"
+    fields = df[[col for col in df.columns if is_field(col)]]
+    recovered = pd.DataFrame(
+        [{k: v for k, v in parse_run_id(run).items() if k != "id"} for run in df.index],
+        index=df.index,
+    )
+    fields = fields.combine_first(recovered)
+    fields = fields.assign(state="complete", source=path)
+    stats = df[[col for col in df.columns if not is_field(col)]].apply(pd.to_numeric, errors="coerce")
+    return fields, stats.astype(np.float64)
+
+
+def merge(old, new):
+    """
+    merge adds the rows of new to old, replacing the runs that are in both.
+    """
+    if old.empty:
+        return new
+    return pd.concat([old.drop(index=new.index, errors="ignore"), new], sort=False)
+
+
+def select_stats(stats, patterns):
+    """
+    select_stats keeps the stat columns matching any of the names or shell
+    wildcard patterns, in the order of the patterns.
+    """
+    if not patterns:
+        return stats
+    columns = []
+    for pattern in patterns:
+        regex = re.compile(fnmatch.translate(pattern))
+        columns += [col for col in stats.columns if regex.match(col) and col not in columns]
+    return stats[columns]
+
+
+def main():
+    p = argparse.ArgumentParser(
+        description="Columnar store of the stats of all runs"
+    )
+    sub = p.add_subparsers(dest="command", required=True)
+
+    p_ingest = sub.add_parser("ingest", help="Add runs to a store")
+    p_ingest.add_argument("store", help="Store directory")
+    source = p_ingest.add_mutually_exclusive_group()
+    source.add_argument("--base-dir", default="m5out",
+                        help="Directory containing subfolders for each run (default: m5out)")
+    source.add_argument("--archive", help="Archive written by archive.py")
+    source.add_argument("--csv", nargs="+", help="CSVs written by parse_stats.py")
+    runs_group = p_ingest.add_mutually_exclusive_group()
+    runs_group.add_argument("--runs", nargs="+", help="Runs to add (default: all)")
+    runs_group.add_argument("--runs-file", metavar="FILE", help="Text file with one run name per line")
+    p_ingest.add_argument("--allow-partial", action="store_true",
+                          help="Also add failed, stopped and truncated runs")
+
+    p_info = sub.add_parser("info", help="Summarize a store")
+    p_info.add_argument("store", help="Store directory")
+
+    p_export = sub.add_parser("export", help="Write some stats of some runs to a CSV")
+    p_export.add_argument("store", help="Store directory")
+    p_export.add_argument("--stats", nargs="+", help="Stat names or wildcard patterns (default: all)")
+    p_export.add_argument("--runs", nargs="+", help="Runs to export (default: all)")
+    p_export.add_argument("--output-csv", default="collected_stats.csv",
+                          help="CSV file to write (default: collected_stats.csv)")
+    args = p.parse_args()
+
+    runs_df, stats_df = load_store(args.store)
+
+    if args.command == "ingest":
+        if args.csv:
+            paths = [path for pattern in args.csv for path in sorted(glob.glob(pattern)) or [pattern]]
+            parts = [read_csv(path) for path in paths]
+            new_runs = pd.concat([part[0] for part in parts], sort=False)
+            new_stats = pd.concat([part[1] for part in parts], sort=False)
+            # A run in several CSVs (e.g. bfs-all.csv and bfs-width.csv) is
+            # kept once
+            new_runs = new_runs[~new_runs.index.duplicated(keep="last")]
+            new_stats = new_stats[~new_stats.index.duplicated(keep="last")]
+        else:
+            if args.runs_file:
+                runs = load_list_from_file(args.runs_file)
+            elif args.runs:
+                runs = args.runs
+            elif args.archive:
+                runs = list(archive.list_runs(archive.connect(args.archive)))
+            else:
+                runs = sorted(
+                    name for name in os.listdir(args.base_dir)
+                    if os.path.isdir(os.path.join(args.base_dir, name))
+                )
+            new_runs, new_stats, skipped = read_runs(runs, args.base_dir, args.archive, args.allow_partial)
+            for run, reason in skipped.items():
+                print(f"[warning] run '{run}': {reason}, skipping.")
+        runs_df = merge(runs_df, new_runs)
+        stats_df = merge(stats_df, new_stats).reindex(runs_df.index)
+        save_store(args.store, runs_df, stats_df)
+        print(f"✓ Added {len(new_runs)} runs to '{args.store}' ({len(runs_df)} runs, {stats_df.shape[1]} stats)")
+
+    elif args.command == "info":
+        print(f"{len(runs_df)} runs, {stats_df.shape[1]} stats, "
+              f"{int(stats_df.notna().sum().sum())} values")
+        for col in ("workload", "cpu", "group", "state"):
+            if col in runs_df:
+                counts = runs_df[col].fillna("-").value_counts().sort_index()
+                print(f"{col}: " + ", ".join(f"{k} {v}" for k, v in counts.items()))
+
+    elif args.command == "export":
+        df = select_stats(stats_df, args.stats)
+        fields = runs_df.drop(columns=["state", "source"], errors="ignore")
+        if args.runs:
+            df, fields = df.reindex(args.runs), fields.reindex(args.runs)
+        out = fields.join(df.dropna(axis=1, how="all"))
+        out.to_csv(args.output_csv)
+        print(f"✓ Saved {len(out)} runs to '{args.output_csv}'")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,346 @@
+#!/usr/bin/env python3
+"""
+sensitivity.py
+
+Rank the O3 knobs (see O3_KNOBS in sweep.py) by how much of the variation of
+IPC and simSeconds they explain, per workload, and report the interactions
+between knobs. Only the runs on one system and flag set are fitted (the
+default system and flag set of each workload, see --system and
+--flag-set), so cache, memory or compiler differences are not counted as
+knob effects.
+
+Usage:
+
+  ./sensitivity.py results-bfs/bfs-all.csv [results-daxpy/daxpy-all.csv ...] \
+    [--responses ipc simSeconds] [--no-interactions] [--system l2-1MiB] [--flag-set O3] \
+    [--output-csv sensitivity.csv] [--save-plots --plots-dir plots/sensitivity]
+
+The input CSVs are written by parse_stats.py. The knob values of each run come
+from the params.* manifest columns (parse_stats.py --manifest), or from the
+configuration name for runs of o3_sweeps / factorial o3_design.
+
+For every workload and response a linear model of log(response) over the
+standardized log2 knob values is fitted, with the two-knob interactions that
+the design can tell apart from the main effects: a pair of knobs must be
+away from their base values together in at least MIN_JOINT_POINTS runs
+outside the presets (very-big, very-small). One-dimensional sweeps cannot
+estimate any, o3_design("fractional") or "random" can; the pairs left out
+are reported as confounded. Per term:
+
+  effect        change of log(response) per one standard deviation of the
+                knob(s), e.g. 0.1 is about +10%
+  first_order   share of the variance explained by the knob alone
+  total         share of the variance lost when the knob and all its
+                interactions are removed from the model (ANOVA drop-one, the
+                regression analogue of a Sobol total index)
+
+Models are fitted with numpy least squares over the whole results table, so
+thousands of runs take well under a second.
+"""
+
+import argparse
+import itertools
+import os
+
+import numpy as np
+import pandas as pd
+import matplotlib.pyplot as plt
+
+from o3_config import REQUIRED
+from sweep import (
+    DEFAULT_FLAG_SET,
+    DEFAULT_SYSTEM,
+    O3_KNOBS,
+    RESOURCE_WORKLOADS,
+    base,
+    o3_params,
+    parse_run_id,
+)
+
+# Runs in which a pair of knobs must vary together, outside the presets, for
+# their interaction to be fitted; a few preset points only alias it with
+# the main effects
+MIN_JOINT_POINTS = 4
+
+# Base value of every knob
+BASE_KNOBS = {knob: base[keys[0]] for knob, (keys, _) in O3_KNOBS.items()}
+
+RESPONSES = {
+    "ipc": "board.processor.cores.core.ipc",
+    "simSeconds": "simSeconds",
+}
+
+
+def knob_table(df):
+    """
+    knob_table returns the O3 knob values of every O3 run in df.
+
+    :return: a DataFrame indexed like df with one column per knob, NaN for
+    runs whose parameters are unknown (in-order runs, random designs without
+    manifest columns) and for runs that set parameters outside the knobs
+    (per-stage widths, ports, FU pool, ... see o3_config.py).
+    """
+    rows = []
+    for run, row in df.iterrows():
+        params = {
+            col[len("params."):].split(".")[0]: row[col]
+            for col in df.columns
+            if col.startswith("params.") and pd.notna(row[col])
+        }
+        if not params:
+            info = parse_run_id(run)
+            if info["cpu"] == "o3":
+                params = o3_params(info["config"]) or {}
+        if set(params) - set(REQUIRED):
+            params = {}
+        rows.append({
+            knob: params.get(keys[0], np.nan)
+            for knob, (keys, _) in O3_KNOBS.items()
+        })
+    return pd.DataFrame(rows, index=df.index, dtype=float)
+
+
+def _field_of(df, field):
+    # A manifest field of every run, from its column or the run name
+    values = pd.Series([parse_run_id(run)[field] for run in df.index],
+                       index=df.index)
+    if field in df.columns:
+        values = df[field].where(df[field].notna(), values)
+    return values
+
+
+def workloads_of(df):
+    """
+    The workload of every run, from the manifest column or the run name.
+    """
+    return _field_of(df, "workload")
+
+
+def systems_of(df):
+    """
+    The system of every run (see system_sweeps in sweep.py), from the
+    manifest column or the run name.
+    """
+    return _field_of(df, "system").fillna(DEFAULT_SYSTEM[0])
+
+
+def flag_sets_of(df):
+    """
+    The flag set of every run, "none" for resource workloads, from the
+    manifest column or the run name.
+    """
+    return _field_of(df, "flag_set").fillna("none")
+
+
+def default_flag_set(workload):
+    """
+    The flag set a workload runs with by default: "none" for resource
+    workloads, which are not compiled here, DEFAULT_FLAG_SET otherwise.
+    """
+    return "none" if workload in RESOURCE_WORKLOADS else DEFAULT_FLAG_SET
+
+
+def presets_of(df):
+    """
+    Whether every run is a preset configuration (group "preset" of
+    o3_sweeps), from the manifest column or the run name.
+    """
+    return _field_of(df, "group") == "preset"
+
+
+def _r2(X, y, sst):
+    coef, _, _, _ = np.linalg.lstsq(X, y, rcond=None)
+    resid = y - X @ coef
+    return 1 - (resid @ resid) / sst, coef
+
+
+def fit_terms(knobs, y, interactions=True, presets=None):
+    """
+    fit_terms fits log(y) over the standardized log2 knobs of one workload.
+
+    :param knobs: DataFrame of knob values (no NaNs).
+    :param y: response values (positive).
+    :param presets: boolean Series marking the preset runs, which do not
+    count towards MIN_JOINT_POINTS.
+    :return: (terms, r2, confounded) where terms is a DataFrame with effect,
+    first_order and total per term, sorted by total, and confounded lists
+    the interactions left out because the design does not vary the pair
+    together.
+    """
+    y = np.log(np.asarray(y, dtype=float))
+    sst = ((y - y.mean()) ** 2).sum()
+    z = np.log2(knobs)
+    z = z.loc[:, z.std() > 0]
+    z = (z - z.mean()) / z.std()
+    if z.shape[1] == 0 or sst == 0:
+        return pd.DataFrame(), np.nan, []
+
+    off_base = knobs.ne(pd.Series(BASE_KNOBS)[knobs.columns])
+    if presets is not None:
+        off_base = off_base & ~presets.reindex(knobs.index, fill_value=False).to_numpy()[:, None]
+
+    ones = np.ones((len(z), 1))
+    columns = {knob: z[knob].to_numpy() for knob in z.columns}
+    X = np.hstack([ones] + [col[:, None] for col in columns.values()])
+    rank = np.linalg.matrix_rank(X)
+    confounded = []
+    if interactions:
+        # Keep the interactions the design varies and can separate from
+        # the other terms
+        for a, b in itertools.combinations(z.columns, 2):
+            if (off_base[a] & off_base[b]).sum() < MIN_JOINT_POINTS:
+                confounded.append(f"{a}:{b}")
+                continue
+            col = columns[a] * columns[b]
+            X_new = np.hstack([X, col[:, None]])
+            new_rank = np.linalg.matrix_rank(X_new)
+            if new_rank > rank and new_rank < len(z):
+                columns[f"{a}:{b}"] = col
+                X, rank = X_new, new_rank
+            else:
+                confounded.append(f"{a}:{b}")
+
+    names = list(columns)
+    r2_full, coef = _r2(X, y, sst)
+
+    rows = []
+    for i, name in enumerate(names):
+        knobs_of_term = name.split(":")
+        # first order: the knob (or the interaction) alone
+        first, _ = _r2(np.hstack([ones, columns[name][:, None]]), y, sst)
+        # total: drop the term and, for a main effect, all its interactions
+        keep = [
+            columns[other] for other in names
+            if other != name
+            and not (len(knobs_of_term) == 1 and knobs_of_term[0] in other.split(":"))
+        ]
+        reduced, _ = _r2(np.hstack([ones] + [col[:, None] for col in keep]), y, sst)
+        rows.append({
+            "term": name,
+            "kind": "interaction" if len(knobs_of_term) > 1 else "main",
+            "effect": coef[i + 1],
+            "first_order": max(first, 0),
+            "total": max(r2_full - reduced, 0),
+        })
+    terms = pd.DataFrame(rows).sort_values("total", ascending=False)
+    return terms, r2_full, confounded
+
+
+def sensitivity(df, responses=("ipc", "simSeconds"), interactions=True,
+                system=DEFAULT_SYSTEM[0], flag_set=None):
+    """
+    sensitivity runs fit_terms for every workload and response, over the
+    runs on one system and flag set.
+
+    :param system: system of the runs to fit (default: the default system).
+    :param flag_set: flag set of the runs to fit, None for the default flag
+        set of each workload (see default_flag_set).
+    :return: a DataFrame with workload, response, runs, r2, confounded (the
+    number of interactions left out, see fit_terms), rank and the fit_terms
+    columns.
+    """
+    knobs = knob_table(df)
+    workloads = workloads_of(df)
+    systems = systems_of(df)
+    flag_sets = flag_sets_of(df)
+    presets = presets_of(df)
+    out = []
+    for workload in workloads.dropna().unique():
+        rows = (
+            (workloads == workload)
+            & (systems == system)
+            & (flag_sets == (flag_set or default_flag_set(workload)))
+            & knobs.notna().all(axis=1)
+        )
+        for response in responses:
+            stat = RESPONSES.get(response, response)
+            if stat not in df.columns:
+                continue
+            y = df.loc[rows, stat].astype(float)
+            ok = y.notna() & (y > 0)
+            if ok.sum() < 3:
+                continue
+            terms, r2, confounded = fit_terms(knobs.loc[rows][ok], y[ok], interactions, presets)
+            if terms.empty:
+                continue
+            terms.insert(0, "rank", range(1, len(terms) + 1))
+            terms.insert(0, "confounded", len(confounded))
+            terms.insert(0, "r2", r2)
+            terms.insert(0, "runs", int(ok.sum()))
+            terms.insert(0, "response", response)
+            terms.insert(0, "workload", workload)
+            out.append(terms)
+    if not out:
+        return pd.DataFrame()
+    return pd.concat(out, ignore_index=True)
+
+
+def main():
+    p = argparse.ArgumentParser(
+        description="Rank O3 knobs and their interactions by their effect on IPC and simSeconds"
+    )
+    p.add_argument('csvs', nargs='+',
+                   help="CSV files written by parse_stats.py")
+    p.add_argument('--responses', nargs='+', default=list(RESPONSES),
+                   help="Responses to model: ipc, simSeconds or any stat column (default: ipc simSeconds)")
+    p.add_argument('--no-interactions', action='store_true',
+                   help="Fit main effects only")
+    p.add_argument('--system', default=DEFAULT_SYSTEM[0],
+                   help=f"System of the runs to fit, e.g. l2-1MiB (default: {DEFAULT_SYSTEM[0]})")
+    p.add_argument('--flag-set', default=None,
+                   help=f"Flag set of the runs to fit (default: {DEFAULT_FLAG_SET}, none for resource workloads)")
+    p.add_argument('--output-csv', default='sensitivity.csv',
+                   help="Write the ranking to this CSV file (default: sensitivity.csv)")
+    p.add_argument('--save-plots', action='store_true',
+                   help="Save plots as PNGs instead of displaying them")
+    p.add_argument('--plots-dir', default='plots/sensitivity',
+                   help="Directory under which to save PNGs (default: plots/sensitivity)")
+    args = p.parse_args()
+
+    df = pd.concat([pd.read_csv(path, index_col='Run') for path in args.csvs])
+    df = df[~df.index.duplicated(keep='last')]
+
+    result = sensitivity(df, args.responses, not args.no_interactions,
+                         args.system, args.flag_set)
+    if result.empty:
+        print(f"Not enough O3 runs with known parameters on system '{args.system}'; exiting.")
+        return
+
+    with pd.option_context("display.width", 200, "display.max_columns", None,
+                           "display.max_rows", None, "display.precision", 3):
+        for (workload, response), terms in result.groupby(["workload", "response"], sort=False):
+            print(f"\n{workload} / {response}: {terms['runs'].iloc[0]} runs, "
+                  f"R^2 = {terms['r2'].iloc[0]:.3f}\n")
+            if not args.no_interactions and terms["confounded"].iloc[0]:
+                print(f"[note] {terms['confounded'].iloc[0]} knob interactions are confounded with "
+                      f"the main effects (not varied together in {MIN_JOINT_POINTS} runs "
+                      "outside the presets), not fitted.\n")
+            print(terms[["rank", "term", "kind", "effect", "first_order", "total"]]
+                  .to_string(index=False))
+
+    result.to_csv(args.output_csv, index=False)
+    print(f"\n✓ Saved sensitivity ranking to '{args.output_csv}'")
+
+    if args.save_plots:
+        os.makedirs(args.plots_dir, exist_ok=True)
+    for response, terms in result.groupby("response", sort=False):
+        table = terms.pivot_table(index="term", columns="workload",
+                                  values="total", fill_value=0)
+        table = table.loc[table.max(axis=1).sort_values(ascending=False).index]
+        ax = table.plot(kind="bar", figsize=(max(6, len(table) * 0.6), 4))
+        ax.set_title(f"Knob importance for {response} (total share of variance)")
+        ax.set_xlabel("Term")
+        ax.set_ylabel("Share of variance")
+        plt.xticks(rotation=45, ha="right")
+        plt.tight_layout()
+        if args.save_plots:
+            outname = os.path.join(args.plots_dir, f"{response}.png")
+            plt.savefig(outname)
+            plt.close()
+            print(f"→ Saved {response} importance plot to '{outname}'")
+        else:
+            plt.show()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,159 @@
+#!/usr/bin/env python3
+"""
+stats_diff.py
+
+Report every stat that changed between two runs, or between the common runs
+of two result stores (see results_store.py), e.g. before and after a gem5
+upgrade or a change of components/processors.py.
+
+Usage:
+
+  # Two run directories
+  ./stats_diff.py m5out-old/o3-base-bfs m5out/o3-base-bfs
+
+  # Two stores, every run they have in common
+  ./stats_diff.py old.store new.store [--runs ID ...] [--stats 'board.processor.*']
+
+  # Two runs of one store, e.g. a configuration against the base one
+  ./stats_diff.py results.store results.store --runs o3-base-bfs --against o3-very-big-bfs
+
+  Options: [--threshold 0.01] [--min-abs 0] [--top 50] [--output-csv stats_diff.csv]
+
+A stat changed when |new - old| / |old| is above --threshold (and |new -
+old| above --min-abs, to ignore noise in near-zero stats); a stat that is
+zero on one side only is an infinite change. The changes are sorted by
+relative change. Stats and runs that only one side has are counted
+separately.
+
+Both sides are aligned on (run, stat) as two float matrices and compared
+in one vectorized pass, so hundreds of runs with thousands of stats each
+take well under a second.
+"""
+
+import argparse
+import os
+
+import numpy as np
+import pandas as pd
+
+from parse_stats import parse_stats_file
+from results_store import is_store, load_store, select_stats
+
+
+def load_side(path, runs=None):
+    """
+    load_side reads one side of the comparison: the stats table of a store,
+    or the stats of a single run directory (indexed by its directory name).
+
+    :return: a DataFrame of stats indexed by run.
+    """
+    if is_store(path):
+        _, stats = load_store(path)
+        return stats if runs is None else stats.reindex([r for r in runs if r in stats.index])
+    stats_path = os.path.join(path, "stats.txt")
+    if not os.path.isfile(stats_path):
+        raise SystemExit(f"'{path}' is neither a store nor a run directory")
+    run = os.path.basename(os.path.normpath(path))
+    return pd.DataFrame([parse_stats_file(stats_path, ["*"])], index=pd.Index([run], name="Run"))
+
+
+def diff_stats(old, new, threshold=0.01, min_abs=0.0):
+    """
+    diff_stats compares two stats tables on their common runs and stats.
+
+    :return: a DataFrame with run, stat, old, new, delta and rel (relative
+        change, inf when old is 0), sorted by decreasing |rel|, holding the
+        changes above the thresholds only.
+    """
+    old, new = old.align(new, join="inner")
+    a, b = old.to_numpy(dtype=np.float64), new.to_numpy(dtype=np.float64)
+    delta = b - a
+    with np.errstate(divide="ignore", invalid="ignore"):
+        rel = np.where(a != 0, delta / np.abs(a), np.where(delta != 0, np.inf, 0.0))
+    both = ~np.isnan(a) & ~np.isnan(b)
+    changed = both & (np.abs(rel) > threshold) & (np.abs(delta) > min_abs)
+    rows, cols = np.nonzero(changed)
+    out = pd.DataFrame({
+        "run": old.index.to_numpy()[rows],
+        "stat": old.columns.to_numpy()[cols],
+        "old": a[rows, cols],
+        "new": b[rows, cols],
+        "delta": delta[rows, cols],
+        "rel": rel[rows, cols],
+    })
+    order = np.argsort(-np.abs(out["rel"].to_numpy()), kind="stable")
+    return out.iloc[order].reset_index(drop=True)
+
+
+def only_in(old, new):
+    """
+    only_in lists what one side has and the other does not.
+
+    :return: a dict with the runs and stats only in old and only in new.
+    """
+    return {
+        "runs only in old": sorted(set(old.index) - set(new.index)),
+        "runs only in new": sorted(set(new.index) - set(old.index)),
+        "stats only in old": sorted(set(old.columns) - set(new.columns)),
+        "stats only in new": sorted(set(new.columns) - set(old.columns)),
+    }
+
+
+def main():
+    p = argparse.ArgumentParser(
+        description="Stats that changed between two runs or two result stores"
+    )
+    p.add_argument("old", help="Store directory or run directory")
+    p.add_argument("new", help="Store directory or run directory")
+    p.add_argument("--runs", nargs="+", help="Runs to compare (default: all common runs)")
+    p.add_argument("--against", nargs="+",
+                   help="Runs of new to compare with the --runs of old, pairwise, instead of the same runs")
+    p.add_argument("--stats", nargs="+", help="Stat names or wildcard patterns to compare (default: all)")
+    p.add_argument("--threshold", type=float, default=0.01,
+                   help="Smallest relative change reported (default: 0.01, i.e. 1%%)")
+    p.add_argument("--min-abs", type=float, default=0.0,
+                   help="Smallest absolute change reported (default: 0)")
+    p.add_argument("--top", type=int, default=50,
+                   help="Changes to print (default: 50, the CSV has all)")
+    p.add_argument("--output-csv", default=None,
+                   help="Write all the changes to this CSV file")
+    args = p.parse_args()
+
+    if args.against and (not args.runs or len(args.runs) != len(args.against)):
+        p.error("--against needs as many runs as --runs")
+
+    old = select_stats(load_side(args.old, args.runs), args.stats)
+    new = select_stats(load_side(args.new, args.against or args.runs), args.stats)
+    if args.against:
+        # Compare the runs pairwise under the names of the old runs
+        new = new.rename(index=dict(zip(args.against, args.runs)))
+    elif not is_store(args.old) and not is_store(args.new):
+        # Two run directories are the same run
+        new.index = old.index
+
+    for what, items in only_in(old, new).items():
+        if items:
+            print(f"[note] {len(items)} {what}" + (f": {', '.join(items[:5])}" + (" ..." if len(items) > 5 else "")))
+
+    changes = diff_stats(old, new, args.threshold, args.min_abs)
+    common = old.index.intersection(new.index)
+    print(f"\n{len(changes)} changes above {args.threshold:.1%} in "
+          f"{changes['run'].nunique() if len(changes) else 0} of {len(common)} runs, "
+          f"{changes['stat'].nunique() if len(changes) else 0} of "
+          f"{len(old.columns.intersection(new.columns))} stats\n")
+    if len(changes):
+        with pd.option_context("display.width", 200, "display.max_colwidth", 80):
+            print(changes.head(args.top).to_string(index=False))
+        if len(changes) > args.top:
+            print(f"... {len(changes) - args.top} more")
+        by_stat = changes.groupby("stat")["rel"].agg(runs="size", max_rel=lambda r: r.abs().max())
+        print("\nMost changed stats:\n")
+        print(by_stat.sort_values(["runs", "max_rel"], ascending=False).head(10).to_string())
+
+    if args.output_csv:
+        changes.to_csv(args.output_csv, index=False)
+        print(f"✓ Saved {len(changes)} changes to '{args.output_csv}'")
+
+
+if __name__ == '__main__':
+    main()
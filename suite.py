@@ -0,0 +1,222 @@
+#!/usr/bin/env python3
+"""
+suite.py
+
+The results of all workloads together: align the runs of every
+configuration across the workloads, summarize each configuration by the
+geometric mean of a metric over the workloads, and show the per-workload
+breakdown as a configuration x workload table and heatmap, to answer which
+configuration is best overall rather than per workload.
+
+Usage:
+
+  # Speedup over the in-order runs, from the CSVs of parse_stats.py
+  ./suite.py results-*/*-all.csv [--save-plots --plots-dir plots/suite]
+
+  # From a results store, any metric of metrics.py or stat
+  ./suite.py results.store --metric l1d_mpki --lower-better
+  ./suite.py results.store --metric speedup --baseline o3-base --configs 'o3-width-*' 'o3-rob-*'
+
+  Options: [--top 20] [--output-csv suite.csv]
+
+A configuration is a run id without its workload (see configuration_of in
+metrics.py), e.g. o3-width-08 for
+o3-width-08-bfs and o3-width-08-daxpy, so runs of the same configuration
+on another system or flag set stay apart (o3-base@l2-1MiB, o3-base-O3).
+Only the configurations that have a run for every workload get a
+geometric mean; the others are listed with the workloads they miss and
+still shown in the breakdown.
+
+The table has one row per configuration, ranked by the geometric mean,
+with one column per workload and the geomean, min, max and the workloads
+where the configuration is best and worst relative to the others.
+"""
+
+import argparse
+import fnmatch
+import glob
+import os
+
+import numpy as np
+import pandas as pd
+import matplotlib.pyplot as plt
+from matplotlib.colors import TwoSlopeNorm
+
+import metrics
+from query import load
+from results_store import is_store
+
+
+def load_runs(sources):
+    """
+    load_runs reads the runs of stores and CSVs of parse_stats.py (glob
+    patterns allowed) into one DataFrame indexed by run id.
+    """
+    parts = []
+    for source in sources:
+        if is_store(source):
+            parts.append(load(source))
+            continue
+        for path in sorted(glob.glob(source)) or [source]:
+            parts.append(pd.read_csv(path, index_col=0))
+    df = pd.concat(parts, sort=False)
+    df = df[~df.index.duplicated(keep="last")]
+    df.index.name = "Run"
+    return df
+
+
+def suite_table(df, metric, lower_better=False):
+    """
+    suite_table pivots a metric to configuration x workload and summarizes
+    every configuration over the workloads.
+
+    :param df: runs with the metric column and workload and configuration
+        columns.
+    :param lower_better: rank by increasing geomean, e.g. for MPKI.
+    :return: a DataFrame indexed by configuration: one column per workload,
+        then geomean (NaN for configurations missing a workload), min, max,
+        best and worst (the workloads where the configuration ranks
+        highest and lowest among the configurations, relative to the
+        median of each workload, None when it ranks the same everywhere).
+    """
+    table = df.pivot_table(index="configuration", columns="workload", values=metric, aggfunc="mean")
+    workloads = list(table.columns)
+    means = metrics.geomean(df, metric, by="configuration", across="workload")
+    out = table.copy()
+    out["geomean"] = means.reindex(table.index)
+    out["min"] = table.min(axis=1)
+    out["max"] = table.max(axis=1)
+    # Relative to the median configuration of each workload, so workloads
+    # with large and small values compare
+    relative = table / table.median()
+    if lower_better:
+        relative = 1 / relative
+    out["best"] = relative.idxmax(axis=1)
+    out["worst"] = relative.idxmin(axis=1)
+    # No best or worst workload when the configuration is the same
+    # relative to all of them
+    even = np.isclose(relative.max(axis=1), relative.min(axis=1))
+    out.loc[even, ["best", "worst"]] = None
+    out = out.sort_values("geomean", ascending=lower_better, na_position="last")
+    return out, workloads
+
+
+def plot_heatmap(table, workloads, metric, centered):
+    """
+    plot_heatmap draws the configuration x workload values and the geomean,
+    annotated, one row per configuration in the order of the table.
+    """
+    values = table[workloads + ["geomean"]].astype(float)
+    data = values.to_numpy()
+    fig, ax = plt.subplots(figsize=(1.3 * data.shape[1] + 3, 0.35 * data.shape[0] + 1.5))
+    finite = data[np.isfinite(data)]
+    norm = None
+    if centered and len(finite) and finite.min() < 1 < finite.max():
+        norm = TwoSlopeNorm(vcenter=1, vmin=finite.min(), vmax=finite.max())
+    im = ax.imshow(np.ma.masked_invalid(data), aspect="auto", cmap="RdYlGn", norm=norm)
+    ax.set_xticks(range(data.shape[1]), workloads + ["geomean"], rotation=30, ha="right")
+    ax.set_yticks(range(data.shape[0]), list(values.index))
+    ax.axvline(len(workloads) - 0.5, color="black", linewidth=1)
+    for (i, j), value in np.ndenumerate(data):
+        if np.isfinite(value):
+            ax.text(j, i, f"{value:.3g}", ha="center", va="center", fontsize=7)
+    fig.colorbar(im, ax=ax, label=metric)
+    ax.set_title(f"{metric} per configuration and workload")
+    plt.tight_layout()
+
+
+def plot_geomean(table, workloads, metric):
+    """
+    plot_geomean draws the geomean of every configuration with the range of
+    its workloads, and each workload as a dot.
+    """
+    ranked = table.dropna(subset=["geomean"])
+    x = np.arange(len(ranked))
+    fig, ax = plt.subplots(figsize=(max(6, 0.45 * len(ranked) + 2), 5))
+    ax.bar(x, ranked["geomean"], color="lightgray", label="geomean")
+    for workload in workloads:
+        ax.plot(x, ranked[workload], "o", markersize=4, label=workload)
+    ax.set_xticks(x, list(ranked.index), rotation=45, ha="right")
+    ax.set_ylabel(metric)
+    ax.set_title(f"Geometric mean of {metric} over {len(workloads)} workloads")
+    ax.legend(fontsize="small")
+    plt.tight_layout()
+
+
+def main():
+    p = argparse.ArgumentParser(
+        description="Geometric-mean summary and configuration x workload heatmaps across all workloads"
+    )
+    p.add_argument("sources", nargs="+",
+                   help="Results stores or CSV files written by parse_stats.py (glob patterns allowed)")
+    p.add_argument("--metric", default="speedup",
+                   help="Metric of metrics.py or stat column to summarize (default: speedup)")
+    p.add_argument("--baseline", default=metrics.BASELINE,
+                   help=f"Configuration of the baseline runs of the metric (default: {metrics.BASELINE})")
+    p.add_argument("--lower-better", action="store_true",
+                   help="Rank by increasing geomean, e.g. for MPKI or simSeconds")
+    p.add_argument("--configs", nargs="+", default=None, metavar="PATTERN",
+                   help="Configurations to keep, shell wildcards allowed, e.g. 'o3-width-*' (default: all)")
+    p.add_argument("--top", type=int, default=None,
+                   help="Only print and plot the best N configurations (default: all)")
+    p.add_argument("--output-csv", default="suite.csv",
+                   help="Write the configuration x workload table to this CSV file (default: suite.csv)")
+    p.add_argument("--save-plots", action="store_true",
+                   help="Save plots as PNGs instead of displaying them")
+    p.add_argument("--plots-dir", default="plots/suite",
+                   help="Directory under which to save PNGs (default: plots/suite)")
+    args = p.parse_args()
+
+    df = load_runs(args.sources)
+    if args.metric in metrics.METRICS:
+        df = metrics.add_metrics(df, [args.metric], args.baseline)
+    elif args.metric not in df:
+        p.error(f"no metric or stat '{args.metric}'")
+    df = df.assign(
+        workload=metrics.run_fields(df)["workload"],
+        configuration=metrics.configurations(df),
+    )
+    if args.configs:
+        keep = df["configuration"].map(
+            lambda c: any(fnmatch.fnmatch(c, pattern) for pattern in args.configs)
+        )
+        df = df[keep]
+    df = df.dropna(subset=[args.metric, "workload"])
+    if df.empty:
+        print("No runs with a value of the metric; exiting.")
+        return
+
+    table, workloads = suite_table(df, args.metric, args.lower_better)
+    incomplete = table[table[workloads].isna().any(axis=1)]
+    for config, row in incomplete.iterrows():
+        missing = [w for w in workloads if pd.isna(row[w])]
+        print(f"[note] configuration '{config}' has no run of {', '.join(missing)}, no geomean.")
+
+    print(f"\n{args.metric} of {len(table)} configurations on {len(workloads)} workloads"
+          + (f" (baseline {args.baseline})" if args.metric in metrics.METRICS
+             and "baseline(" in metrics.METRICS[args.metric] else "") + ":\n")
+    shown = table.head(args.top) if args.top else table
+    with pd.option_context("display.width", 200, "display.max_columns", None,
+                           "display.max_rows", None, "display.precision", 3):
+        print(shown.to_string())
+
+    table.to_csv(args.output_csv)
+    print(f"\n✓ Saved suite table to '{args.output_csv}'")
+
+    centered = args.metric in metrics.METRICS and "baseline(" in metrics.METRICS[args.metric]
+    if args.save_plots:
+        os.makedirs(args.plots_dir, exist_ok=True)
+    for name, draw in (("heatmap", lambda: plot_heatmap(shown, workloads, args.metric, centered)),
+                       ("geomean", lambda: plot_geomean(shown, workloads, args.metric))):
+        draw()
+        if args.save_plots:
+            outname = os.path.join(args.plots_dir, f"{args.metric}-{name}.png")
+            plt.savefig(outname)
+            plt.close()
+            print(f"→ Saved {args.metric} {name} plot to '{outname}'")
+        else:
+            plt.show()
+
+
+if __name__ == '__main__':
+    main()
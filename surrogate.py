@@ -0,0 +1,369 @@
+#!/usr/bin/env python3
+"""
+surrogate.py
+
+Surrogate performance model: gradient-boosted trees trained on the collected
+runs that predict IPC, simSeconds and cache miss rates of OutOfOrderCPU
+configurations that were never simulated, so thousands of candidates can be
+screened in milliseconds and only the promising ones simulated.
+
+Usage:
+
+  # Train on parse_stats.py CSVs and report cross-validated errors
+  ./surrogate.py train results-*/*-all.csv [-o surrogate.pkl] [--folds 5]
+
+  # Predict one configuration (a sweep/design name or knob values)
+  ./surrogate.py predict surrogate.pkl --workload bfs --config width-08
+  ./surrogate.py predict surrogate.pkl --workload bfs --knobs width=8 rob_size=256
+  ./surrogate.py predict surrogate.pkl --workload bfs --config width-08 --system l2-4MiB
+
+  # Screen a random design and list the best candidates to simulate
+  ./surrogate.py screen surrogate.pkl --workload bfs [--n 10000] [--top 20] \
+    [--by ipc] [--output-csv candidates.csv]
+
+Features are the O3 knobs (log2, see O3_KNOBS in sweep.py) plus a profile of
+the workload taken from its in-order run (IPC and cache miss rates) on the
+same system and flag set, so a new workload, or a workload on another system
+(e.g. o3-base@l2-4MiB-bfs), only needs its in-order run there to be
+predicted.
+
+From python:
+
+  model = SurrogateModel.load("surrogate.pkl")
+  model.predict("width-08", "bfs")            # {'ipc': ..., 'simSeconds': ...}
+  model.predict({"width": 8, "rob_size": 256}, "bfs", system="l2-4MiB")
+"""
+
+import argparse
+import pickle
+import time
+
+import numpy as np
+import pandas as pd
+from sklearn.ensemble import HistGradientBoostingRegressor
+from sklearn.model_selection import GroupKFold, KFold
+
+from sensitivity import default_flag_set, flag_sets_of, knob_table, systems_of, workloads_of
+from sweep import (
+    DEFAULT_FLAG_SET,
+    DEFAULT_SYSTEM,
+    O3_KNOBS,
+    base,
+    o3_design,
+    o3_params,
+    run_id,
+)
+
+# Predicted stats; log=True models log(stat) for strictly positive stats
+TARGETS = {
+    "ipc": ("board.processor.cores.core.ipc", True),
+    "simSeconds": ("simSeconds", True),
+    "l1d_miss_rate": ("board.cache_hierarchy.l1dcaches.overallMissRate::total", False),
+    "l2_miss_rate": ("board.cache_hierarchy.l2cache.overallMissRate::total", False),
+}
+
+# Workload profile, taken from the in-order run of the workload
+PROFILE = {
+    "inorder_ipc": "board.processor.cores.core.ipc",
+    "inorder_l1d_miss_rate": "board.cache_hierarchy.l1dcaches.overallMissRate::total",
+    "inorder_l1i_miss_rate": "board.cache_hierarchy.l1icaches.overallMissRate::total",
+    "inorder_l2_miss_rate": "board.cache_hierarchy.l2cache.overallMissRate::total",
+}
+
+KNOBS = list(O3_KNOBS)
+
+
+def _knobs_of(config):
+    """
+    Knob values of a configuration given by name, OutOfOrderCPU params or
+    knob values. Missing knobs take their base value.
+    """
+    if isinstance(config, str):
+        params = o3_params(config)
+        if params is None:
+            raise ValueError(f"unknown configuration '{config}'")
+        config = params
+    knobs = {}
+    for knob, (keys, _) in O3_KNOBS.items():
+        knobs[knob] = config.get(knob, config.get(keys[0], base[keys[0]]))
+    return knobs
+
+
+class SurrogateModel:
+    """
+    SurrogateModel holds one gradient-boosted tree regressor per target and
+    the workload profiles it was trained with.
+    """
+    def __init__(self, max_iter=300, learning_rate=0.05):
+        self.max_iter = max_iter
+        self.learning_rate = learning_rate
+        self.models = {}
+        self.profiles = pd.DataFrame()
+
+    def _new_regressor(self):
+        return HistGradientBoostingRegressor(
+            max_iter=self.max_iter, learning_rate=self.learning_rate,
+            min_samples_leaf=3, random_state=0,
+        )
+
+    @staticmethod
+    def dataset(df):
+        """
+        dataset builds the training table from collected statistics.
+
+        :return: (features, targets, profiles, groups). features has the
+        log2 knobs and the workload profile of every O3 run, profiles is
+        indexed by (workload, flag_set, system), groups is the workload of
+        every row.
+        """
+        knobs = knob_table(df)
+        workloads = workloads_of(df)
+        flag_sets = flag_sets_of(df)
+        systems = systems_of(df)
+        # The profile comes from the base in-order run on the same system,
+        # not from the in-order sweep points, so runs on another system are
+        # told apart by their profile
+        base_inorder = set(
+            run_id("inorder", workload, None if flag_set == "none" else flag_set, system)
+            for workload, flag_set, system in zip(workloads, flag_sets, systems)
+        )
+        inorder = pd.Series(df.index.isin(base_inorder), index=df.index)
+
+        profiles = pd.DataFrame({
+            name: df.loc[inorder, stat] if stat in df.columns else np.nan
+            for name, stat in PROFILE.items()
+        })
+        profiles.index = pd.MultiIndex.from_arrays(
+            [workloads[inorder], flag_sets[inorder], systems[inorder]],
+            names=["workload", "flag_set", "system"],
+        )
+        profiles = profiles[~profiles.index.duplicated(keep="last")]
+
+        rows = ~inorder & knobs.notna().all(axis=1)
+        keys = pd.MultiIndex.from_arrays([workloads[rows], flag_sets[rows], systems[rows]])
+        have_profile = keys.isin(profiles.index)
+        rows[rows] = have_profile
+        keys = keys[have_profile]
+
+        features = np.log2(knobs.loc[rows, KNOBS])
+        features = features.join(
+            pd.DataFrame(profiles.loc[keys].to_numpy(), index=features.index,
+                         columns=list(PROFILE))
+        )
+        targets = pd.DataFrame({
+            name: df.loc[rows, stat] if stat in df.columns else np.nan
+            for name, (stat, _) in TARGETS.items()
+        }, index=features.index).astype(float)
+        return features, targets, profiles, workloads[rows]
+
+    def fit(self, df):
+        """
+        fit trains one regressor per target on the O3 runs of df.
+        """
+        features, targets, profiles, _ = self.dataset(df)
+        self.profiles = profiles
+        for name, (_, log) in TARGETS.items():
+            y = targets[name]
+            ok = y.notna() & ((y > 0) if log else True)
+            if ok.sum() < 5:
+                continue
+            model = self._new_regressor()
+            model.fit(features[ok], np.log(y[ok]) if log else y[ok])
+            self.models[name] = model
+        return self
+
+    def _features(self, knobs, workload, flag_set, system):
+        if flag_set is None:
+            flag_set = default_flag_set(workload)
+        key = (workload, flag_set, system)
+        if key not in self.profiles.index:
+            raise ValueError(
+                f"no in-order run of '{workload}' ({flag_set}) on system '{system}' "
+                "to profile the workload"
+            )
+        features = np.log2(knobs[KNOBS].astype(float))
+        for name, value in self.profiles.loc[key].items():
+            features[name] = value
+        return features
+
+    def predict_many(self, knobs, workload, flag_set=None, system=DEFAULT_SYSTEM[0]):
+        """
+        predict_many predicts every target for a table of knob values,
+        vectorized.
+
+        :param knobs: DataFrame with one column per knob of O3_KNOBS.
+        :param flag_set: flag set of the workload, None for its default
+            (see default_flag_set).
+        :param system: system of the runs, e.g. l2-4MiB (see system_sweeps
+            in sweep.py); it needs an in-order run in the training data.
+        :return: a DataFrame of predictions indexed like knobs.
+        """
+        features = self._features(knobs, workload, flag_set, system)
+        out = pd.DataFrame(index=knobs.index)
+        for name, model in self.models.items():
+            pred = model.predict(features)
+            out[name] = np.exp(pred) if TARGETS[name][1] else pred
+        return out
+
+    def predict(self, config, workload, flag_set=None, system=DEFAULT_SYSTEM[0]):
+        """
+        predict predicts every target for one configuration.
+
+        :param config: a configuration name of o3_sweeps/o3_design, or a dict
+        of OutOfOrderCPU params or knob values (missing knobs are base).
+        :return: a dict of predicted values.
+        """
+        knobs = pd.DataFrame([_knobs_of(config)])
+        return self.predict_many(knobs, workload, flag_set, system).iloc[0].to_dict()
+
+    def save(self, path):
+        with open(path, "wb") as f:
+            pickle.dump(self, f)
+
+    @staticmethod
+    def load(path):
+        with open(path, "rb") as f:
+            return pickle.load(f)
+
+
+def cross_validate(df, folds=5, by_workload=False, **kwargs):
+    """
+    cross_validate reports the out-of-fold error of every target.
+
+    :param by_workload: leave one workload out per fold instead of random
+    folds, to measure how well an unseen workload is predicted.
+    :return: a DataFrame with MAPE, MAE and R^2 per target.
+    """
+    features, targets, _, groups = SurrogateModel.dataset(df)
+    if by_workload:
+        n = min(folds, groups.nunique())
+        splits = GroupKFold(n_splits=n).split(features, groups=groups)
+    else:
+        n = min(folds, len(features))
+        splits = KFold(n_splits=n, shuffle=True, random_state=0).split(features)
+
+    pred = pd.DataFrame(np.nan, index=targets.index, columns=targets.columns)
+    for train, test in splits:
+        for name, (_, log) in TARGETS.items():
+            y = targets[name].iloc[train]
+            ok = y.notna() & ((y > 0) if log else True)
+            if ok.sum() < 5:
+                continue
+            model = SurrogateModel(**kwargs)._new_regressor()
+            model.fit(features.iloc[train][ok], np.log(y[ok]) if log else y[ok])
+            p = model.predict(features.iloc[test])
+            pred.iloc[test, pred.columns.get_loc(name)] = np.exp(p) if log else p
+
+    rows = []
+    for name in TARGETS:
+        y, p = targets[name], pred[name]
+        ok = y.notna() & p.notna()
+        if not ok.any():
+            continue
+        y, p = y[ok], p[ok]
+        err = p - y
+        sst = ((y - y.mean()) ** 2).sum()
+        rows.append({
+            "target": name,
+            "runs": int(ok.sum()),
+            "mape": (err.abs() / y.abs().where(y != 0)).mean(),
+            "mae": err.abs().mean(),
+            "r2": 1 - (err ** 2).sum() / sst if sst > 0 else np.nan,
+        })
+    return pd.DataFrame(rows).set_index("target")
+
+
+def _read_csvs(paths):
+    df = pd.concat([pd.read_csv(path, index_col='Run') for path in paths])
+    return df[~df.index.duplicated(keep='last')]
+
+
+def main():
+    p = argparse.ArgumentParser(
+        description="Surrogate model predicting IPC/simSeconds/miss rates of O3 configurations"
+    )
+    sub = p.add_subparsers(dest="command", required=True)
+
+    p_train = sub.add_parser("train", help="Train on parse_stats.py CSVs")
+    p_train.add_argument("csvs", nargs="+", help="CSV files written by parse_stats.py")
+    p_train.add_argument("-o", "--out", default="surrogate.pkl",
+                         help="Model file (default: surrogate.pkl)")
+    p_train.add_argument("--folds", type=int, default=5,
+                         help="Cross-validation folds (default: 5)")
+
+    p_predict = sub.add_parser("predict", help="Predict one configuration")
+    p_predict.add_argument("model", help="Model file written by train")
+    p_predict.add_argument("--workload", required=True)
+    p_predict.add_argument("--flag-set", default=None,
+                            help=f"Flag set of the workload (default: {DEFAULT_FLAG_SET}, none for resource workloads)")
+    p_predict.add_argument("--system", default=DEFAULT_SYSTEM[0],
+                           help=f"System of the run, e.g. l2-4MiB (default: {DEFAULT_SYSTEM[0]})")
+    cfg = p_predict.add_mutually_exclusive_group(required=True)
+    cfg.add_argument("--config", help="Configuration name, e.g. width-08")
+    cfg.add_argument("--knobs", nargs="+", metavar="KNOB=VALUE",
+                     help=f"Knob values, missing knobs are base ({', '.join(KNOBS)})")
+
+    p_screen = sub.add_parser("screen", help="Rank a random design by predicted performance")
+    p_screen.add_argument("model", help="Model file written by train")
+    p_screen.add_argument("--workload", required=True)
+    p_screen.add_argument("--flag-set", default=None,
+                           help=f"Flag set of the workload (default: {DEFAULT_FLAG_SET}, none for resource workloads)")
+    p_screen.add_argument("--system", default=DEFAULT_SYSTEM[0],
+                          help=f"System of the runs, e.g. l2-4MiB (default: {DEFAULT_SYSTEM[0]})")
+    p_screen.add_argument("--n", type=int, default=10000,
+                          help="Number of random candidates (default: 10000)")
+    p_screen.add_argument("--seed", type=int, default=0)
+    p_screen.add_argument("--top", type=int, default=20,
+                          help="Number of candidates to show (default: 20)")
+    p_screen.add_argument("--by", default="ipc",
+                          help="Target to rank by, highest first (default: ipc)")
+    p_screen.add_argument("--output-csv", help="Write the ranked candidates to this CSV")
+    args = p.parse_args()
+
+    if args.command == "train":
+        df = _read_csvs(args.csvs)
+        start = time.time()
+        model = SurrogateModel().fit(df)
+        print(f"Trained {len(model.models)} models in {time.time() - start:.1f}s")
+        with pd.option_context("display.precision", 4):
+            print(f"\n{args.folds}-fold cross-validation:\n")
+            print(cross_validate(df, args.folds))
+            print("\nLeave-one-workload-out:\n")
+            print(cross_validate(df, args.folds, by_workload=True))
+        model.save(args.out)
+        print(f"\n✓ Saved model to '{args.out}'")
+
+    elif args.command == "predict":
+        model = SurrogateModel.load(args.model)
+        if args.config:
+            config = args.config
+        else:
+            config = {}
+            for item in args.knobs:
+                knob, _, value = item.partition("=")
+                config[knob] = int(value)
+        for name, value in model.predict(config, args.workload, args.flag_set, args.system).items():
+            print(f"{name:<16} {value:.6g}")
+
+    elif args.command == "screen":
+        model = SurrogateModel.load(args.model)
+        design = o3_design("random", n=args.n, seed=args.seed)
+        knobs = pd.DataFrame(
+            [_knobs_of(params) for _, _, params in design],
+            index=[name for name, _, _ in design],
+        )
+        start = time.time()
+        pred = model.predict_many(knobs, args.workload, args.flag_set, args.system)
+        elapsed = time.time() - start
+        ranked = knobs.join(pred).drop_duplicates().sort_values(
+            args.by, ascending=args.by == "simSeconds"
+        )
+        print(f"Predicted {len(knobs)} candidates in {elapsed * 1000:.0f} ms\n")
+        print(ranked.head(args.top))
+        if args.output_csv:
+            ranked.to_csv(args.output_csv)
+            print(f"✓ Saved ranked candidates to '{args.output_csv}'")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,855 @@
+"""
+sweep.py
+
+Shared helpers for the local-*-test.py sweep scripts and the analysis tools.
+
+This module does not import gem5, so it can be used both from inside a gem5
+configuration script and from plain python scripts working on the results.
+
+It contains:
+  - the O3 reference configurations and the one-dimensional sweeps around
+    the base configuration,
+  - the cache/memory, multi-core and big.LITTLE system configurations, and
+    the placement of multi-program mixes on big and little cores,
+  - the compiler flag sets used to build the workloads, and a helper that
+    builds (and caches) one binary per workload and flag set,
+  - the run manifest written next to each run's stats.txt, and a fallback
+    that recovers the same fields from a run id,
+  - the status file of each run and the checks that tell complete runs
+    from failed or truncated ones.
+"""
+
+import csv
+import hashlib
+import itertools
+import json
+import os
+import random
+import subprocess
+
+from o3_config import validate_o3_params
+
+REPO_DIR = os.path.abspath(os.path.dirname(__file__))
+WORKLOADS_DIR = os.path.join(REPO_DIR, "workloads")
+
+MANIFEST_NAME = "manifest.json"
+STATUS_NAME = "status.json"
+
+# Last line of every stats dump in stats.txt
+STATS_END = "End Simulation Statistics"
+
+# Out-of-order CPU configurations
+# For sweeping the parameters we have a base configuration.
+base = {
+    "width": 4,
+    "rob_size": 128,
+    "num_int_regs": 128,
+    "num_fp_regs": 128,
+    "fetchB_size": 64,
+    "fetchQ_size": 32,
+    "instructionQ_size": 64,
+    "loadQ_size": 128,
+    "storeQ_size": 128,
+}
+
+very_big = {
+    "width": 12,
+    "rob_size": 512,
+    "num_int_regs": 512,
+    "num_fp_regs": 512,
+    "fetchB_size": 64,
+    "fetchQ_size": 512,
+    "instructionQ_size": 512,
+    "loadQ_size": 512,
+    "storeQ_size": 512,
+}
+
+very_small = {
+    "width": 4,
+    "rob_size": 32,
+    "num_int_regs": 64,
+    "num_fp_regs": 64,
+    "fetchB_size": 32,
+    "fetchQ_size": 16,
+    "instructionQ_size": 16,
+    "loadQ_size": 32,
+    "storeQ_size": 32,
+}
+
+# In-order (MinorCPU) configurations, the keyword arguments of InOrderCPU.
+# The base configuration is the MinorCPU default every sweep was run with.
+inorder_base = {
+    "width": 2,
+    "fetch2_buffer": 2,
+    "decode_buffer": 3,
+    "execute_buffer": 7,
+    "num_int_alus": 2,
+    "num_fp_units": 1,
+    "lsq_requests": 1,
+    "lsq_transfers": 2,
+    "store_buffer": 5,
+    "mem_accesses": 2,
+}
+
+inorder_big = {
+    "width": 4,
+    "fetch2_buffer": 4,
+    "decode_buffer": 6,
+    "execute_buffer": 14,
+    "num_int_alus": 4,
+    "num_fp_units": 2,
+    "lsq_requests": 2,
+    "lsq_transfers": 4,
+    "store_buffer": 10,
+    "mem_accesses": 4,
+}
+
+# Knobs of the O3 design space used by o3_design and sensitivity.py. Each knob
+# sets one or more OutOfOrderCPU parameters to the same value, like the
+# one-dimensional sweeps do (e.g. the register sweep sets int and fp regs).
+O3_KNOBS = {
+    "width": (["width"], [2, 4, 8, 12]),
+    "rob_size": (["rob_size"], [32, 64, 128, 256, 512]),
+    "physical_regs": (["num_int_regs", "num_fp_regs"], [64, 128, 256, 512]),
+    "fetchQ_size": (["fetchQ_size"], [16, 32, 64, 128, 256, 512]),
+    "instructionQ_size": (["instructionQ_size"], [16, 32, 64, 128, 256, 512]),
+    "lsQ_size": (["loadQ_size", "storeQ_size"], [32, 64, 128, 256, 512]),
+}
+
+# Functional unit mixes of the "fu-mix" O3 sweep, counts of DEFAULT_FU_POOL
+# (o3_config.py) that differ from gem5's default pool
+FU_MIXES = {
+    "int-light": {"int_alu": 2, "int_mult_div": 1},
+    "int-heavy": {"int_alu": 8, "int_mult_div": 4},
+    "fp-light": {"fp_alu": 1, "fp_mult_div": 1, "simd": 1},
+    "fp-heavy": {"fp_alu": 8, "fp_mult_div": 4, "simd": 8},
+    "lean": {"int_alu": 2, "int_mult_div": 1, "fp_alu": 1, "fp_mult_div": 1,
+             "simd": 1, "rdwr_port": 1},
+}
+
+# Compiler flag sets the workloads can be built with. The key is used in the
+# run id and the build directory, the value is passed to the compiler.
+DEFAULT_FLAG_SET = "O2"
+FLAG_SETS = {
+    "O1": "-O1",
+    "O2": "-O2",
+    "O3": "-O3",
+    "O3-unroll": "-O3 -funroll-loops",
+    "O3-novec": "-O3 -fno-tree-vectorize",
+    "O3-rvv": "-O3 -march=rv64gcv -mabi=lp64d",
+    "O3-rvv-unroll": "-O3 -march=rv64gcv -mabi=lp64d -funroll-loops",
+}
+
+# Workloads built from the sources under workloads/. "binary" is the file name
+# of the gem5 enabled binary built by the make target ("variant" by default).
+# Threaded workloads take the number of threads as their first argument and
+# are run with one core per thread, see multicore_sweeps.
+WORKLOADS = {
+    "bfs": {"dir": "breadFirstSearch", "binary": "bfs", "arguments": []},
+    "bubble-sort": {"dir": "bubbleSort", "binary": "bubble", "arguments": []},
+    "daxpy": {"dir": "daxpy", "binary": "daxpy-gem5", "arguments": []},
+    "queens": {"dir": "queens", "binary": "queens", "arguments": ["16"]},
+    "bfs-mt": {"dir": "breadFirstSearch", "binary": "bfs-mt", "arguments": [],
+               "target": "variant-mt", "threaded": True},
+    "daxpy-mt": {"dir": "daxpy", "binary": "daxpy-mt", "arguments": [],
+                 "target": "variant-mt", "threaded": True},
+    "matmul-mt": {"dir": "matrixMultiply", "binary": "matmul-mt", "arguments": [],
+                  "target": "variant-mt", "threaded": True},
+}
+
+# Workloads that come from gem5 resources and therefore have no flag sets.
+RESOURCE_WORKLOADS = {
+    "riscv-matrix-multiply": "riscv-matrix-multiply",
+}
+
+# Multi-program mixes of WORKLOADS run on the big.LITTLE processors of
+# hetero_sweeps, one program per core. The mix name is the workload of the run.
+MIXES = {
+    "mix4": ["bfs", "daxpy", "queens", "bubble-sort"],
+}
+
+# How the programs of a mix are assigned to cores, see place_programs
+PLACEMENT_POLICIES = ["speedup", "given", "worst"]
+
+
+# Groups of o3_sweeps simulated by default: the presets and the sweeps of
+# the O3 knobs
+O3_GROUPS = ["preset", "width", "rob", "physical-regs", "fetchQ", "instructionQ", "lsQ"]
+# Groups of o3_sweeps simulated on request only: the per-stage widths,
+# front-end delays, memory ports and FU mixes
+O3_EXTRA_GROUPS = ["stage-widths", "delays", "ports", "fu-mix"]
+
+
+def o3_sweeps(groups=None):
+    """
+    o3_sweeps returns the O3 configurations simulated for every workload: the
+    three reference configurations and a one-dimensional sweep of each knob
+    around the base configuration.
+
+    :param groups: the groups to return, None for O3_GROUPS, "all" for
+    O3_GROUPS and O3_EXTRA_GROUPS, e.g. O3_GROUPS + ["ports"].
+    :return: a list of (name, group, params) tuples. name is used in the run
+    id, group is the sweep the configuration belongs to and params are the
+    keyword arguments of OutOfOrderCPU.
+    """
+    sweeps = []
+
+    sweeps.append(("very-big", "preset", very_big.copy()))
+    sweeps.append(("base", "preset", base.copy()))
+    sweeps.append(("very-small", "preset", very_small.copy()))
+
+    # Sweep width
+    for w in [2, 4, 8, 10, 12]:
+        cfg = base.copy()
+        cfg["width"] = w
+        sweeps.append(("width-%02d" % w, "width", cfg))
+
+    # Sweep ROB size
+    for rob in [32, 64, 128, 256, 512]:
+        cfg = base.copy()
+        cfg["rob_size"] = rob
+        sweeps.append(("rob-%03d" % rob, "rob", cfg))
+
+    # Sweep register file size
+    for regs in [32, 64, 128, 256, 512]:
+        cfg = base.copy()
+        cfg["num_int_regs"] = regs
+        cfg["num_fp_regs"] = regs
+        sweeps.append(("physical-regs-%03d" % regs, "physical-regs", cfg))
+
+    # Sweep fetch queue size
+    for fetchQ in [32, 64, 128, 256, 512]:
+        cfg = base.copy()
+        cfg["fetchQ_size"] = fetchQ
+        sweeps.append(("fetchQ-%02d" % fetchQ, "fetchQ", cfg))
+
+    # Sweep instruction queue size
+    for instructionQ in [32, 64, 128, 256, 512]:
+        cfg = base.copy()
+        cfg["instructionQ_size"] = instructionQ
+        sweeps.append(("instructionQ-%02d" % instructionQ, "instructionQ", cfg))
+
+    # Sweep load queue and store queue size
+    for lsQ in [32, 64, 128, 256, 512]:
+        cfg = base.copy()
+        cfg["loadQ_size"] = lsQ
+        cfg["storeQ_size"] = lsQ
+        sweeps.append(("lsQ-%02d" % lsQ, "lsQ", cfg))
+
+    # Split the width between the front-end (fetch, decode, rename) and the
+    # back-end (dispatch, issue, writeback, commit)
+    for fe, be in [(2, 4), (8, 4), (4, 2), (4, 8)]:
+        cfg = base.copy()
+        for key in ["fetch_width", "decode_width", "rename_width"]:
+            cfg[key] = fe
+        for key in ["dispatch_width", "issue_width", "wb_width", "commit_width"]:
+            cfg[key] = be
+        sweeps.append(("fe%d-be%d" % (fe, be), "stage-widths", cfg))
+
+    # Sweep the front-end depth, fetch to decode and decode to rename delays
+    for delay in [2, 3, 4]:
+        cfg = base.copy()
+        cfg["delays"] = {"fetchToDecodeDelay": delay, "decodeToRenameDelay": delay}
+        sweeps.append(("fe-delay-%d" % delay, "delays", cfg))
+
+    # Sweep the loads and stores per cycle: L1D cache ports and the memory
+    # ports of the FU pool (separate read and write ports)
+    for loads, stores in [(1, 1), (2, 1), (2, 2), (3, 2), (4, 4)]:
+        cfg = base.copy()
+        cfg["cache_load_ports"] = loads
+        cfg["cache_store_ports"] = stores
+        cfg["fu_pool"] = {"read_port": loads, "write_port": stores, "rdwr_port": 0}
+        sweeps.append(("ports-%dld-%dst" % (loads, stores), "ports", cfg))
+
+    # Functional unit mixes, see DEFAULT_FU_POOL in o3_config.py
+    for name, fu_pool in FU_MIXES.items():
+        cfg = base.copy()
+        cfg["fu_pool"] = dict(fu_pool)
+        sweeps.append(("fu-%s" % name, "fu-mix", cfg))
+
+    if groups is None:
+        groups = O3_GROUPS
+    elif groups == "all":
+        groups = O3_GROUPS + O3_EXTRA_GROUPS
+    unknown = set(groups) - set(O3_GROUPS + O3_EXTRA_GROUPS)
+    if unknown:
+        raise ValueError(f"unknown O3 sweep groups: {', '.join(sorted(unknown))}")
+    sweeps = [point for point in sweeps if point[1] in groups]
+    for name, _, params in sweeps:
+        validate_o3_params(params)
+    return sweeps
+
+
+def inorder_sweeps():
+    """
+    inorder_sweeps returns the in-order configurations simulated next to the
+    base in-order run ("inorder"): a big preset and one-dimensional sweeps
+    around inorder_base.
+
+    :return: a list of (name, group, params) tuples, params are the keyword
+    arguments of InOrderCPU. The run id of a point is "inorder-<name>".
+    """
+    sweeps = []
+
+    sweeps.append(("big", "inorder-preset", inorder_big.copy()))
+
+    # Sweep width
+    for w in [1, 2, 3, 4]:
+        cfg = inorder_base.copy()
+        cfg["width"] = w
+        sweeps.append(("width-%d" % w, "inorder-width", cfg))
+
+    # Sweep the decode and execute widths apart, the other one at the base
+    # width
+    for stage in ["decode", "execute"]:
+        for w in [1, 3, 4]:
+            cfg = inorder_base.copy()
+            cfg[f"{stage}_width"] = w
+            sweeps.append(("%s-width-%d" % (stage, w), "inorder-width", cfg))
+
+    # Sweep the cache line fetches fetch1 keeps in flight
+    for limit in [2, 4]:
+        cfg = inorder_base.copy()
+        cfg["fetch_limit"] = limit
+        sweeps.append(("fetch-limit-%d" % limit, "inorder-fetch", cfg))
+
+    # Sweep the input buffers of fetch2, decode and execute together
+    for scale in [1, 2, 4]:
+        cfg = inorder_base.copy()
+        for key in ["fetch2_buffer", "decode_buffer", "execute_buffer"]:
+            cfg[key] = inorder_base[key] * scale
+        sweeps.append(("buffers-x%d" % scale, "inorder-buffers", cfg))
+
+    # Sweep the functional units
+    for alus in [1, 2, 3, 4]:
+        cfg = inorder_base.copy()
+        cfg["num_int_alus"] = alus
+        sweeps.append(("int-alus-%d" % alus, "inorder-fu", cfg))
+    for fp in [1, 2]:
+        cfg = inorder_base.copy()
+        cfg["num_fp_units"] = fp
+        sweeps.append(("fp-units-%d" % fp, "inorder-fu", cfg))
+
+    # Sweep the load store queue, the store buffer and the accesses in flight
+    for scale in [1, 2, 4]:
+        cfg = inorder_base.copy()
+        for key in ["lsq_requests", "lsq_transfers", "store_buffer", "mem_accesses"]:
+            cfg[key] = inorder_base[key] * scale
+        sweeps.append(("lsq-x%d" % scale, "inorder-lsq", cfg))
+
+    return sweeps
+
+
+# System configuration the O3 and in-order points are run with by default: the
+# component defaults (32 KiB L1s, 256 KiB L2, no L3).
+DEFAULT_SYSTEM = ("default", "default", {})
+
+
+def system_sweeps():
+    """
+    system_sweeps returns the non-core configurations to sweep: each one is
+    run with every O3 point. The system dict holds the keyword arguments of
+    the components, e.g. {"cache": {...}} for PrivateL1SharedL2Cache and
+    {"memory": {...}} for DRAM, and the branch predictor of the cores under
+    "branch_pred".
+
+    :return: a list of (name, group, system) tuples, starting with
+    DEFAULT_SYSTEM.
+    """
+    sweeps = [DEFAULT_SYSTEM]
+
+    # Sweep L1 data cache size, associativity and MSHRs
+    for size in ["16KiB", "32KiB", "64KiB", "128KiB"]:
+        sweeps.append(("l1d-%s" % size, "l1d-size", {"cache": {"l1d_size": size}}))
+    for assoc in [2, 4, 8, 16]:
+        sweeps.append(("l1d-assoc-%02d" % assoc, "l1d-assoc", {"cache": {"l1d_assoc": assoc}}))
+    for mshrs in [4, 8, 16, 32]:
+        sweeps.append(("l1d-mshrs-%02d" % mshrs, "l1d-mshrs", {"cache": {"l1d_mshrs": mshrs}}))
+
+    # Sweep L2 size and latency
+    for size in ["256KiB", "512KiB", "1MiB", "2MiB", "4MiB"]:
+        sweeps.append(("l2-%s" % size, "l2-size", {"cache": {"l2_size": size}}))
+    for latency in [5, 10, 20]:
+        sweeps.append(("l2-lat-%02d" % latency, "l2-latency", {
+            "cache": {"l2_tag_latency": latency, "l2_data_latency": latency},
+        }))
+
+    # Sweep the L1D prefetcher (no L2 prefetcher), then the L2 prefetcher
+    # behind a stride L1D prefetcher
+    for pf in ["none", "stride", "tagged", "ampm", "bop"]:
+        sweeps.append(("pf-l1d-%s" % pf, "prefetch-l1d", {
+            "cache": {"l1d_prefetcher": pf, "l2_prefetcher": "none"},
+        }))
+    for pf in ["stride", "ampm", "bop", "spp"]:
+        sweeps.append(("pf-l2-%s" % pf, "prefetch-l2", {
+            "cache": {"l1d_prefetcher": "stride", "l2_prefetcher": pf},
+        }))
+
+    # Add a shared L3
+    for size in ["2MiB", "8MiB"]:
+        sweeps.append(("l3-%s" % size, "l3", {"cache": {"l3_size": size}}))
+
+    # Sweep the branch predictor of the cores, the default is a TournamentBP
+    # with 2K local, 8K global and 8K choice entries
+    for bp in ["local", "bimode", "tage", "ltage", "tage-sc-l-8kb",
+               "tage-sc-l-64kb", "perceptron-8kb", "perceptron-64kb"]:
+        sweeps.append(("bp-%s" % bp, "bpred", {"branch_pred": bp}))
+    for name, scale in [("small", 0.5), ("big", 2)]:
+        sweeps.append(("bp-tournament-%s" % name, "bpred", {"branch_pred": {
+            "type": "tournament",
+            "localPredictorSize": int(2048 * scale),
+            "localHistoryTableSize": int(2048 * scale),
+            "globalPredictorSize": int(8192 * scale),
+            "choicePredictorSize": int(8192 * scale),
+        }}))
+
+    # Sweep DRAM channels, then the interleaving across two channels
+    for channels in [2, 4, 8]:
+        sweeps.append(("mem-%dch" % channels, "mem-channels", {
+            "memory": {"channels": channels},
+        }))
+    for size in [64, 256, 4096]:
+        sweeps.append(("mem-2ch-il-%d" % size, "mem-interleave", {
+            "memory": {"channels": 2, "interleave_size": size},
+        }))
+
+    # Sweep the DRAM interface, with the channels of a typical system
+    for interface, channels in [
+        ("DDR4-3200", 1), ("DDR4-3200", 2), ("DDR5-4400", 2),
+        ("DDR5-6400", 2), ("LPDDR5-6400", 4), ("HBM-1000", 8),
+    ]:
+        sweeps.append(("mem-%s-%dch" % (interface.lower(), channels), "mem-type", {
+            "memory": {"interface": interface, "channels": channels},
+        }))
+
+    return sweeps
+
+
+def multicore_sweeps(core_counts=(1, 2, 4, 8)):
+    """
+    multicore_sweeps returns the multi-core systems the threaded workloads of
+    WORKLOADS are run on, with the classic caches (snooping crossbar) and with
+    the Ruby MESI_Two_Level hierarchy, to compare throughput scaling and
+    coherence traffic across core counts. The system dict holds the number of
+    cores under "cores" and the MESITwoLevelCache keyword arguments under
+    "ruby".
+
+    :return: a list of (name, group, system) tuples.
+    """
+    sweeps = []
+    for cores in core_counts:
+        sweeps.append(("classic-%dc" % cores, "cores-classic", {"cores": cores}))
+    for cores in core_counts:
+        sweeps.append(("ruby-%dc" % cores, "cores-ruby", {"cores": cores, "ruby": {}}))
+    return sweeps
+
+
+def hetero_sweeps(num_cores=4, big_config="base"):
+    """
+    hetero_sweeps returns the big.LITTLE splits of num_cores cores, from all
+    big (O3) to all little (in-order) cores, e.g. "4b0l", "3b1l", ...
+
+    :param big_config: name of the o3_sweeps configuration of the big cores.
+    :return: a list of (name, group, params) tuples, params are num_big,
+    num_little and big_config.
+    """
+    sweeps = []
+    for num_big in range(num_cores, -1, -1):
+        num_little = num_cores - num_big
+        sweeps.append(("%db%dl" % (num_big, num_little), "big-little", {
+            "num_big": num_big,
+            "num_little": num_little,
+            "big_config": big_config,
+        }))
+    return sweeps
+
+
+def load_speedups(csv_paths, big_config="base"):
+    """
+    load_speedups reads the big core speedup of every workload, i.e. the
+    simSeconds of its in-order run over the simSeconds of its
+    o3-<big_config> run, from parse_stats.py CSVs such as
+    results-bfs/bfs-all.csv.
+
+    :return: a dict of workload -> speedup, for the workloads that have both
+    runs.
+    """
+    seconds = {}
+    for path in csv_paths:
+        with open(path, newline="") as f:
+            for row in csv.DictReader(f):
+                if row.get("simSeconds"):
+                    seconds[row["Run"]] = float(row["simSeconds"])
+    speedups = {}
+    for workload in list(WORKLOADS) + list(RESOURCE_WORKLOADS):
+        little = seconds.get(run_id("inorder", workload))
+        big = seconds.get(run_id(f"o3-{big_config}", workload))
+        if little and big:
+            speedups[workload] = little / big
+    return speedups
+
+
+def place_programs(programs, num_big, policy="speedup", speedups=None):
+    """
+    place_programs assigns the programs of a mix to cores. Cores 0 to
+    num_big - 1 are big, the others little (see HeterogeneousCPU).
+
+    :param programs: list of workload names, one per core.
+    :param policy: "speedup" puts the programs that gain the most from a big
+    core on the big cores, "worst" does the opposite (a lower bound for the
+    placement), "given" keeps the order of programs.
+    :param speedups: dict of workload -> big core speedup (load_speedups),
+    workloads without a speedup count as 1.
+    :return: the programs in core order.
+    """
+    if policy == "given" or num_big == 0 or num_big == len(programs):
+        return list(programs)
+    speedups = speedups or {}
+    # sorted is stable, so ties keep the given order
+    ranked = sorted(programs, key=lambda w: speedups.get(w, 1.0), reverse=True)
+    if policy == "speedup":
+        return ranked
+    if policy == "worst":
+        return ranked[::-1]
+    raise ValueError(f"unknown placement policy {policy!r}")
+
+
+def _knob_params(levels):
+    cfg = base.copy()
+    for knob, value in levels.items():
+        for param in O3_KNOBS[knob][0]:
+            cfg[param] = value
+    return cfg
+
+
+def o3_design(kind="fractional", n=64, seed=0, knobs=None):
+    """
+    o3_design returns O3 configurations that vary several knobs at once, so
+    sensitivity.py can estimate interactions between knobs (the
+    one-dimensional sweeps of o3_sweeps cannot).
+
+    :param kind: "full" for a two-level full factorial over the lowest and
+    highest level of each knob, "fractional" for a half fraction of it (the
+    last knob is the product of the others, resolution len(knobs)), or
+    "random" for n points drawn uniformly from the levels of each knob.
+    :param n: number of points of a random design.
+    :param seed: seed of a random design.
+    :param knobs: names of O3_KNOBS to vary, all of them by default. The
+    other parameters stay at their base value.
+    :return: a list of (name, group, params) tuples like o3_sweeps.
+    """
+    knobs = list(knobs or O3_KNOBS)
+    points = []
+    if kind in ("full", "fractional"):
+        n_base = len(knobs) - 1 if kind == "fractional" else len(knobs)
+        for signs in itertools.product([-1, 1], repeat=n_base):
+            signs = list(signs)
+            if kind == "fractional":
+                prod = 1
+                for sign in signs:
+                    prod *= sign
+                signs.append(prod)
+            points.append({
+                knob: O3_KNOBS[knob][1][0 if sign < 0 else -1]
+                for knob, sign in zip(knobs, signs)
+            })
+    elif kind == "random":
+        rng = random.Random(seed)
+        for _ in range(n):
+            points.append({knob: rng.choice(O3_KNOBS[knob][1]) for knob in knobs})
+    else:
+        raise ValueError(f"unknown design kind '{kind}'")
+
+    return [
+        ("%s-%03d" % (kind, i), f"design-{kind}", _knob_params(levels))
+        for i, levels in enumerate(points)
+    ]
+
+
+def o3_params(config):
+    """
+    o3_params returns the OutOfOrderCPU parameters of a configuration of
+    o3_sweeps or of a factorial o3_design by name, e.g. o3_params("width-08").
+    Random designs depend on their seed and are only known from manifests.
+
+    :return: the params dict, or None if there is no such configuration.
+    """
+    for name, _, params in o3_sweeps("all") + o3_design("full") + o3_design("fractional"):
+        if name == config:
+            return params
+    return None
+
+
+def run_id(config, workload, flag_set=DEFAULT_FLAG_SET, system="default"):
+    """
+    run_id builds the simulator id of a run, e.g. "o3-width-08-bfs". Runs
+    built with a flag set other than the default get it appended, e.g.
+    "o3-width-08-bfs-O3-unroll", and runs on a system other than the default
+    get it after an "@", e.g. "o3-base@l2-1MiB-bfs", so existing run lists
+    keep working.
+
+    :param config: "inorder", "inorder-<in-order sweep name>" or
+    "o3-<sweep name>".
+    :param workload: name of the workload.
+    :param flag_set: key of FLAG_SETS, or None for resource binaries.
+    :param system: name of a system_sweeps or multicore_sweeps configuration.
+    """
+    if system != DEFAULT_SYSTEM[0]:
+        config = f"{config}@{system}"
+    sim_id = f"{config}-{workload}"
+    if flag_set is not None and flag_set != DEFAULT_FLAG_SET:
+        sim_id += f"-{flag_set}"
+    return sim_id
+
+
+def _file_md5(path):
+    md5 = hashlib.md5()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(1 << 20), b""):
+            md5.update(chunk)
+    return md5.hexdigest()
+
+
+def build_binary(workload, flag_set=DEFAULT_FLAG_SET):
+    """
+    build_binary returns the path of the workload binary compiled with the
+    given flag set. Binaries are cached in workloads/<dir>/build/<flag set>/
+    and only rebuilt when the flags changed or the source is newer.
+
+    :param workload: key of WORKLOADS.
+    :param flag_set: key of FLAG_SETS.
+    :return: the absolute path of the binary.
+    """
+    info = WORKLOADS[workload]
+    cflags = FLAG_SETS[flag_set]
+    src_dir = os.path.join(WORKLOADS_DIR, info["dir"])
+    variant_dir = os.path.join("build", flag_set)
+    binary = os.path.join(src_dir, variant_dir, info["binary"])
+    stamp = os.path.join(src_dir, variant_dir, "cflags.txt")
+
+    sources = [
+        os.path.join(src_dir, name)
+        for name in os.listdir(src_dir)
+        if name.endswith((".cpp", ".h"))
+    ]
+    if os.path.isfile(binary) and os.path.isfile(stamp):
+        with open(stamp) as f:
+            same_flags = f.read().strip() == cflags
+        newest_src = max(os.path.getmtime(src) for src in sources)
+        if same_flags and os.path.getmtime(binary) >= newest_src:
+            return binary
+
+    subprocess.run(
+        [
+            "make",
+            "-C", src_dir,
+            info.get("target", "variant"),
+            f"VARIANT_DIR={variant_dir}",
+            f"OPT={cflags}",
+        ],
+        check=True,
+    )
+    with open(stamp, "w") as f:
+        f.write(cflags + "\n")
+    return binary
+
+
+def run_dir(outdir, sim_id):
+    """
+    run_dir returns the output directory of a run. Under multisim every
+    simulator process already has its own outdir, so the id is only appended
+    when outdir is the parent directory of all runs.
+    """
+    if os.path.basename(os.path.normpath(outdir)) == sim_id:
+        return outdir
+    return os.path.join(outdir, sim_id)
+
+
+def write_manifest(outdir, sim_id, **fields):
+    """
+    write_manifest records how a run was configured in
+    <outdir>/<sim_id>/manifest.json, next to its stats.txt. parse_stats.py
+    joins these fields onto the collected statistics. The file is replaced
+    atomically. The sweep scripts call it through manifest_on_start in
+    exit_handlers.py, so only runs that are simulated get a manifest.
+
+    :param outdir: gem5 output directory (usually m5.options.outdir).
+    :param sim_id: id of the simulator.
+    :param fields: JSON serializable fields describing the run, e.g.
+    workload, cpu, config, group, flag_set and params.
+    """
+    path = os.path.join(run_dir(outdir, sim_id), MANIFEST_NAME)
+    manifest = {"id": sim_id}
+    manifest.update(fields)
+    binary = manifest.get("binary")
+    if binary and os.path.isfile(binary):
+        manifest["binary_md5"] = _file_md5(binary)
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    tmp = path + ".tmp"
+    with open(tmp, "w") as f:
+        json.dump(manifest, f, indent=2, sort_keys=True)
+    os.replace(tmp, path)
+    return path
+
+
+def read_manifest(run_path):
+    """
+    read_manifest loads manifest.json from a run directory.
+
+    :return: the manifest as a dict, or None if the run has no manifest.
+    """
+    path = os.path.join(run_path, MANIFEST_NAME)
+    if not os.path.isfile(path):
+        return None
+    with open(path) as f:
+        return json.load(f)
+
+
+def write_status(run_path, **fields):
+    """
+    write_status records how a run ended in <run_path>/status.json, next to
+    its stats.txt: the exit cause of the simulation (see completion_marker
+    in exit_handlers.py) and the exit status of the gem5 process (see
+    jobqueue.py). Fields already in the file are kept unless overwritten.
+
+    :return: the path of the status file.
+    """
+    path = os.path.join(run_path, STATUS_NAME)
+    status = read_status(run_path) or {}
+    status.update(fields)
+    os.makedirs(run_path, exist_ok=True)
+    tmp = path + ".tmp"
+    with open(tmp, "w") as f:
+        json.dump(status, f, indent=2, sort_keys=True)
+    os.replace(tmp, path)
+    return path
+
+
+def read_status(run_path):
+    """
+    read_status loads status.json from a run directory.
+
+    :return: the status as a dict, or None if the run has none.
+    """
+    path = os.path.join(run_path, STATUS_NAME)
+    if not os.path.isfile(path):
+        return None
+    with open(path) as f:
+        return json.load(f)
+
+
+def stats_complete(stats_path):
+    """
+    stats_complete tells if a stats.txt was completely written: gem5 ends
+    every dump with an "End Simulation Statistics" line, a killed run stops
+    in the middle of a dump (or before the first one).
+    """
+    if not os.path.isfile(stats_path):
+        return False
+    with open(stats_path, "rb") as f:
+        f.seek(0, os.SEEK_END)
+        f.seek(max(0, f.tell() - 4096))
+        lines = f.read().decode(errors="replace").strip().splitlines()
+    return bool(lines) and STATS_END in lines[-1]
+
+
+def run_status(run_path):
+    """
+    run_status classifies a run directory:
+
+      complete  the run reached its end (status.json has the "exited"
+                completion marker, see completion_marker in
+                exit_handlers.py), stats.txt is complete and the run did
+                not fail
+      stopped   the watchdog (see exit_handlers.py) or the job queue stopped
+                the run before the workload finished, status.json has the
+                reason
+      failed    status.json records a non-zero exit status of gem5
+      partial   stats.txt is missing or truncated, or the run has not
+                exited yet, e.g. it is still running or was killed (the
+                stats dumped at the end of the ROI make stats.txt look
+                complete before the run ends)
+      missing   there is no run directory
+
+    Runs simulated before status files existed are complete if their
+    stats.txt is.
+    """
+    if not os.path.isdir(run_path):
+        return "missing"
+    status = read_status(run_path) or {}
+    if status.get("stopped"):
+        return "stopped"
+    if status.get("exit_status") not in (None, 0):
+        return "failed"
+    if status and status.get("status") != "exited":
+        return "partial"
+    if not stats_complete(os.path.join(run_path, "stats.txt")):
+        return "partial"
+    return "complete"
+
+
+def _strip_suffix(name, suffixes):
+    for suffix in sorted(suffixes, key=len, reverse=True):
+        if name.endswith("-" + suffix):
+            return name[: -len(suffix) - 1], suffix
+    return name, None
+
+
+def parse_run_id(sim_id):
+    """
+    parse_run_id recovers the manifest fields encoded in a run id, for runs
+    that were simulated before manifests existed (e.g. the results-* CSVs).
+
+    :return: a dict with id, cpu, config, group, system, system_group,
+    workload and flag_set. Fields that cannot be recovered are None.
+    """
+    rest, flag_set = _strip_suffix(sim_id, FLAG_SETS)
+    rest, workload = _strip_suffix(
+        rest, list(WORKLOADS) + list(RESOURCE_WORKLOADS) + list(MIXES)
+    )
+    rest, _, system = rest.partition("@")
+    system = system or DEFAULT_SYSTEM[0]
+    system_group = None
+    for name, sweep_group, _ in system_sweeps() + multicore_sweeps():
+        if name == system:
+            system_group = sweep_group
+            break
+    if workload in RESOURCE_WORKLOADS:
+        flag_set = None
+    elif workload is not None and flag_set is None:
+        flag_set = DEFAULT_FLAG_SET
+
+    cpu, _, config = rest.partition("-")
+    if cpu == "inorder" and not config:
+        config, group = "inorder", "inorder"
+    elif cpu == "inorder":
+        group = None
+        for name, sweep_group, _ in inorder_sweeps():
+            if name == config:
+                group = sweep_group
+                break
+    elif cpu == "o3":
+        group = None
+        for name, sweep_group, _ in o3_sweeps("all"):
+            if name == config:
+                group = sweep_group
+                break
+        kind = config.rpartition("-")[0]
+        if group is None and kind in ("full", "fractional", "random"):
+            group = f"design-{kind}"
+    elif cpu == "hetero":
+        # hetero-<split>-<placement policy>
+        group = "big-little"
+    else:
+        cpu, config, group = None, rest, None
+
+    return {
+        "id": sim_id,
+        "cpu": cpu,
+        "config": config,
+        "group": group,
+        "system": system,
+        "system_group": system_group,
+        "workload": workload,
+        "flag_set": flag_set,
+    }
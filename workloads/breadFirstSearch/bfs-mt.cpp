@@ -0,0 +1,91 @@
+#include <cstdlib>
+#include <iostream>
+#include <vector>
+#include <pthread.h>
+
+#include "graph.h"
+
+#ifdef GEM5
+#include "gem5/m5ops.h"
+#endif
+
+// Usage: bfs-mt <threads>
+// Level synchronous version of bfs.cpp: every level the frontier is split
+// between the threads, vertices are claimed with an atomic exchange on
+// visited, and the per-thread next frontiers are concatenated by thread 0
+// between two barriers. In gem5 SE mode every thread needs its own core, so
+// run it with as many cores as threads.
+
+int threads = 1;
+pthread_barrier_t barrier;
+std::vector<int> frontier;
+std::vector<std::vector<int>> next;
+
+void *bfs(void *arg)
+{
+    long id = (long)arg;
+    while (!frontier.empty()) {
+        size_t begin = frontier.size() * id / threads;
+        size_t end = frontier.size() * (id + 1) / threads;
+        for (size_t v = begin; v < end; v++) {
+            int vertex = frontier[v];
+            int start = columns[vertex];
+            int stop = columns[vertex + 1];
+            for (int i = start; i < stop; i++) {
+                int neighbor = edges[i];
+                if (visited[neighbor] == 0 &&
+                    __atomic_exchange_n(&visited[neighbor], 1, __ATOMIC_RELAXED) == 0) {
+                    next[id].push_back(neighbor);
+                }
+            }
+        }
+
+        pthread_barrier_wait(&barrier);
+        if (id == 0) {
+            frontier.clear();
+            for (auto &local: next) {
+                frontier.insert(frontier.end(), local.begin(), local.end());
+                local.clear();
+            }
+        }
+        pthread_barrier_wait(&barrier);
+    }
+    return nullptr;
+}
+
+int main(int argc, char *argv[])
+{
+    threads = argc > 1 ? atoi(argv[1]) : 1;
+    if (threads < 1)
+        threads = 1;
+
+    std::vector<pthread_t> workers(threads);
+    next.resize(threads);
+    pthread_barrier_init(&barrier, nullptr, threads);
+
+    frontier.push_back(0);
+    visited[0] = 1;
+
+    std::cout << "Beginning BFS with " << threads << " threads ..." << std::endl;
+
+#ifdef GEM5
+    m5_work_begin(0,0);
+#endif
+
+    for (long t = 1; t < threads; t++) {
+        pthread_create(&workers[t], nullptr, bfs, (void *)t);
+    }
+    bfs((void *)0);
+    for (long t = 1; t < threads; t++) {
+        pthread_join(workers[t], nullptr);
+    }
+
+#ifdef GEM5
+    m5_work_end(0,0);
+#endif
+
+    std::cout << "Finished BFS." << std::endl;
+
+    pthread_barrier_destroy(&barrier);
+    return 0;
+}
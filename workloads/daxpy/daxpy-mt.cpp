@@ -0,0 +1,88 @@
+#include <cstdio>
+#include <cstdlib>
+#include <random>
+#include <pthread.h>
+
+#ifdef GEM5
+#include "gem5/m5ops.h"
+#endif
+
+// Usage: daxpy-mt <threads>
+// Same computation as daxpy.cpp, with the array split in contiguous slices,
+// one per thread. In gem5 SE mode every thread needs its own core, so run it
+// with as many cores as threads.
+
+const int N = 32768;
+double X[N], Y[N], alpha = 0.5;
+
+struct Slice {
+  int begin;
+  int end;
+};
+
+void *daxpy(void *arg)
+{
+  Slice *slice = (Slice *)arg;
+  // Same number of passes over the data as the single threaded version
+  for (int pass = 0; pass < 10; ++pass)
+  {
+    for (int i = slice->begin; i < slice->end; ++i)
+    {
+      Y[i] = alpha * X[i] + Y[i];
+    }
+  }
+  return nullptr;
+}
+
+int main(int argc, char *argv[])
+{
+  int threads = argc > 1 ? atoi(argv[1]) : 1;
+  if (threads < 1)
+    threads = 1;
+
+  std::random_device rd; std::mt19937 gen(rd());
+  std::uniform_real_distribution<> dis(1, 2);
+  for (int i = 0; i < N; ++i)
+  {
+    X[i] = dis(gen);
+    Y[i] = dis(gen);
+  }
+
+  pthread_t *workers = new pthread_t[threads];
+  Slice *slices = new Slice[threads];
+  for (int t = 0; t < threads; ++t)
+  {
+    slices[t].begin = (long)N * t / threads;
+    slices[t].end = (long)N * (t + 1) / threads;
+  }
+
+#ifdef GEM5
+  m5_work_begin(0,0);
+#endif
+
+  // Start of daxpy loop, the main thread works on the first slice
+  for (int t = 1; t < threads; ++t)
+  {
+    pthread_create(&workers[t], nullptr, daxpy, &slices[t]);
+  }
+  daxpy(&slices[0]);
+  for (int t = 1; t < threads; ++t)
+  {
+    pthread_join(workers[t], nullptr);
+  }
+  // End of daxpy loop
+
+#ifdef GEM5
+  m5_work_end(0,0);
+#endif
+
+  double sum = 0;
+  for (int i = 0; i < N; ++i)
+  {
+    sum += Y[i];
+  }
+  printf("%lf\n", sum);
+  delete[] workers;
+  delete[] slices;
+  return 0;
+}
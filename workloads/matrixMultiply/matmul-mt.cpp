@@ -0,0 +1,90 @@
+#include <cstdio>
+#include <cstdlib>
+#include <random>
+#include <pthread.h>
+
+#ifdef GEM5
+#include "gem5/m5ops.h"
+#endif
+
+// Usage: matmul-mt <threads> [n]
+// C = A * B for n x n double matrices (default n = 128), with the rows of C
+// split in contiguous blocks, one per thread. The i-k-j loop order streams
+// through B and C. In gem5 SE mode every thread needs its own core, so run it
+// with as many cores as threads.
+
+int n = 128;
+int threads = 1;
+double *A, *B, *C;
+
+void *multiply(void *arg)
+{
+  long id = (long)arg;
+  int begin = (long)n * id / threads;
+  int end = (long)n * (id + 1) / threads;
+  for (int i = begin; i < end; ++i)
+  {
+    for (int k = 0; k < n; ++k)
+    {
+      double a = A[i * n + k];
+      for (int j = 0; j < n; ++j)
+      {
+        C[i * n + j] += a * B[k * n + j];
+      }
+    }
+  }
+  return nullptr;
+}
+
+int main(int argc, char *argv[])
+{
+  threads = argc > 1 ? atoi(argv[1]) : 1;
+  if (threads < 1)
+    threads = 1;
+  if (argc > 2)
+    n = atoi(argv[2]);
+
+  A = new double[n * n];
+  B = new double[n * n];
+  C = new double[n * n]();
+  std::random_device rd; std::mt19937 gen(rd());
+  std::uniform_real_distribution<> dis(1, 2);
+  for (int i = 0; i < n * n; ++i)
+  {
+    A[i] = dis(gen);
+    B[i] = dis(gen);
+  }
+
+  pthread_t *workers = new pthread_t[threads];
+
+#ifdef GEM5
+  m5_work_begin(0,0);
+#endif
+
+  // The main thread works on the first block of rows
+  for (long t = 1; t < threads; ++t)
+  {
+    pthread_create(&workers[t], nullptr, multiply, (void *)t);
+  }
+  multiply((void *)0);
+  for (long t = 1; t < threads; ++t)
+  {
+    pthread_join(workers[t], nullptr);
+  }
+
+#ifdef GEM5
+  m5_work_end(0,0);
+#endif
+
+  double sum = 0;
+  for (int i = 0; i < n * n; ++i)
+  {
+    sum += C[i];
+  }
+  printf("%lf\n", sum);
+  delete[] A;
+  delete[] B;
+  delete[] C;
+  delete[] workers;
+  return 0;
+}